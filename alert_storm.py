@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Alert storm load test for the notifier.
+
+Pushes synthetic flagged comments through notifier.send_alerts against a
+webhook sink (see ``test_webhook_server.py --sink``) and reports delivered
+alerts per second and webhook delivery latency percentiles.
+
+Usage:
+    python test_webhook_server.py --sink --latency-ms 20 --throttle-rate 0.01
+    python alert_storm.py --alerts 2000 --senders 4
+"""
+
+import argparse
+import contextlib
+import io
+import random
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+import requests
+import notifier
+from config import KEYWORDS
+from models import Comment
+
+_lock = threading.Lock()
+_deliveries = []
+
+
+def make_comments(count: int) -> List[Comment]:
+    """Generate synthetic flagged comments."""
+    comments = []
+    for i in range(count):
+        keyword = random.choice(KEYWORDS)
+        comments.append(Comment(
+            id=f"LOAD-TEST-2024-0001-{i:06d}",
+            keyword=keyword,
+            title=f"Load test comment {i} on {keyword}",
+            date="2024-01-15T12:00:00Z",
+            full_text=f"Synthetic comment mentioning {keyword} for load testing. " * 20,
+            organization="Load Test Org" if i % 3 == 0 else "",
+            submitter_name=f"Submitter {i}",
+            document_type="Public Submission",
+            score=round(random.random(), 4)
+        ))
+    return comments
+
+
+def _timed_post(post):
+    """Wrap requests.post to record each delivery's status and latency."""
+    def timed(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = post(*args, **kwargs)
+            status = response.status_code
+            return response
+        except requests.RequestException:
+            status = None
+            raise
+        finally:
+            with _lock:
+                _deliveries.append((status, time.perf_counter() - started))
+    return timed
+
+
+def run_storm(sink_url: str, alerts: int, senders: int, channels: str) -> Dict:
+    """
+    Send an alert storm and measure delivery.
+
+    Args:
+        sink_url: Webhook sink URL
+        alerts: Number of synthetic comments to alert on
+        senders: Concurrent send_alerts calls the comments are split across
+        channels: "teams", "email" or "both"
+
+    Returns:
+        Dictionary with throughput and latency results
+    """
+    notifier.TEAMS_WEBHOOK_URL = notifier.EMAIL_WEBHOOK_URL = sink_url
+    notifier.ENABLE_TEAMS_ALERTS = channels in ("teams", "both")
+    notifier.ENABLE_EMAIL_ALERTS = channels in ("email", "both")
+    notifier.requests.post = _timed_post(requests.post)
+
+    comments = make_comments(alerts)
+    batches = [comments[i::senders] for i in range(senders)]
+    _deliveries.clear()
+
+    started = time.perf_counter()
+    # send_alerts prints every alert; keep the console out of the measurement
+    with contextlib.redirect_stdout(io.StringIO()):
+        with ThreadPoolExecutor(max_workers=senders) as executor:
+            list(executor.map(lambda batch: notifier.send_alerts(batch, min_score=0), batches))
+    elapsed = time.perf_counter() - started
+
+    statuses = {}
+    for status, _ in _deliveries:
+        statuses[status] = statuses.get(status, 0) + 1
+    latencies = sorted(seconds for _, seconds in _deliveries)
+    delivered = statuses.get(200, 0)
+
+    results = {
+        "alerts": alerts,
+        "deliveries_attempted": len(_deliveries),
+        "delivered": delivered,
+        "status_counts": statuses,
+        "elapsed_seconds": elapsed,
+        "alerts_per_second": alerts / elapsed if elapsed else 0.0,
+        "deliveries_per_second": delivered / elapsed if elapsed else 0.0
+    }
+    if len(latencies) >= 2:
+        cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+        results.update({"p50_ms": cuts[49] * 1000, "p95_ms": cuts[94] * 1000,
+                        "p99_ms": cuts[98] * 1000, "max_ms": latencies[-1] * 1000})
+    return results
+
+
+def main():
+    """Command-line entry point for the alert storm."""
+    parser = argparse.ArgumentParser(description="Load test notifier.send_alerts against a webhook sink")
+    parser.add_argument("--url", default="http://localhost:5000/webhook", help="Webhook sink URL")
+    parser.add_argument("--alerts", type=int, default=1000)
+    parser.add_argument("--senders", type=int, default=1, help="Concurrent send_alerts calls")
+    parser.add_argument("--channels", choices=("teams", "email", "both"), default="both")
+    args = parser.parse_args()
+
+    base_url = args.url.rsplit("/", 1)[0]
+    try:
+        requests.post(f"{base_url}/clear", timeout=5)
+    except requests.RequestException:
+        print(f"❌ No webhook sink at {base_url}. Start one with: python test_webhook_server.py --sink")
+        return
+
+    print(f"🌩️  Sending {args.alerts} alerts ({args.channels}) with {args.senders} senders to {args.url}")
+    results = run_storm(args.url, args.alerts, args.senders, args.channels)
+
+    print("\n📊 ALERT STORM RESULTS")
+    print("=" * 50)
+    print(f"Alerts: {results['alerts']} in {results['elapsed_seconds']:.2f}s "
+          f"({results['alerts_per_second']:.1f} alerts/s)")
+    print(f"Webhook deliveries: {results['delivered']}/{results['deliveries_attempted']} succeeded "
+          f"({results['deliveries_per_second']:.1f}/s)")
+    print(f"Status codes: {results['status_counts']}")
+    if "p50_ms" in results:
+        print(f"Delivery latency: p50 {results['p50_ms']:.1f} ms | p95 {results['p95_ms']:.1f} ms | "
+              f"p99 {results['p99_ms']:.1f} ms | max {results['max_ms']:.1f} ms")
+
+    sink_stats = requests.get(f"{base_url}/stats", timeout=5).json()
+    print(f"Sink: {sink_stats}")
+
+
+if __name__ == "__main__":
+    main()
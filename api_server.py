@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Read-only HTTP query API for the Comment Watcher.
+
+Serves flagged comments and statistics as JSON from a small pool of
+read-only SQLite connections, so dashboards can poll without blocking the
+monitoring writer (the database runs in WAL mode). Responses carry an ETag
+and Last-Modified derived from the data version that writers bump when a
+cycle commits; unchanged data is answered with 304 or from an in-process
+cache that is dropped as soon as the version moves.
+
+Usage:
+    python api_server.py
+"""
+
+import queue
+import sqlite3
+import sys
+import threading
+import zlib
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Callable, Dict, Tuple
+from flask import Flask, Response, jsonify, request
+from config import (
+    QUERY_API_HOST,
+    QUERY_API_PORT,
+    QUERY_API_POOL_SIZE,
+    QUERY_API_CACHE_SIZE,
+    QUERY_API_PAGE_SIZE,
+    QUERY_API_MAX_PAGE_SIZE,
+    STORAGE_BACKEND
+)
+import storage
+from storage import COMMENT_COLUMNS, COMMENT_SELECT, DATA_VERSION_KEY, read_statistics
+
+app = Flask(__name__)
+
+
+class ConnectionPool:
+    """Fixed-size pool of read-only SQLite connections."""
+
+    def __init__(self, db_file: str, size: int):
+        self.db_file = db_file
+        self._connections = queue.Queue()
+        for _ in range(size):
+            self._connections.put(self._connect())
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(f"file:{self.db_file}?mode=ro", uri=True,
+                               check_same_thread=False)
+        conn.execute('PRAGMA query_only = ON')
+        return conn
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection for the duration of a request."""
+        conn = self._connections.get()
+        try:
+            yield conn
+        finally:
+            # End the read transaction so the next request sees new commits
+            conn.rollback()
+            self._connections.put(conn)
+
+
+class ResponseCache:
+    """LRU cache of response bodies, valid for a single data version."""
+
+    def __init__(self, size: int):
+        self.size = size
+        self.version = None
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, version: str, key: str):
+        with self._lock:
+            if version != self.version:
+                # A writer committed since these were cached
+                self._entries.clear()
+                self.version = version
+                return None
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def put(self, version: str, key: str, body: bytes) -> None:
+        with self._lock:
+            if version != self.version:
+                return
+            self._entries[key] = body
+            if len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+_cache = ResponseCache(QUERY_API_CACHE_SIZE)
+
+
+def get_pool() -> ConnectionPool:
+    """Open the connection pool on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # Make sure the schema exists and the database is in WAL mode
+            storage.init_database()
+            _pool = ConnectionPool(storage.DB_FILE, QUERY_API_POOL_SIZE)
+    return _pool
+
+
+def current_version(cursor) -> Tuple[str, datetime]:
+    """Read the data version and when it was last bumped."""
+    cursor.execute('SELECT value, updated_at FROM sync_state WHERE key = ?', (DATA_VERSION_KEY,))
+    row = cursor.fetchone()
+    if row is None:
+        return "0", None
+    return row[0], datetime.strptime(row[1], "%Y-%m-%d %H:%M:%S").replace(tzinfo=timezone.utc)
+
+
+def pagination() -> Tuple[int, int]:
+    """Parse page and per_page query parameters."""
+    page = max(request.args.get("page", 1, type=int), 1)
+    per_page = request.args.get("per_page", QUERY_API_PAGE_SIZE, type=int)
+    return page, min(max(per_page, 1), QUERY_API_MAX_PAGE_SIZE)
+
+
+def fetch_page(cursor, where: str, params: Tuple, order_by: str) -> Dict:
+    """
+    Run a paginated flagged-comment query.
+
+    Args:
+        cursor: Cursor on a pooled read-only connection
+        where: SQL WHERE clause (may be empty)
+        params: Parameters for the WHERE clause
+        order_by: SQL ORDER BY expression
+
+    Returns:
+        Dictionary with the page of comments and paging fields
+    """
+    page, per_page = pagination()
+    include_text = request.args.get("full", "false").lower() == "true"
+
+    # One extra row tells us whether another page exists
+    cursor.execute(f'''
+        {COMMENT_SELECT}
+        {where}
+        ORDER BY {order_by}
+        LIMIT ? OFFSET ?
+    ''', (*params, per_page + 1, (page - 1) * per_page))
+    comments = [dict(zip(COMMENT_COLUMNS, row)) for row in cursor.fetchall()]
+
+    if not include_text:
+        for comment in comments:
+            comment.pop("full_text", None)
+
+    return {
+        "data": comments[:per_page],
+        "page": page,
+        "per_page": per_page,
+        "has_next": len(comments) > per_page
+    }
+
+
+def cached_response(build: Callable[[sqlite3.Cursor], Dict]) -> Response:
+    """
+    Answer a GET from the cache or the database, honoring conditional headers.
+
+    Args:
+        build: Function producing the JSON payload from a cursor
+
+    Returns:
+        Flask response (200 with body, or 304)
+    """
+    key = request.full_path
+    with get_pool().connection() as conn:
+        cursor = conn.cursor()
+        version, last_modified = current_version(cursor)
+        etag = f"{version}-{zlib.crc32(key.encode('utf-8')):08x}"
+
+        if request.if_none_match.contains(etag) or (
+                not request.if_none_match and last_modified and request.if_modified_since
+                and last_modified.replace(microsecond=0) <= request.if_modified_since):
+            response = Response(status=304)
+        else:
+            body = _cache.get(version, key)
+            if body is None:
+                body = jsonify(build(cursor)).get_data()
+                _cache.put(version, key, body)
+            response = Response(body, mimetype="application/json")
+
+    response.set_etag(etag)
+    if last_modified:
+        response.last_modified = last_modified
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+
+def _escape_like(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+@app.route('/comments/recent', methods=['GET'])
+def recent_comments():
+    """Most recently flagged comments."""
+    return cached_response(lambda cursor: fetch_page(cursor, "", (), "f.created_at DESC, f.id"))
+
+
+@app.route('/comments/keyword/<keyword>', methods=['GET'])
+def comments_by_keyword(keyword: str):
+    """Comments flagged for one keyword."""
+    return cached_response(lambda cursor: fetch_page(
+        cursor, "WHERE f.keyword = ?", (keyword,), "f.created_at DESC, f.id"))
+
+
+@app.route('/comments/date', methods=['GET'])
+def comments_by_date():
+    """Comments posted between ?start= and ?end= (YYYY-MM-DD)."""
+    start, end = request.args.get("start"), request.args.get("end")
+    if not start or not end:
+        return jsonify({"error": "start and end are required (YYYY-MM-DD)"}), 400
+    return cached_response(lambda cursor: fetch_page(
+        cursor, "WHERE f.date >= ? AND f.date <= ?", (start, end), "f.date DESC, f.id"))
+
+
+@app.route('/comments/search', methods=['GET'])
+def search_comments():
+    """Comments whose title, snippet or body contain ?q=."""
+    text = request.args.get("q", "").strip()
+    if not text:
+        return jsonify({"error": "q is required"}), 400
+    pattern = f"%{_escape_like(text)}%"
+    return cached_response(lambda cursor: fetch_page(
+        cursor,
+        r"""WHERE f.title LIKE ? ESCAPE '\' OR f.text_snippet LIKE ? ESCAPE '\'
+            OR COALESCE(b.body, f.full_text) LIKE ? ESCAPE '\'""",
+        (pattern, pattern, pattern),
+        "f.created_at DESC, f.id"))
+
+
+@app.route('/stats', methods=['GET'])
+def stats():
+    """Summary statistics."""
+    return cached_response(read_statistics)
+
+
+@app.route('/', methods=['GET'])
+def index():
+    """List the available endpoints."""
+    return jsonify({
+        "endpoints": [
+            "GET /comments/recent?page=&per_page=&full=",
+            "GET /comments/keyword/<keyword>?page=&per_page=&full=",
+            "GET /comments/date?start=&end=&page=&per_page=&full=",
+            "GET /comments/search?q=&page=&per_page=&full=",
+            "GET /stats"
+        ]
+    })
+
+
+if __name__ == '__main__':
+    print("🚀 Starting Comment Watcher query API...")
+    if STORAGE_BACKEND != "sqlite":
+        # The API reads flagged comments from the watcher database only
+        print(f"❌ The query API needs STORAGE_BACKEND=sqlite (currently {STORAGE_BACKEND!r})")
+        sys.exit(1)
+    print(f"📡 Serving {storage.DB_FILE} read-only at http://{QUERY_API_HOST}:{QUERY_API_PORT}")
+    get_pool()
+    app.run(host=QUERY_API_HOST, port=QUERY_API_PORT, threaded=True)
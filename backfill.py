@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+Historical backfill for the Comment Watcher.
+
+Splits a posted-date range into time windows and processes the windows in
+parallel under the shared API quota. Each window's progress is checkpointed
+in the database, so an interrupted backfill resumes where it stopped.
+Matches are stored and marked as seen without sending live alerts.
+
+Windows run on threads that share one KeywordMatcher. Matching stays
+in-process rather than going through parallel_filter.ParallelFilter: the
+windows wait on the API far longer than they spend matching, and a page
+(at most MAX_PAGE_SIZE comments) is below PARALLEL_FILTER_MIN_BATCH, so a
+process pool would only add overhead.
+
+Usage:
+    python backfill.py <start> <end> [--window-days N] [--workers N] [--keywords a,b]
+    python backfill.py <start> <end> --status
+"""
+
+import argparse
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from datetime import date, timedelta
+from typing import Dict, List, Tuple
+from config import (
+    KEYWORDS,
+    BACKFILL_WINDOW_DAYS,
+    BACKFILL_WORKERS,
+    MAX_PAGE_SIZE,
+    MAX_PAGE_NUMBER
+)
+from budget import BudgetExhausted
+from fetcher import fetch_metadata_window, fetch_comment_detail
+from filter import KeywordMatcher, flag_by_keyword, recheck_full_text
+from scoring import score_comments, update_document_stats
+from clustering import assign_cluster, metadata_fingerprint
+from main import process_comment
+from models import CommentRecord
+from revisions import matched_revision
+from storage_backends import get_backend
+from storage import (
+    create_backfill_windows,
+    load_backfill_windows,
+    update_backfill_window,
+    save_corpus_records,
+    filter_revision_ids,
+    record_revisions,
+    bump_data_version
+)
+
+# Windows in these states still have work to do
+RESUMABLE_STATES = ("pending", "running", "failed")
+
+
+def make_job_id(start_date: str, end_date: str, window_days: int, keywords: List[str]) -> str:
+    """Identify a backfill job by its range, window size and keywords."""
+    keyword_hash = hashlib.sha1("\x1f".join(sorted(keywords)).encode("utf-8")).hexdigest()[:8]
+    return f"{start_date}_{end_date}_{window_days}d_{keyword_hash}"
+
+
+def split_range(start_date: str, end_date: str, window_days: int) -> List[Tuple[str, str]]:
+    """
+    Split an inclusive date range into consecutive windows.
+
+    Args:
+        start_date: First date (YYYY-MM-DD)
+        end_date: Last date (YYYY-MM-DD)
+        window_days: Days per window
+
+    Returns:
+        List of inclusive (window_start, window_end) date strings
+    """
+    start = date.fromisoformat(start_date)
+    end = date.fromisoformat(end_date)
+    windows = []
+    while start <= end:
+        window_end = min(start + timedelta(days=window_days - 1), end)
+        windows.append((start.isoformat(), window_end.isoformat()))
+        start = window_end + timedelta(days=1)
+    return windows
+
+
+def store_matches(metadata: List[CommentRecord], keywords: List[str],
+                  matcher: KeywordMatcher) -> int:
+    """
+    Confirm and store keyword matches from one page without alerting.
+
+    Args:
+        metadata: Comment metadata records from one page
+        keywords: Keywords to match
+        matcher: Matcher for keywords, shared by the whole backfill
+
+    Returns:
+        Number of comments stored
+    """
+    flagged = flag_by_keyword(metadata, keywords, verbose=False, matcher=matcher)
+    if not flagged:
+        return 0
+
+    flagged_ids = [comment_id for comment_id, _ in flagged]
+    already_seen = get_backend().filter_seen_ids(flagged_ids) | filter_revision_ids(flagged_ids)
+    metadata_by_id = {item.id: item for item in metadata}
+
+    confirmed = []
+    revisions = []
+    for comment_id, _ in flagged:
+        if comment_id in already_seen:
+            continue
+        comment_data = fetch_comment_detail(comment_id)
+        save_corpus_records([comment_data], has_detail=True)
+        keyword = recheck_full_text(comment_data, matcher)
+        if not keyword:
+            continue
+        processed_comment = process_comment(comment_data, keyword)
+        metadata_item = metadata_by_id.get(comment_id)
+        assignment = assign_cluster(comment_data, keyword,
+                                    metadata_fingerprint(metadata_item) if metadata_item else None)
+        if assignment:
+            processed_comment.cluster_id = assignment["cluster_id"]
+        confirmed.append(processed_comment)
+        revisions.append(matched_revision(comment_data, matcher))
+
+    if confirmed:
+        update_document_stats(confirmed)
+        score_comments(confirmed, keywords)
+        backend = get_backend()
+        backend.save_flagged_comments(confirmed)
+        for comment in confirmed:
+            backend.mark_as_seen(comment.id)
+        record_revisions(revisions)
+        bump_data_version()
+
+    return len(confirmed)
+
+
+def process_window(job_id: str, window: Dict, keywords: List[str], matcher: KeywordMatcher,
+                   stop: threading.Event) -> List[Tuple[str, str]]:
+    """
+    Process one window from its last checkpoint.
+
+    Args:
+        job_id: Backfill job identifier
+        window: Window checkpoint dictionary
+        keywords: Keywords to match
+        matcher: Matcher for keywords, shared by every window
+        stop: Set when the backfill should stop early
+
+    Returns:
+        Sub-windows to process instead, if the window was too large to page
+        through; otherwise an empty list
+    """
+    start, end = window["window_start"], window["window_end"]
+    page = window["last_page"] + 1
+    update_backfill_window(job_id, start, end, "running")
+
+    while not stop.is_set():
+        metadata, meta = fetch_metadata_window(start, end, page)
+
+        # The API caps paging per query, so oversized windows are halved
+        total = meta.get("totalElements", 0)
+        if page == 1 and total > MAX_PAGE_SIZE * MAX_PAGE_NUMBER and start != end:
+            first_day, last_day = date.fromisoformat(start), date.fromisoformat(end)
+            first_end = first_day + timedelta(days=(last_day - first_day).days // 2)
+            halves = [(start, first_end.isoformat()),
+                      ((first_end + timedelta(days=1)).isoformat(), end)]
+            create_backfill_windows(job_id, halves)
+            update_backfill_window(job_id, start, end, "split")
+            print(f"✂️  Window {start}..{end} has {total} comments, splitting")
+            return halves
+
+        save_corpus_records(metadata)
+        stored = store_matches(metadata, keywords, matcher)
+        update_backfill_window(job_id, start, end, "running", last_page=page, matched=stored)
+
+        if not meta.get("hasNextPage") or page >= MAX_PAGE_NUMBER:
+            if meta.get("hasNextPage"):
+                print(f"⚠️  Window {start}..{end} exceeds the API paging limit; "
+                      f"comments past page {page} were not reached")
+            update_backfill_window(job_id, start, end, "done")
+            print(f"✅ Window {start}..{end} done")
+            return []
+        page += 1
+
+    update_backfill_window(job_id, start, end, "pending")
+    return []
+
+
+def run_backfill(start_date: str, end_date: str, window_days: int = None,
+                 workers: int = None, keywords: List[str] = None) -> Dict:
+    """
+    Backfill a date range, resuming from any existing checkpoints.
+
+    Args:
+        start_date: First posted date (YYYY-MM-DD)
+        end_date: Last posted date (YYYY-MM-DD)
+        window_days: Days per window (defaults to config)
+        workers: Windows processed in parallel (defaults to config)
+        keywords: Keywords to match (defaults to config)
+
+    Returns:
+        Dictionary with the job ID and window counts by status
+    """
+    window_days = window_days or BACKFILL_WINDOW_DAYS
+    workers = workers or BACKFILL_WORKERS
+    keywords = keywords or KEYWORDS
+
+    job_id = make_job_id(start_date, end_date, window_days, keywords)
+    create_backfill_windows(job_id, split_range(start_date, end_date, window_days))
+    pending = [w for w in load_backfill_windows(job_id) if w["status"] in RESUMABLE_STATES]
+
+    print(f"🕰️  Backfill {job_id}: {len(pending)} windows to process with {workers} workers")
+
+    matcher = KeywordMatcher(keywords)
+    stop = threading.Event()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        running = {executor.submit(process_window, job_id, w, keywords, matcher, stop): w for w in pending}
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                window = running.pop(future)
+                start, end = window["window_start"], window["window_end"]
+                try:
+                    for sub_start, sub_end in future.result():
+                        sub_window = {"window_start": sub_start, "window_end": sub_end, "last_page": 0}
+                        running[executor.submit(process_window, job_id, sub_window, keywords, matcher, stop)] = sub_window
+                except BudgetExhausted as e:
+                    stop.set()
+                    update_backfill_window(job_id, start, end, "pending")
+                    print(f"⏸️  Stopping backfill, quota exhausted: {e}")
+                except Exception as e:
+                    update_backfill_window(job_id, start, end, "failed", error=str(e))
+                    print(f"❌ Window {start}..{end} failed: {e}")
+
+    return summarize(job_id)
+
+
+def summarize(job_id: str) -> Dict:
+    """Count a job's windows by status."""
+    windows = load_backfill_windows(job_id)
+    counts = {}
+    for window in windows:
+        counts[window["status"]] = counts.get(window["status"], 0) + 1
+    return {
+        "job_id": job_id,
+        "windows": len(windows),
+        "status_counts": counts,
+        "matched": sum(window["matched"] for window in windows)
+    }
+
+
+def print_status(job_id: str) -> None:
+    """Print the checkpoint of every window in a job."""
+    print(f"🕰️  BACKFILL {job_id}")
+    print("=" * 50)
+    for window in load_backfill_windows(job_id):
+        print(f"  {window['window_start']}..{window['window_end']}  {window['status']:8s} "
+              f"page {window['last_page']:2d}  matched {window['matched']}"
+              f"{'  ' + window['error'] if window['error'] else ''}")
+
+
+def main():
+    """Command-line entry point for the backfill."""
+    parser = argparse.ArgumentParser(description="Backfill historical comments without live alerts")
+    parser.add_argument("start", help="First posted date (YYYY-MM-DD)")
+    parser.add_argument("end", help="Last posted date (YYYY-MM-DD)")
+    parser.add_argument("--window-days", type=int, default=BACKFILL_WINDOW_DAYS)
+    parser.add_argument("--workers", type=int, default=BACKFILL_WORKERS)
+    parser.add_argument("--keywords", help="Comma-separated keywords (defaults to config)")
+    parser.add_argument("--status", action="store_true", help="Show checkpoints and exit")
+    args = parser.parse_args()
+
+    keywords = [k.strip() for k in args.keywords.split(",")] if args.keywords else KEYWORDS
+
+    if args.status:
+        print_status(make_job_id(args.start, args.end, args.window_days, keywords))
+        return
+
+    summary = run_backfill(args.start, args.end, args.window_days, args.workers, keywords)
+    print(f"\n🎉 Backfill {summary['job_id']}: {summary['matched']} comments stored")
+    print(f"📈 Windows: {summary['status_counts']}")
+
+
+if __name__ == "__main__":
+    main()
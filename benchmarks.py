@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for the Comment Watcher's CPU-bound stages.
+
+Measures keyword filtering throughput: the serial matcher used by
+filter.py against ParallelFilter at increasing worker counts, so the
+scaling with core count is visible on the machine at hand. With --storage,
+measures saving flagged comments and querying one month of them through
+each storage backend instead.
+
+Usage:
+    python benchmarks.py [--comments N] [--workers 1,2,4,8] [--chunksize N]
+    python benchmarks.py --storage [--comments N]
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+from typing import List
+from config import KEYWORDS
+from filter import KeywordMatcher
+from models import Comment, CommentRecord
+from normalizer import normalize_text
+from parallel_filter import ParallelFilter, document_fields
+from storage import COMMENT_COLUMNS
+from storage_backends import BACKENDS, create_backend
+
+_FILLER = ("the agency should consider the economic impact on small farms and "
+           "rural communities before finalizing this <b>proposed</b> rule &amp; "
+           "its requirements for recordkeeping and reporting").split()
+
+
+def make_corpus(count: int, match_rate: float = 0.05, words: int = 300) -> List[CommentRecord]:
+    """Generate synthetic comments, a fraction of which mention a keyword."""
+    rng = random.Random(42)
+    items = []
+    for i in range(count):
+        body = [rng.choice(_FILLER) for _ in range(words)]
+        if rng.random() < match_rate:
+            body.insert(rng.randrange(words), rng.choice(KEYWORDS).upper())
+        items.append(CommentRecord(
+            f"BENCH-2024-0001-{i:07d}",
+            title=f"Comment {i} on the proposed rule",
+            comment=" ".join(body)
+        ))
+    return items
+
+
+def bench_serial(items: List[CommentRecord]) -> float:
+    """Seconds to match every item in this process."""
+    matcher = KeywordMatcher(KEYWORDS)
+    started = time.perf_counter()
+    for item in items:
+        matcher.match_texts(normalize_text(field).text for field in document_fields(item) if field)
+    return time.perf_counter() - started
+
+
+def bench_parallel(items: List[CommentRecord], workers: int, chunksize: int = None) -> float:
+    """Seconds to match every item with a pool of ``workers`` processes."""
+    with ParallelFilter(KEYWORDS, workers=workers, chunksize=chunksize, min_batch=0) as engine:
+        # Warm the pool so process start-up isn't counted
+        engine.match([document_fields(item) for item in items[:workers]])
+        started = time.perf_counter()
+        engine.flag(items)
+        return time.perf_counter() - started
+
+
+def make_flagged(count: int, months: int = 12) -> List[Comment]:
+    """Generate flagged comments posted across the last ``months`` months of 2024."""
+    rng = random.Random(42)
+    return [Comment(
+        id=f"BENCH-2024-0001-{i:07d}",
+        keyword=rng.choice(KEYWORDS),
+        title=f"Comment {i} on the proposed rule",
+        date=f"2024-{12 - i % months:02d}-{1 + i % 28:02d}T05:00:00Z",
+        full_text=" ".join(rng.choice(_FILLER) for _ in range(300)),
+        docket_id=f"BENCH-2024-{i % 20:04d}"
+    ) for i in range(count)]
+
+
+def bench_storage(comments: List[Comment]) -> None:
+    """Print save and one-month query times for every storage backend."""
+    # Snippets are derived from the body on access; build them up front so only storage is timed
+    rows = [{column: comment.get(column) for column in COMMENT_COLUMNS if column != "created_at"}
+            for comment in comments]
+    for name in BACKENDS:
+        # Each backend writes into a scratch directory, never the live database
+        with tempfile.TemporaryDirectory() as scratch:
+            cwd = os.getcwd()
+            os.chdir(scratch)
+            try:
+                backend = create_backend(name)
+                started = time.perf_counter()
+                for start in range(0, len(rows), 500):
+                    backend.save_flagged_comments(rows[start:start + 500])
+                saved = time.perf_counter() - started
+
+                started = time.perf_counter()
+                found = backend.get_comments_by_date_range("2024-06-01", "2024-06-30")
+                queried = time.perf_counter() - started
+            finally:
+                os.chdir(cwd)
+        print(f"{name:>10}: save {len(rows) / saved:10.0f} comments/s | "
+              f"one-month query {queried * 1000:8.1f} ms ({len(found)} comments)")
+
+
+def main():
+    """Run the filter scaling benchmark, or the storage benchmark with --storage."""
+    cores = os.cpu_count() or 1
+    default_workers = sorted({1, 2, 4, cores} | {n for n in (8, 16) if n <= cores})
+
+    parser = argparse.ArgumentParser(description="Benchmark keyword filtering throughput")
+    parser.add_argument("--comments", type=int, default=20000)
+    parser.add_argument("--workers", default=",".join(map(str, default_workers)),
+                        help="Comma-separated worker counts")
+    parser.add_argument("--chunksize", type=int, default=None, help="Texts per task (default: auto)")
+    parser.add_argument("--storage", action="store_true", help="Benchmark the storage backends instead")
+    args = parser.parse_args()
+
+    if args.storage:
+        comments = make_flagged(args.comments)
+        print(f"⏱️  Storing {len(comments)} synthetic flagged comments in each backend")
+        print("=" * 60)
+        bench_storage(comments)
+        return
+
+    items = make_corpus(args.comments)
+    print(f"⏱️  Filtering {len(items)} synthetic comments on {cores} cores")
+    print("=" * 60)
+
+    serial = bench_serial(items)
+    print(f"{'serial':>10}: {len(items) / serial:10.0f} comments/s")
+
+    for workers in [int(w) for w in args.workers.split(",")]:
+        elapsed = bench_parallel(items, workers, args.chunksize)
+        print(f"{workers:>3} workers: {len(items) / elapsed:10.0f} comments/s  "
+              f"({serial / elapsed:.2f}x serial, {serial / elapsed / workers:.0%} efficiency)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+API quota budget manager.
+
+Keeps a count of regulations.gov requests in the database so that every run
+and every process using the same API key draws from one shared hourly
+budget. Response rate-limit headers correct the local count, a slice of the
+budget is held back for detail fetches, and callers wait briefly or defer
+their work when the budget runs out instead of hitting 429s.
+"""
+
+import hashlib
+import time
+from typing import Dict, Optional
+from config import (
+    API_KEY,
+    API_HOURLY_LIMIT,
+    QUOTA_DETAIL_HEADROOM,
+    QUOTA_MAX_WAIT,
+    QUOTA_BACKOFF
+)
+from storage import reserve_api_request, update_api_quota, get_api_quota
+
+# Request kinds; only detail fetches may use the reserved headroom
+METADATA = "metadata"
+DETAIL = "detail"
+
+KEY_ID = hashlib.sha256(API_KEY.encode("utf-8")).hexdigest()[:16]
+
+
+class BudgetExhausted(Exception):
+    """Raised when no API budget is available within the allowed wait."""
+
+    def __init__(self, retry_in: float):
+        super().__init__(f"API quota exhausted, next request possible in {retry_in:.0f}s")
+        self.retry_in = retry_in
+
+
+def acquire(kind: str = DETAIL, max_wait: Optional[float] = None) -> None:
+    """
+    Reserve one API request, waiting for the budget if it is nearly back.
+
+    Args:
+        kind: METADATA or DETAIL; metadata requests leave headroom for details
+        max_wait: Longest time to wait for budget (defaults to config)
+
+    Raises:
+        BudgetExhausted: If the budget won't be available within max_wait
+    """
+    if max_wait is None:
+        max_wait = QUOTA_MAX_WAIT
+    headroom = QUOTA_DETAIL_HEADROOM if kind == METADATA else 0
+    deadline = time.time() + max_wait
+
+    while True:
+        granted, reset_in = reserve_api_request(KEY_ID, API_HOURLY_LIMIT, headroom)
+        if granted:
+            return
+        if time.time() + reset_in > deadline:
+            raise BudgetExhausted(reset_in)
+        print(f"   ⏳ API budget exhausted, waiting {reset_in:.0f}s for quota to reset...")
+        time.sleep(reset_in)
+
+
+def record_response(response) -> None:
+    """
+    Update the shared budget from a response's rate-limit headers.
+
+    Args:
+        response: requests.Response from the regulations.gov API
+    """
+    headers = response.headers
+    limit = headers.get("X-RateLimit-Limit")
+    remaining = headers.get("X-RateLimit-Remaining")
+    reset_in = None
+
+    if response.status_code == 429:
+        remaining = 0
+        retry_after = headers.get("Retry-After")
+        reset_in = float(retry_after) if retry_after and retry_after.isdigit() else QUOTA_BACKOFF
+
+    if limit is None and remaining is None and reset_in is None:
+        return
+
+    update_api_quota(
+        KEY_ID,
+        limit=int(limit) if limit is not None else None,
+        remaining=int(remaining) if remaining is not None else None,
+        reset_in=reset_in
+    )
+
+
+def get_budget_status() -> Dict:
+    """
+    Get the current shared budget for the configured API key.
+
+    Returns:
+        Dictionary with limit, remaining, requests made and reset time
+    """
+    quota = get_api_quota(KEY_ID)
+    if quota is None:
+        return {
+            'hourly_limit': API_HOURLY_LIMIT,
+            'remaining': API_HOURLY_LIMIT,
+            'requests_made': 0,
+            'reset_in': 0.0
+        }
+    return {
+        'hourly_limit': quota['hourly_limit'],
+        'remaining': quota['remaining'],
+        'requests_made': quota['requests_made'],
+        'reset_in': max(0.0, quota['window_reset'] - time.time())
+    }
@@ -0,0 +1,168 @@
+"""
+Near-duplicate (form letter) clustering with MinHash and LSH.
+
+Each confirmed comment body is reduced to a MinHash signature over word
+shingles of its normalized text. Signatures are split into LSH bands so
+candidate clusters are found with a handful of indexed lookups, then the
+estimated Jaccard similarity against the cluster representative decides
+whether the comment joins an existing campaign cluster or starts a new one.
+"""
+
+import hashlib
+import zlib
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from config import (
+    MINHASH_PERMUTATIONS,
+    LSH_BANDS,
+    SHINGLE_SIZE,
+    CLUSTER_SIMILARITY,
+    CLUSTER_CONFIRM_SIZE
+)
+from models import CommentRecord
+from normalizer import normalize_document
+from storage import (
+    find_cluster_candidates,
+    create_cluster,
+    add_cluster_member,
+    get_cluster_by_fingerprint
+)
+
+# Mersenne prime keeps (a * x + b) within uint64 for 32-bit shingle hashes
+_PRIME = np.uint64((1 << 31) - 1)
+_rng = np.random.default_rng(1729)
+_PERM_A = _rng.integers(1, (1 << 31) - 1, size=MINHASH_PERMUTATIONS, dtype=np.uint64)
+_PERM_B = _rng.integers(0, (1 << 31) - 1, size=MINHASH_PERMUTATIONS, dtype=np.uint64)
+_ROWS_PER_BAND = MINHASH_PERMUTATIONS // LSH_BANDS
+
+
+def _shingle_hashes(tokens: List[str]) -> np.ndarray:
+    """Hash overlapping word shingles of a token list."""
+    if len(tokens) < SHINGLE_SIZE:
+        shingles = [" ".join(tokens)] if tokens else []
+    else:
+        shingles = [" ".join(tokens[i:i + SHINGLE_SIZE])
+                    for i in range(len(tokens) - SHINGLE_SIZE + 1)]
+    return np.unique(np.fromiter(
+        (zlib.crc32(shingle.encode("utf-8")) for shingle in shingles),
+        dtype=np.uint64, count=len(shingles)
+    ))
+
+
+def minhash_signature(tokens: List[str]) -> Optional[np.ndarray]:
+    """
+    Compute the MinHash signature of a token list.
+
+    Args:
+        tokens: Normalized word tokens
+
+    Returns:
+        Signature array of MINHASH_PERMUTATIONS values, or None for empty text
+    """
+    shingles = _shingle_hashes(tokens)
+    if shingles.size == 0:
+        return None
+    shingles %= _PRIME
+    # One row per permutation, one column per shingle
+    permuted = (np.outer(_PERM_A, shingles) + _PERM_B[:, None]) % _PRIME
+    return permuted.min(axis=1).astype(np.uint32)
+
+
+def estimate_similarity(first: np.ndarray, second: np.ndarray) -> float:
+    """Estimate Jaccard similarity from two MinHash signatures."""
+    return float(np.mean(first == second))
+
+
+def band_keys(signature: np.ndarray) -> List[Tuple[int, str]]:
+    """Split a signature into (band, bucket) LSH keys."""
+    keys = []
+    for band in range(LSH_BANDS):
+        rows = signature[band * _ROWS_PER_BAND:(band + 1) * _ROWS_PER_BAND]
+        keys.append((band, hashlib.blake2b(rows.tobytes(), digest_size=8).hexdigest()))
+    return keys
+
+
+def metadata_fingerprint(item: CommentRecord) -> Optional[str]:
+    """
+    Fingerprint a metadata item for matching against confirmed clusters.
+
+    Only items with highlighted body text get a fingerprint; a title alone
+    is too weak a signal to skip fetching the full comment.
+
+    Args:
+        item: Comment metadata record
+
+    Returns:
+        Hex fingerprint, or None if the metadata is not distinctive enough
+    """
+    document = normalize_document(item)
+    highlighted = document.get("highlightedContent")
+    if highlighted is None or not highlighted.text:
+        return None
+
+    title = document.get("title")
+    parts = (
+        item.agency_id,
+        item.document_type,
+        title.text if title is not None else "",
+        highlighted.text
+    )
+    return hashlib.sha1("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
+def assign_cluster(comment_data: CommentRecord, keyword: str,
+                   fingerprint: Optional[str] = None) -> Optional[Dict]:
+    """
+    Assign a confirmed comment to a campaign cluster.
+
+    Args:
+        comment_data: Comment detail record
+        keyword: Keyword the comment was confirmed for
+        fingerprint: Metadata fingerprint to associate with the cluster
+
+    Returns:
+        Dictionary with cluster_id, member_count and is_new, or None if the
+        comment has no body text to cluster on
+    """
+    document = normalize_document(comment_data)
+    tokens = document.tokens(("comment",)) or document.tokens()
+    signature = minhash_signature(tokens)
+    if signature is None:
+        return None
+
+    keys = band_keys(signature)
+    best_cluster = None
+    best_similarity = 0.0
+    for cluster_id, stored in find_cluster_candidates(keys):
+        similarity = estimate_similarity(signature, np.frombuffer(stored, dtype=np.uint32))
+        if similarity > best_similarity:
+            best_cluster, best_similarity = cluster_id, similarity
+
+    if best_cluster is not None and best_similarity >= CLUSTER_SIMILARITY:
+        member_count = add_cluster_member(best_cluster, comment_data.id,
+                                          best_similarity, fingerprint)
+        return {"cluster_id": best_cluster, "member_count": member_count, "is_new": False}
+
+    cluster_id = create_cluster(comment_data.id, keyword, signature.tobytes(),
+                                keys, fingerprint)
+    return {"cluster_id": cluster_id, "member_count": 1, "is_new": True}
+
+
+def match_confirmed_cluster(item: CommentRecord) -> Optional[Dict]:
+    """
+    Look up a confirmed cluster whose members share this item's metadata.
+
+    Args:
+        item: Comment metadata record
+
+    Returns:
+        Cluster dictionary if the comment can skip detail fetching, else None
+    """
+    fingerprint = metadata_fingerprint(item)
+    if fingerprint is None:
+        return None
+
+    cluster = get_cluster_by_fingerprint(fingerprint)
+    if cluster is None or cluster["member_count"] < CLUSTER_CONFIRM_SIZE:
+        return None
+    return cluster
@@ -1,4 +1,5 @@
 import os
+import socket
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -6,14 +7,118 @@ load_dotenv()
 
 # API Configuration
 API_KEY = os.getenv("API_KEY", "DEMO_KEY")
-BASE_URL = "https://api.regulations.gov/v4/comments"
+API_ROOT = "https://api.regulations.gov/v4"
+BASE_URL = f"{API_ROOT}/comments"
 
 # Search Configuration
 KEYWORDS = ["pesticide", "glyphosate", "worker safety"]
+# Match mode per keyword: "exact" (substring, the default), "stem" (inflections
+# such as "workers' safety") or "fuzzy" (stems plus words one edit away, e.g.
+# "glyposate"). Fuzzy terms are matched locally, never by the API's search.
+# Format: KEYWORD_MODES="glyphosate:fuzzy,worker safety:stem"
+KEYWORD_MODES = {
+    term.strip(): mode.strip().lower()
+    for term, _, mode in (entry.rpartition(":") for entry in os.getenv("KEYWORD_MODES", "").split(","))
+    if term.strip()
+}
+FUZZY_MIN_WORD_LENGTH = 5  # shorter words only ever match exactly or by stem
 
 # Request Configuration
 DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 250       # largest page the API serves
+MAX_PAGE_NUMBER = 20      # the API stops paging after this many pages per query
 REQUEST_DELAY = 0.1  # seconds between requests
+STREAM_CHUNK_SIZE = 64 * 1024  # bytes decoded at a time from metadata pages
+
+# Query Planning Configuration
+SERVER_SIDE_SEARCH = os.getenv("SERVER_SIDE_SEARCH", "true").lower() == "true"
+CLIENT_SIDE_TERMS = set()   # watch terms that must always be matched locally
+MAX_PAGES_PER_TERM = 5      # pages fetched per search stream per cycle
+SYNC_OVERLAP_HOURS = 6      # re-read this much before the high-water mark
+
+# API Quota Configuration
+API_HOURLY_LIMIT = int(os.getenv("API_HOURLY_LIMIT", "1000"))  # assumed until headers report it
+QUOTA_DETAIL_HEADROOM = int(os.getenv("QUOTA_DETAIL_HEADROOM", "50"))  # reserved for detail fetches
+QUOTA_MAX_WAIT = float(os.getenv("QUOTA_MAX_WAIT", "60"))  # seconds to wait before deferring work
+QUOTA_BACKOFF = 300  # seconds to back off after a 429 without Retry-After
+
+# Detail Fetch Scheduling Configuration
+MAX_DETAIL_FETCHES = int(os.getenv("MAX_DETAIL_FETCHES", "50"))  # per cycle; 0 for no limit
+MAX_DETAIL_ATTEMPTS = 5  # failed fetches before a candidate is rejected; 0 retries forever
+CYCLE_TIME_BUDGET = float(os.getenv("CYCLE_TIME_BUDGET", "0"))  # seconds per cycle; 0 for no deadline
+DETAIL_FETCH_STALE_SECONDS = 1800  # a fetch started this long ago was interrupted; retry it
+REVISION_RECHECK_LIMIT = int(os.getenv("REVISION_RECHECK_LIMIT", "20"))  # revised comments re-fetched per cycle
+KEYWORD_WEIGHTS = {"glyphosate": 2.0, "worker safety": 1.5, "pesticide": 1.0}
+DOCUMENT_TYPE_WEIGHTS = {"Public Submission": 1.0}
+PRIORITY_DOCKETS = {d.strip() for d in os.getenv("PRIORITY_DOCKETS", "").split(",") if d.strip()}
+PRIORITY_ORGANIZATION_BONUS = 1.0  # comments filed on behalf of an organization
+PRIORITY_DOCKET_BONUS = 2.0
+PRIORITY_RECENCY_HALF_LIFE_DAYS = 7
+
+# Backfill Configuration
+BACKFILL_WINDOW_DAYS = 7
+BACKFILL_WORKERS = 4
+
+# Retention Configuration
+SEEN_RETENTION_DAYS = int(os.getenv("SEEN_RETENTION_DAYS", "90"))    # 0 keeps seen IDs forever
+ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", "180"))     # 0 never archives
+ARCHIVE_DIR = "archive"     # monthly archive databases (comments_YYYY_MM.db)
+
+# Storage Backend Configuration
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "sqlite")    # sqlite, sharded or memory
+SHARD_DIR = os.getenv("SHARD_DIR", "shards")    # month-sharded databases (comments_YYYY_MM.db)
+
+# Local Corpus Configuration
+CORPUS_ENABLED = os.getenv("CORPUS_ENABLED", "true").lower() == "true"  # keep every fetched comment
+CORPUS_COMPRESSION_LEVEL = 6    # zlib level for stored records
+RESCAN_BATCH_SIZE = 5000        # corpus records matched per batch
+
+# Query API Configuration
+QUERY_API_HOST = os.getenv("QUERY_API_HOST", "127.0.0.1")
+QUERY_API_PORT = int(os.getenv("QUERY_API_PORT", "8000"))
+QUERY_API_POOL_SIZE = 4         # read-only database connections
+QUERY_API_CACHE_SIZE = 256      # cached responses per data version
+QUERY_API_PAGE_SIZE = 50
+QUERY_API_MAX_PAGE_SIZE = 500
+
+# Parallel Filter Configuration
+PARALLEL_FILTER_WORKERS = int(os.getenv("PARALLEL_FILTER_WORKERS", "0"))  # 0 uses every core
+PARALLEL_FILTER_CHUNK_SIZE = 0       # texts per task; 0 sizes chunks from the batch
+PARALLEL_FILTER_MIN_BATCH = 2000     # smaller batches are matched in-process
+
+# Text Normalization Configuration
+NORMALIZE_CACHE_SIZE = 2048  # normalized documents kept in memory
+
+# Relevance Scoring Configuration
+SCORING_HASH_BITS = 20  # hashed term vector size is 2**SCORING_HASH_BITS
+ALERT_MIN_SCORE = float(os.getenv("ALERT_MIN_SCORE", "0"))
+ALERT_SORT_BY_SCORE = os.getenv("ALERT_SORT_BY_SCORE", "true").lower() == "true"
+
+# Trend and Spike Detection Configuration
+TREND_WINDOWS = {"hour": (3600, 48), "day": (86400, 30)}  # bucket seconds, buckets kept
+TREND_BASELINE_BUCKETS = {"hour": 24, "day": 14}          # buckets a spike is compared against
+TREND_MIN_SPIKE_COUNT = int(os.getenv("TREND_MIN_SPIKE_COUNT", "5"))  # smaller buckets never spike
+TREND_SPIKE_RATIO = 3.0       # times the baseline mean
+TREND_SPIKE_STDDEVS = 3.0     # standard deviations above the baseline mean
+
+# Form Letter Clustering Configuration
+MINHASH_PERMUTATIONS = 128
+LSH_BANDS = 32              # 4 rows per band
+SHINGLE_SIZE = 5            # words per shingle
+CLUSTER_SIMILARITY = 0.8    # estimated Jaccard needed to join a cluster
+CLUSTER_CONFIRM_SIZE = 3    # members before metadata matches may skip detail fetches
+
+# Profiling Configuration
+PROFILE_MODE = os.getenv("PROFILE_MODE", "")  # "cprofile" or "sample" profiles every run; off when empty
+PROFILE_MEMORY = os.getenv("PROFILE_MEMORY", "false").lower() == "true"
+PROFILE_DIR = "profiles"            # one subdirectory per profiled run
+PROFILE_SAMPLE_INTERVAL = 0.005     # seconds between stack samples
+PROFILE_TOP_N = 40                  # functions / allocation sites listed per step
+
+# Freshness Configuration (posted date to alert delivery)
+FRESHNESS_SLO_MINUTES = float(os.getenv("FRESHNESS_SLO_MINUTES", "60"))  # alerts expected within this of posting
+FRESHNESS_PERCENTILES = (50, 90, 99)
+TIMELINE_RETENTION_DAYS = 30    # comment timelines kept for freshness reports
 
 # File Configuration
 OUTPUT_FILE = "flagged_comments.json"
@@ -25,6 +130,22 @@ EMAIL_WEBHOOK_URL = os.getenv("EMAIL_WEBHOOK_URL", "")
 ENABLE_TEAMS_ALERTS = os.getenv("ENABLE_TEAMS_ALERTS", "false").lower() == "true"
 ENABLE_EMAIL_ALERTS = os.getenv("ENABLE_EMAIL_ALERTS", "false").lower() == "true"
 
+# Subscription Configuration
+SUBSCRIPTIONS_FILE = os.getenv("SUBSCRIPTIONS_FILE", "subscriptions.json")
+SUBSCRIPTION_DIGEST_LIMIT = 10  # comments shown per digest; the rest are counted
+
+# Enrichment Configuration (docket and document titles on alerts)
+ENABLE_ENRICHMENT = os.getenv("ENABLE_ENRICHMENT", "true").lower() == "true"
+ENRICHMENT_CACHE_SIZE = 1024        # dockets/documents kept in memory (LRU)
+ENRICHMENT_TTL_HOURS = float(os.getenv("ENRICHMENT_TTL_HOURS", "24"))
+ENRICHMENT_MISSING_TTL_HOURS = 1    # how long a 404 is remembered before retrying
+
+# Coordination Configuration (several watcher replicas sharing one database)
+REPLICA_ID = os.getenv("REPLICA_ID", f"{socket.gethostname()}-{os.getpid()}")
+COORDINATION_SHARDS = int(os.getenv("COORDINATION_SHARDS", "16"))  # detail queue partitions
+LEASE_TTL_SECONDS = int(os.getenv("LEASE_TTL_SECONDS", "120"))  # a dead replica's work frees up after this
+LEASE_HEARTBEAT_SECONDS = 30  # how often a live replica renews its leases
+
 # Validation
 def validate_config():
     """Validate configuration settings."""
@@ -0,0 +1,256 @@
+"""
+Lease-based coordination between watcher replicas.
+
+Several watcher instances can share one database for availability. A
+lease is a named, owned claim that expires unless its owner renews it; a
+heartbeat thread renews every lease a live replica holds, so the work of
+a replica that dies is picked up by the others once LEASE_TTL_SECONDS pass.
+
+- Replica leases (``replica:<id>``) say which replicas are alive.
+- Shard leases (``shard:<n>``) split the detail queue: each comment hashes
+  to one of COORDINATION_SHARDS shards, and each replica takes a fair share
+  of them every cycle, so replicas mostly work on different comments.
+- Work-item leases (``item:<comment id>``) are claimed before a detail
+  fetch. A comment is fetched, and alerted on, only by the replica that
+  holds its item lease while it is still queued.
+- Stage leases (``stage:<name>``) let one replica at a time run work that
+  isn't partitioned, such as the metadata fetch or the trend update.
+
+Leases live behind the ``LeaseBackend`` interface; ``SQLiteLeaseBackend``
+keeps them in the shared watcher database.
+"""
+
+import math
+import threading
+import time
+import zlib
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+from config import (
+    REPLICA_ID,
+    COORDINATION_SHARDS,
+    LEASE_TTL_SECONDS,
+    LEASE_HEARTBEAT_SECONDS
+)
+from storage import (
+    acquire_leases,
+    renew_leases,
+    release_leases,
+    list_leases,
+    filter_queued_ids
+)
+
+
+class LeaseBackend(ABC):
+    """Storage for leases shared by every replica."""
+
+    @abstractmethod
+    def acquire(self, names: List[str], owner: str, ttl_seconds: float) -> List[str]:
+        """Take or renew leases that are free, expired or already owned; return those held."""
+
+    @abstractmethod
+    def renew(self, owner: str, ttl_seconds: float) -> int:
+        """Extend every unexpired lease the owner holds; return how many."""
+
+    @abstractmethod
+    def release(self, owner: str, names: List[str] = None) -> int:
+        """Release some (or all) of the owner's leases; return how many."""
+
+    @abstractmethod
+    def leases(self, prefix: str = "") -> List[Dict]:
+        """Unexpired leases whose names start with prefix."""
+
+
+class SQLiteLeaseBackend(LeaseBackend):
+    """Leases in the shared SQLite database (see storage.acquire_leases)."""
+
+    def acquire(self, names: List[str], owner: str, ttl_seconds: float) -> List[str]:
+        return acquire_leases(names, owner, ttl_seconds)
+
+    def renew(self, owner: str, ttl_seconds: float) -> int:
+        return renew_leases(owner, ttl_seconds)
+
+    def release(self, owner: str, names: List[str] = None) -> int:
+        return release_leases(owner, names)
+
+    def leases(self, prefix: str = "") -> List[Dict]:
+        return list_leases(prefix)
+
+
+class Heartbeat(threading.Thread):
+    """Renew a replica's leases at a fixed interval."""
+
+    def __init__(self, coordinator: "Coordinator", interval: float):
+        super().__init__(name="lease-heartbeat", daemon=True)
+        self.coordinator = coordinator
+        self.interval = interval
+        self._stopped = threading.Event()
+
+    def run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            try:
+                self.coordinator.heartbeat()
+            except Exception as e:
+                print(f"   ⚠️  Lease heartbeat failed: {e}")
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self.join()
+
+
+class Coordinator:
+    """One replica's view of the shared leases."""
+
+    def __init__(self, backend: LeaseBackend = None, replica_id: str = None,
+                 shards: int = None, ttl_seconds: float = None,
+                 heartbeat_seconds: float = None):
+        self.backend = backend or SQLiteLeaseBackend()
+        self.replica_id = replica_id or REPLICA_ID
+        self.shards = shards or COORDINATION_SHARDS
+        self.ttl_seconds = ttl_seconds or LEASE_TTL_SECONDS
+        self.heartbeat_seconds = heartbeat_seconds or LEASE_HEARTBEAT_SECONDS
+        self.owned_shards: List[int] = []
+        self._heartbeat: Optional[Heartbeat] = None
+
+    def start(self) -> List[int]:
+        """
+        Register this replica, start its heartbeat and take its shards.
+
+        Safe to call every cycle; shards are rebalanced each time.
+
+        Returns:
+            Shard numbers this replica now owns
+        """
+        self.backend.acquire([f"replica:{self.replica_id}"], self.replica_id, self.ttl_seconds)
+        if self._heartbeat is None:
+            self._heartbeat = Heartbeat(self, self.heartbeat_seconds)
+            self._heartbeat.start()
+        return self.rebalance()
+
+    def stop(self) -> None:
+        """Stop the heartbeat and release every lease, handing work to other replicas."""
+        if self._heartbeat is not None:
+            self._heartbeat.stop()
+            self._heartbeat = None
+        self.backend.release(self.replica_id)
+        self.owned_shards = []
+
+    def heartbeat(self) -> int:
+        """Renew this replica's leases; warn if they had already expired."""
+        renewed = self.backend.renew(self.replica_id, self.ttl_seconds)
+        if not renewed:
+            print(f"   ⚠️  Replica {self.replica_id} lost its leases; rejoining")
+            self.start()
+        return renewed
+
+    def live_replicas(self) -> List[str]:
+        """IDs of replicas with an unexpired replica lease."""
+        return [lease["owner"] for lease in self.backend.leases("replica:")]
+
+    def rebalance(self) -> List[int]:
+        """
+        Take free shards up to a fair share, and release any beyond it.
+
+        Returns:
+            Shard numbers this replica now owns
+        """
+        share = math.ceil(self.shards / max(1, len(self.live_replicas())))
+        holders = {lease["name"]: lease["owner"] for lease in self.backend.leases("shard:")}
+        owned = [n for n in range(self.shards) if holders.get(f"shard:{n}") == self.replica_id]
+
+        if len(owned) > share:
+            self.backend.release(self.replica_id, [f"shard:{n}" for n in owned[share:]])
+            owned = owned[:share]
+        elif len(owned) < share:
+            # Start from a replica-specific offset so replicas contend less for the same shards
+            offset = zlib.crc32(self.replica_id.encode("utf-8")) % self.shards
+            free = [f"shard:{(offset + i) % self.shards}" for i in range(self.shards)
+                    if f"shard:{(offset + i) % self.shards}" not in holders]
+            acquired = self.backend.acquire(free[:share - len(owned)], self.replica_id,
+                                            self.ttl_seconds)
+            owned = sorted(owned + [int(name.split(":", 1)[1]) for name in acquired])
+
+        self.owned_shards = owned
+        return owned
+
+    def shard_of(self, comment_id: str) -> int:
+        return zlib.crc32(comment_id.encode("utf-8")) % self.shards
+
+    def owns(self, comment_id: str) -> bool:
+        """Whether the comment falls in one of this replica's shards."""
+        return self.shard_of(comment_id) in self.owned_shards
+
+    def claim_candidates(self, candidates: List[Dict]) -> List[Dict]:
+        """
+        Claim queued candidates before fetching their details.
+
+        Args:
+            candidates: Queue entries from scheduler.next_candidates
+
+        Returns:
+            The candidates this replica now holds and that are still queued,
+            in the order given
+        """
+        names = [f"item:{candidate['comment_id']}" for candidate in candidates]
+        claimed = {name.split(":", 1)[1] for name in
+                   self.backend.acquire(names, self.replica_id, self.ttl_seconds)}
+        # Another replica may have finished a candidate since the queue was read
+        queued = filter_queued_ids(list(claimed))
+        done = claimed - queued
+        if done:
+            self.release_items(list(done))
+        return [candidate for candidate in candidates if candidate["comment_id"] in queued]
+
+    def release_items(self, comment_ids: List[str]) -> None:
+        """Release work-item leases once the items are handled or given up."""
+        self.backend.release(self.replica_id, [f"item:{comment_id}" for comment_id in comment_ids])
+
+    def claim_stage(self, stage: str) -> bool:
+        """Take a stage lease if no other replica holds it."""
+        return bool(self.backend.acquire([f"stage:{stage}"], self.replica_id, self.ttl_seconds))
+
+    def release_stage(self, stage: str) -> None:
+        self.backend.release(self.replica_id, [f"stage:{stage}"])
+
+    @contextmanager
+    def hold(self, stage: str, wait: float = 0.0) -> Iterator[bool]:
+        """
+        Hold a stage lease for the duration of a block.
+
+        Args:
+            stage: Stage name (e.g. "fetch_metadata")
+            wait: Seconds to keep trying while another replica holds it
+
+        Yields:
+            True if this replica holds the stage, False if it should skip it
+        """
+        deadline = time.time() + wait
+        held = self.claim_stage(stage)
+        while not held and time.time() < deadline:
+            time.sleep(min(1.0, max(0.0, deadline - time.time())))
+            held = self.claim_stage(stage)
+        try:
+            yield held
+        finally:
+            if held:
+                self.release_stage(stage)
+
+
+_coordinator: Optional[Coordinator] = None
+
+
+def get_coordinator() -> Coordinator:
+    """The process-wide coordinator for this replica."""
+    global _coordinator
+    if _coordinator is None:
+        _coordinator = Coordinator()
+    return _coordinator
+
+
+def stop_coordination() -> None:
+    """Release this replica's leases, if it took any."""
+    global _coordinator
+    if _coordinator is not None:
+        _coordinator.stop()
+        _coordinator = None
@@ -4,19 +4,44 @@ Database utilities for the Comment Watcher.
 Provides tools to query, analyze, and manage the SQLite database.
 """
 
+import time
 from storage import (
-    get_statistics,
-    get_comments_by_keyword,
-    get_comments_by_date_range,
-    load_flagged_comments,
-    export_to_json,
-    clear_database
+    deduplicate_bodies,
+    rebuild_statistics,
+    expire_seen_ids,
+    archive_flagged_comments,
+    list_archives,
+    vacuum_database,
+    get_corpus_stats,
+    expire_cached_metadata,
+    list_leases,
+    get_detail_queue_counts,
+    expire_detail_queue,
+    load_timelines,
+    expire_timelines
 )
-from config import KEYWORDS
+from typing import Dict, List
+from config import (
+    KEYWORDS,
+    SEEN_RETENTION_DAYS,
+    ARCHIVE_AFTER_DAYS,
+    TIMELINE_RETENTION_DAYS,
+    FRESHNESS_SLO_MINUTES,
+    FRESHNESS_PERCENTILES,
+    PROFILE_MODE,
+    PROFILE_MEMORY,
+    STORAGE_BACKEND
+)
+import profiling
+from trends import TrendTracker
+from query_planner import resolve_since
+from budget import get_budget_status
+from storage_backends import get_backend
+from freshness import SEGMENTS, summarize, group_by_day, group_by_cycle, format_duration
 
 def print_statistics():
     """Print database statistics."""
-    stats = get_statistics()
+    stats = get_backend().get_statistics()
 
     print("📊 DATABASE STATISTICS")
     print("=" * 50)
@@ -31,9 +56,14 @@ def print_statistics():
     else:
         print("\n📈 No flagged comments found")
 
+    if stats['docket_counts']:
+        print("\n📁 Top dockets:")
+        for docket_id, count in list(stats['docket_counts'].items())[:10]:
+            print(f"  {docket_id or '(unknown)'}: {count}")
+
 def print_recent_comments(limit: int = 10):
     """Print recent flagged comments."""
-    comments = load_flagged_comments()
+    comments = get_backend().load_flagged_comments()
 
     print(f"📝 RECENT FLAGGED COMMENTS (showing {min(limit, len(comments))})")
     print("=" * 50)
@@ -46,7 +76,7 @@ def print_recent_comments(limit: int = 10):
 
 def search_by_keyword(keyword: str):
     """Search and display comments by keyword."""
-    comments = get_comments_by_keyword(keyword)
+    comments = get_backend().get_comments_by_keyword(keyword)
 
     print(f"🔍 COMMENTS MATCHING '{keyword}' ({len(comments)} found)")
     print("=" * 50)
@@ -61,7 +91,7 @@ def search_by_keyword(keyword: str):
 
 def search_by_date_range(start_date: str, end_date: str):
     """Search and display comments by date range."""
-    comments = get_comments_by_date_range(start_date, end_date)
+    comments = get_backend().get_comments_by_date_range(start_date, end_date)
 
     print(f"📅 COMMENTS FROM {start_date} TO {end_date} ({len(comments)} found)")
     print("=" * 50)
@@ -75,60 +105,309 @@ def search_by_date_range(start_date: str, end_date: str):
 def export_data():
     """Export database to JSON file."""
     print("📤 Exporting data to JSON...")
-    export_to_json()
+    get_backend().export_to_json()
     print("✅ Export completed!")
 
-def main():
-    """Main function for database utilities."""
-    import sys
+def dedup_bodies():
+    """Move comment bodies into content-addressed storage and report savings."""
+    print("🧹 Deduplicating stored comment bodies...")
+    report = deduplicate_bodies()
 
-    if len(sys.argv) < 2:
-        print("Usage: python db_utils.py <command> [args...]")
-        print("\nCommands:")
-        print("  stats                    - Show database statistics")
-        print("  recent [limit]           - Show recent comments (default: 10)")
-        print("  keyword <keyword>        - Search by keyword")
-        print("  date <start> <end>       - Search by date range (YYYY-MM-DD)")
-        print("  export                   - Export to JSON")
-        print("  clear                    - Clear database (use with caution!)")
+    body_saved = report['body_bytes_before'] - report['body_bytes_after']
+    file_saved = report['file_bytes_before'] - report['file_bytes_after']
+
+    print(f"Rows migrated: {report['rows_migrated']}")
+    print(f"Unique bodies stored: {report['unique_bodies']}")
+    print(f"Body text: {report['body_bytes_before']:,} → {report['body_bytes_after']:,} bytes "
+          f"({body_saved:,} saved)")
+    print(f"Database file: {report['file_bytes_before']:,} → {report['file_bytes_after']:,} bytes "
+          f"({file_saved:,} saved)")
+
+def rebuild_stats():
+    """Recompute the summary statistics tables from the stored comments."""
+    print("🔄 Rebuilding statistics tables...")
+    rebuild_statistics()
+    print_statistics()
+
+def maintain():
+    """Apply retention policies and reclaim space in the active database."""
+    print("🧰 Running database maintenance...")
+
+    profiling.mark("expire_seen_ids")
+    # Only IDs older than the next cycle's lower bound can be dropped safely
+    covered_before = resolve_since(None)
+    if SEEN_RETENTION_DAYS and covered_before:
+        expired = expire_seen_ids(SEEN_RETENTION_DAYS, covered_before)
+        print(f"Seen IDs expired (>{SEEN_RETENTION_DAYS} days, before {covered_before}): {expired}")
+    else:
+        print("Seen IDs kept (retention disabled or no sync high-water mark yet)")
+
+    profiling.mark("archive")
+    if STORAGE_BACKEND != "sqlite":
+        # Archiving moves rows out of the watcher database, which other backends leave empty
+        print(f"Comments kept (archiving needs the sqlite backend, not {STORAGE_BACKEND!r})")
+    elif ARCHIVE_AFTER_DAYS:
+        archived = archive_flagged_comments(ARCHIVE_AFTER_DAYS)
+        for month, count in archived.items():
+            print(f"Archived {count} comments to {month}")
+        print(f"Comments archived (>{ARCHIVE_AFTER_DAYS} days): {sum(archived.values())}")
+    else:
+        print("Comments kept (archiving disabled)")
+    print(f"Expired docket/document cache entries: {expire_cached_metadata()}")
+    if SEEN_RETENTION_DAYS:
+        print(f"Handled detail queue entries expired (>{SEEN_RETENTION_DAYS} days): "
+              f"{expire_detail_queue(SEEN_RETENTION_DAYS)}")
+    print(f"Comment timelines expired (>{TIMELINE_RETENTION_DAYS} days): "
+          f"{expire_timelines(TIMELINE_RETENTION_DAYS)}")
+
+    profiling.mark("vacuum")
+    report = vacuum_database()
+    saved = report['file_bytes_before'] - report['file_bytes_after']
+    print(f"Vacuum ({report['mode']}): {report['file_bytes_before']:,} → "
+          f"{report['file_bytes_after']:,} bytes ({saved:,} saved)")
+
+def print_archives():
+    """List the monthly archive databases."""
+    archives = list_archives()
+
+    print(f"🗄️  ARCHIVES ({len(archives)} files)")
+    print("=" * 50)
+    for archive in archives:
+        print(f"  {archive['month']}: {archive['comments']} comments, "
+              f"{archive['bytes']:,} bytes ({archive['path']})")
+
+def print_corpus():
+    """Summarize the local corpus of fetched comments."""
+    corpus = get_corpus_stats()
+
+    print("📚 LOCAL CORPUS")
+    print("=" * 50)
+    print(f"Comments: {corpus['records']} ({corpus['with_detail']} with full text)")
+    print(f"Stored size: {corpus['stored_bytes']:,} bytes (compressed)")
+    if corpus['records']:
+        print(f"Posted: {corpus['oldest_posted']} → {corpus['newest_posted']}")
+    print("Rescan it for new keywords with: python rescan.py")
+
+def print_trends():
+    """Show current hourly and daily match volume against each baseline."""
+    tracker = TrendTracker.load()
+
+    print("📈 MATCH VOLUME TRENDS")
+    print("=" * 50)
+    for window in ("hour", "day"):
+        for dimension in ("keyword", "docket"):
+            rows = tracker.summary(window, dimension)
+            if not rows:
+                continue
+            print(f"\nThis {window} by {dimension}:")
+            for row in rows:
+                print(f"  {row['name']}: {row['current']} (baseline {row['baseline_mean']})")
+
+def print_leases():
+    """Show live replicas and the shard, stage and work-item leases they hold."""
+    leases = list_leases()
+    now = time.time()
+
+    print("🤝 REPLICA LEASES")
+    print("=" * 50)
+    by_owner = {}
+    for lease in leases:
+        kind = lease["name"].split(":", 1)[0]
+        by_owner.setdefault(lease["owner"], {}).setdefault(kind, []).append(lease)
+    if not by_owner:
+        print("No live replicas")
+    for owner, kinds in sorted(by_owner.items()):
+        expires_in = min(lease["expires_at"] for held in kinds.values() for lease in held) - now
+        shards = sorted(int(lease["name"].split(":", 1)[1]) for lease in kinds.get("shard", []))
+        stages = [lease["name"].split(":", 1)[1] for lease in kinds.get("stage", [])]
+        print(f"{owner} (expires in {expires_in:.0f}s)")
+        print(f"  Shards: {', '.join(map(str, shards)) or 'none'}")
+        print(f"  Stages: {', '.join(stages) or 'none'}")
+        print(f"  Claimed items: {len(kinds.get('item', []))}")
+
+def print_queue():
+    """Show the detail-fetch queue by state."""
+    counts = get_detail_queue_counts()
+
+    print("🗂️  DETAIL FETCH QUEUE")
+    print("=" * 50)
+    print(f"Pending: {counts['pending']} ({counts['retrying']} retrying after failed attempts)")
+    print(f"Fetching: {counts['fetching']}")
+    print(f"Confirmed: {counts['confirmed']}")
+    print(f"Rejected: {counts['rejected']}")
+
+def _freshness_line(label: str, rows: List[Dict]) -> str:
+    """One report line: alert count, freshness percentiles and SLO share."""
+    freshness = summarize(rows)["freshness"]
+    if not freshness["count"]:
+        return f"  {label}: no alerts with a posted date ({len(rows)} comments tracked)"
+    points = " ".join(f"p{point} {format_duration(freshness[f'p{point}']):>6}"
+                      for point in FRESHNESS_PERCENTILES)
+    return (f"  {label}: {freshness['count']:4d} alerts | {points} | "
+            f"{freshness['within_slo']:4.0%} within SLO")
+
+def print_freshness(days: int = 7, cycles: int = 10):
+    """Show alert freshness percentiles per stage, per day and per cycle."""
+    rows = load_timelines(time.time() - days * 86400)
+
+    print(f"⏱️  ALERT FRESHNESS (last {days} days, SLO {FRESHNESS_SLO_MINUTES:g} minutes)")
+    print("=" * 50)
+    if not rows:
+        print("No comment timelines recorded yet")
         return
 
-    command = sys.argv[1].lower()
+    print("Where the time goes (posted → delivered, by stage):")
+    summary = summarize(rows)
+    for name, start, end in SEGMENTS:
+        segment = summary[name]
+        if not segment["count"]:
+            print(f"  {name:>12}: -")
+            continue
+        points = " ".join(f"p{point} {format_duration(segment[f'p{point}']):>6}"
+                          for point in FRESHNESS_PERCENTILES)
+        print(f"  {name:>12}: {points} max {format_duration(segment['max']):>6} "
+              f"({segment['count']} comments)")
+
+    print("\n📅 Per day:")
+    for day, day_rows in group_by_day(rows).items():
+        print(_freshness_line(day, day_rows))
+
+    print(f"\n🔁 Last {cycles} cycles:")
+    for cycle_id, cycle_rows in group_by_cycle(rows, cycles).items():
+        print(_freshness_line(cycle_id, cycle_rows))
 
+def print_quota():
+    """Print the shared API quota budget."""
+    status = get_budget_status()
+
+    print("🔑 API QUOTA BUDGET")
+    print("=" * 50)
+    print(f"Hourly limit: {status['hourly_limit']}")
+    print(f"Remaining: {status['remaining']}")
+    print(f"Requests made: {status['requests_made']}")
+    print(f"Window resets in: {status['reset_in'] / 60:.1f} minutes")
+
+def run_command(command: str, argv: List[str]) -> None:
+    """Run one db_utils command."""
     if command == "stats":
         print_statistics()
 
     elif command == "recent":
-        limit = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+        limit = int(argv[2]) if len(argv) > 2 else 10
         print_recent_comments(limit)
 
     elif command == "keyword":
-        if len(sys.argv) < 3:
+        if len(argv) < 3:
             print("❌ Please provide a keyword")
             return
-        keyword = sys.argv[2]
+        keyword = argv[2]
         search_by_keyword(keyword)
 
     elif command == "date":
-        if len(sys.argv) < 4:
+        if len(argv) < 4:
             print("❌ Please provide start and end dates (YYYY-MM-DD)")
             return
-        start_date = sys.argv[2]
-        end_date = sys.argv[3]
+        start_date = argv[2]
+        end_date = argv[3]
         search_by_date_range(start_date, end_date)
 
     elif command == "export":
         export_data()
 
+    elif command == "dedup":
+        dedup_bodies()
+
+    elif command == "quota":
+        print_quota()
+
+    elif command == "rebuild-stats":
+        rebuild_stats()
+
+    elif command == "maintain":
+        maintain()
+
+    elif command == "archives":
+        print_archives()
+
+    elif command == "corpus":
+        print_corpus()
+
+    elif command == "trends":
+        print_trends()
+
+    elif command == "leases":
+        print_leases()
+
+    elif command == "queue":
+        print_queue()
+
+    elif command == "freshness":
+        days = int(argv[2]) if len(argv) > 2 else 7
+        cycles = int(argv[3]) if len(argv) > 3 else 10
+        print_freshness(days, cycles)
+
     elif command == "clear":
         confirm = input("⚠️  Are you sure you want to clear the database? (yes/no): ")
         if confirm.lower() == "yes":
-            clear_database()
+            get_backend().clear()
         else:
             print("❌ Operation cancelled")
 
     else:
         print(f"❌ Unknown command: {command}")
 
+def main():
+    """Main function for database utilities."""
+    import sys
+
+    # Profiling flags may appear anywhere on the command line
+    profile_mode, profile_memory = PROFILE_MODE or None, PROFILE_MEMORY
+    args = []
+    for arg in sys.argv[1:]:
+        if arg == "--profile":
+            profile_mode = "cprofile"
+        elif arg.startswith("--profile="):
+            profile_mode = arg.split("=", 1)[1]
+        elif arg == "--profile-memory":
+            profile_memory = True
+        else:
+            args.append(arg)
+    sys.argv[1:] = args
+
+    if len(sys.argv) < 2:
+        print("Usage: python db_utils.py <command> [args...]")
+        print("\nCommands:")
+        print("  stats                    - Show database statistics")
+        print("  recent [limit]           - Show recent comments (default: 10)")
+        print("  keyword <keyword>        - Search by keyword")
+        print("  date <start> <end>       - Search by date range (YYYY-MM-DD)")
+        print("  export                   - Export to JSON")
+        print("  dedup                    - Deduplicate stored comment bodies")
+        print("  quota                    - Show the shared API quota budget")
+        print("  rebuild-stats            - Rebuild the summary statistics tables")
+        print("  maintain                 - Expire seen IDs, archive old comments, vacuum")
+        print("  archives                 - List monthly archive databases")
+        print("  corpus                   - Summarize the local corpus of fetched comments")
+        print("  trends                   - Show hourly/daily match volume against baselines")
+        print("  leases                   - Show replicas and the work they have leased")
+        print("  queue                    - Show the detail-fetch queue by state")
+        print("  freshness [days] [cycles] - Alert freshness percentiles per stage, day and cycle")
+        print("  clear                    - Clear database (use with caution!)")
+        print("\nOptions:")
+        print("  --profile[=cprofile|sample] - Profile the command, step by step")
+        print("  --profile-memory            - Record tracemalloc memory diffs per step")
+        return
+
+    command = sys.argv[1].lower()
+    if profile_mode and profile_mode not in profiling.PROFILE_MODES:
+        print(f"❌ Unknown profile mode: {profile_mode} (use {' or '.join(profiling.PROFILE_MODES)})")
+        return
+    if profile_mode or profile_memory:
+        profiling.start_profiling(command, profile_mode, profile_memory)
+    try:
+        run_command(command, sys.argv)
+    finally:
+        profiling.stop_profiling()
+
 if __name__ == "__main__":
     main()
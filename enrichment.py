@@ -0,0 +1,192 @@
+"""
+Docket and document metadata for alerts.
+
+Comments only carry their own fields; the docket and document they were
+filed on are separate API objects. Before alerting, the enrichment stage
+looks up each comment's parent docket and document and fills in their
+titles.
+
+Lookups go through two cache levels: a bounded in-memory LRU whose
+entries expire after ENRICHMENT_TTL_HOURS, and the ``metadata_cache``
+table, which keeps fetched metadata across runs for the same TTL. Lookups
+for a batch are coalesced, so each distinct docket or document is fetched
+at most once per TTL however many comments in the batch share it.
+Objects the API does not have are remembered for a shorter time.
+"""
+
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+from config import (
+    ENABLE_ENRICHMENT,
+    ENRICHMENT_CACHE_SIZE,
+    ENRICHMENT_TTL_HOURS,
+    ENRICHMENT_MISSING_TTL_HOURS
+)
+from budget import BudgetExhausted
+from fetcher import fetch_parent_metadata
+from models import Comment
+from storage import load_cached_metadata, save_cached_metadata
+
+DOCKETS = "dockets"
+DOCUMENTS = "documents"
+
+# Attributes kept per object kind; the rest of the API response is dropped
+CACHED_FIELDS = {
+    DOCKETS: ("title", "agencyId", "docketType"),
+    DOCUMENTS: ("title", "documentType", "commentEndDate"),
+}
+
+_MISSING = object()
+
+
+class TTLCache:
+    """Bounded LRU cache whose entries expire at a given time."""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, Tuple[Optional[Dict], float]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str, now: float = None):
+        """Return the cached value, or _MISSING if absent or expired."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return _MISSING
+        value, expires_at = entry
+        if expires_at <= (time.time() if now is None else now):
+            del self._entries[key]
+            return _MISSING
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, key: str, value: Optional[Dict], expires_at: float) -> None:
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+
+class MetadataEnricher:
+    """Cached, coalesced docket and document lookups."""
+
+    def __init__(self, cache_size: int = None, ttl_hours: float = None,
+                 missing_ttl_hours: float = None):
+        cache_size = cache_size or ENRICHMENT_CACHE_SIZE
+        self.ttl_seconds = (ttl_hours or ENRICHMENT_TTL_HOURS) * 3600
+        self.missing_ttl_seconds = (missing_ttl_hours or ENRICHMENT_MISSING_TTL_HOURS) * 3600
+        self.caches = {kind: TTLCache(cache_size) for kind in CACHED_FIELDS}
+        self.stats = {"memory": 0, "stored": 0, "fetched": 0}
+
+    def lookup(self, kind: str, keys: Iterable[str]) -> Dict[str, Optional[Dict]]:
+        """
+        Get metadata for a batch of dockets or documents.
+
+        Args:
+            kind: DOCKETS or DOCUMENTS
+            keys: IDs to look up; blanks and repeats are ignored
+
+        Returns:
+            Dictionary of ID to cached attributes (None if the API does not
+            have the object); IDs that could not be fetched are left out
+        """
+        cache = self.caches[kind]
+        now = time.time()
+        results, misses = {}, []
+        for key in dict.fromkeys(key for key in keys if key):
+            value = cache.get(key, now)
+            if value is _MISSING:
+                misses.append(key)
+            else:
+                results[key] = value
+        self.stats["memory"] += len(results)
+        if not misses:
+            return results
+
+        stored = load_cached_metadata(kind, misses, now)
+        for key, (value, expires_at) in stored.items():
+            cache.put(key, value, expires_at)
+            results[key] = value
+        self.stats["stored"] += len(stored)
+
+        fetched = {}
+        for key in misses:
+            if key in stored:
+                continue
+            try:
+                attributes = fetch_parent_metadata(kind, key)
+            except BudgetExhausted as e:
+                print(f"   ⏸️  Skipping remaining {kind} lookups: {e}")
+                break
+            except Exception as e:
+                # Transient errors are not cached; the next cycle retries
+                print(f"   ❌ Error fetching {kind} {key}: {e}")
+                continue
+            if attributes is not None:
+                attributes = {field: attributes.get(field) for field in CACHED_FIELDS[kind]}
+            fetched[key] = attributes
+        self.stats["fetched"] += len(fetched)
+
+        save_cached_metadata(kind, fetched, self.ttl_seconds, self.missing_ttl_seconds)
+        for key, value in fetched.items():
+            ttl = self.ttl_seconds if value is not None else self.missing_ttl_seconds
+            cache.put(key, value, now + ttl)
+            results[key] = value
+        return results
+
+    def enrich(self, comments: List[Comment]) -> int:
+        """
+        Fill in docket and document titles on processed comments.
+
+        Args:
+            comments: Comments about to be alerted on
+
+        Returns:
+            Number of comments given at least one title
+        """
+        dockets = self.lookup(DOCKETS, (comment.docket_id for comment in comments))
+        documents = self.lookup(DOCUMENTS, (comment.document_id for comment in comments))
+
+        enriched = 0
+        for comment in comments:
+            docket = dockets.get(comment.docket_id) or {}
+            document = documents.get(comment.document_id) or {}
+            comment.docket_title = docket.get("title") or comment.docket_title
+            comment.document_title = document.get("title") or comment.document_title
+            enriched += bool(comment.docket_title or comment.document_title)
+        return enriched
+
+
+_enricher: Optional[MetadataEnricher] = None
+
+
+def get_enricher() -> MetadataEnricher:
+    """The process-wide enricher, so its memory cache lasts across cycles."""
+    global _enricher
+    if _enricher is None:
+        _enricher = MetadataEnricher()
+    return _enricher
+
+
+def enrich_comments(comments: List[Comment]) -> int:
+    """
+    Enrichment stage: add docket and document titles before alerting.
+
+    Args:
+        comments: Comments about to be alerted on
+
+    Returns:
+        Number of comments enriched (0 when enrichment is disabled)
+    """
+    if not ENABLE_ENRICHMENT or not comments:
+        return 0
+    enricher = get_enricher()
+    before = dict(enricher.stats)
+    enriched = enricher.enrich(comments)
+    hits = {source: enricher.stats[source] - before[source] for source in before}
+    print(f"🏷️  Enriched {enriched}/{len(comments)} comments "
+          f"({hits['memory']} cached in memory, {hits['stored']} in the database, "
+          f"{hits['fetched']} fetched)")
+    return enriched
@@ -1,9 +1,151 @@
+import codecs
+import json
 import requests
 import time
-from typing import List, Dict, Optional
-from config import API_KEY, BASE_URL, DEFAULT_PAGE_SIZE, REQUEST_DELAY
+from typing import Callable, Iterable, Iterator, List, Dict, Optional, Tuple
+from config import API_KEY, API_ROOT, BASE_URL, DEFAULT_PAGE_SIZE, REQUEST_DELAY, MAX_PAGE_SIZE, STREAM_CHUNK_SIZE
+from budget import acquire, record_response, METADATA, DETAIL
+from models import CommentRecord
 
-def fetch_metadata(since_date: Optional[str] = None, page_size: int = None) -> List[Dict]:
+_WHITESPACE = " \t\n\r"
+
+def _api_get(url: str, params: Dict, kind: str, stream: bool = False) -> requests.Response:
+    """
+    Make an API request against the shared quota budget.
+
+    Args:
+        url: Request URL
+        params: Query parameters
+        kind: Budget kind (METADATA or DETAIL)
+        stream: Leave the body unread so it can be decoded incrementally
+
+    Returns:
+        The API response
+
+    Raises:
+        BudgetExhausted: If the quota runs out and won't reset soon enough
+    """
+    headers = {"X-Api-Key": API_KEY}
+
+    while True:
+        acquire(kind)
+        resp = requests.get(url, params=params, headers=headers, stream=stream)
+        record_response(resp)
+        if resp.status_code != 429:
+            return resp
+        print(f"   ⏳ Rate limited by API (429), backing off...")
+
+class _JsonStream:
+    """Incrementally decoded text of a JSON document arriving in chunks."""
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._json = json.JSONDecoder()
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def _read(self) -> bool:
+        """Append the next chunk to the buffer; False at end of input."""
+        if self.eof:
+            return False
+        chunk = next(self._chunks, None)
+        if chunk is None:
+            self.eof = True
+            self.buffer += self._decoder.decode(b"", final=True)
+            return False
+        # Drop consumed text so the buffer stays around one chunk in size
+        self.buffer = self.buffer[self.pos:] + self._decoder.decode(chunk)
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Next non-whitespace character, or "" at end of input."""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._read():
+                return ""
+
+    def expect(self, char: str) -> None:
+        if self.peek() != char:
+            raise ValueError(f"Expected {char!r} in API response at offset {self.pos}")
+        self.pos += 1
+
+    def value(self):
+        """Decode the next complete JSON value."""
+        self.peek()
+        while True:
+            try:
+                value, end = self._json.raw_decode(self.buffer, self.pos)
+                # A number at the very end of the buffer may continue in the next chunk
+                if end < len(self.buffer) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self._read()
+
+def iter_json_array(chunks: Iterable[bytes], array_key: str,
+                    convert: Callable[[Dict], object]) -> Iterator[Tuple[str, object]]:
+    """
+    Stream a top-level JSON object, decoding one array's elements one at a time.
+
+    Elements of ``array_key`` are passed through ``convert`` as soon as each
+    is complete, so only one raw element is held in memory at a time.
+
+    Args:
+        chunks: Raw response body chunks
+        array_key: Key of the array to stream (e.g. "data")
+        convert: Function applied to each array element
+
+    Yields:
+        (array_key, converted element) for each element, then (key, value)
+        for every other top-level member
+    """
+    stream = _JsonStream(chunks)
+    stream.expect("{")
+    while stream.peek() != "}":
+        if stream.peek() == ",":
+            stream.expect(",")
+        key = stream.value()
+        stream.expect(":")
+        if key != array_key or stream.peek() != "[":
+            yield key, stream.value()
+            continue
+
+        stream.expect("[")
+        while stream.peek() != "]":
+            if stream.peek() == ",":
+                stream.expect(",")
+            yield key, convert(stream.value())
+        stream.expect("]")
+
+def read_records_page(resp: requests.Response) -> Tuple[List[CommentRecord], Dict]:
+    """
+    Decode a metadata page into compact records without building the whole JSON tree.
+
+    Args:
+        resp: Streamed API response
+
+    Returns:
+        Tuple of (records, paging meta dictionary)
+    """
+    records = []
+    meta = {}
+    for key, value in iter_json_array(resp.iter_content(chunk_size=STREAM_CHUNK_SIZE),
+                                      "data", CommentRecord.from_api):
+        if key == "data":
+            records.append(value)
+        elif key == "meta":
+            meta = value
+    return records, meta
+
+def fetch_metadata(since_date: Optional[str] = None, page_size: int = None) -> List[CommentRecord]:
     """
     Fetch comment metadata from the Regulations.gov API.
 
@@ -12,7 +154,7 @@ def fetch_metadata(since_date: Optional[str] = None, page_size: int = None) -> L
         page_size: Number of comments to fetch
 
     Returns:
-        List of comment metadata dictionaries
+        List of comment metadata records
     """
     if page_size is None:
         page_size = DEFAULT_PAGE_SIZE
@@ -26,31 +168,83 @@ def fetch_metadata(since_date: Optional[str] = None, page_size: int = None) -> L
     # if since_date:
     #     params["filter[lastModifiedDate][ge]"] = since_date
 
-    headers = {"X-Api-Key": API_KEY}
-
     print(f"🌐 Making request to: {BASE_URL}")
     print(f"📋 Parameters: {params}")
 
-    resp = requests.get(BASE_URL, params=params, headers=headers)
+    resp = _api_get(BASE_URL, params, METADATA, stream=True)
 
     if resp.status_code != 200:
         print(f"❌ API Error: {resp.status_code}")
         print(f"📄 Response: {resp.text}")
         resp.raise_for_status()
 
-    data = resp.json()["data"]
+    data, _ = read_records_page(resp)
 
     # Log the comments being fetched
     print(f"\n📥 Fetched {len(data)} comments:")
     for i, comment in enumerate(data, 1):
-        title = comment["attributes"].get("title", "No title")
-        comment_id = comment["id"]
-        date = comment["attributes"].get("postedDate", "No date")[:10]  # Just the date part
-        print(f"  {i:2d}. [{comment_id}] {date} - {title[:60]}{'...' if len(title) > 60 else ''}")
+        title = comment.title or "No title"
+        date = (comment.posted_date or "No date")[:10]  # Just the date part
+        print(f"  {i:2d}. [{comment.id}] {date} - {title[:60]}{'...' if len(title) > 60 else ''}")
 
     return data
 
-def fetch_comment_detail(comment_id: str) -> Dict:
+def fetch_metadata_page(filters: Dict[str, str], page_number: int = 1,
+                        page_size: int = None, sort: str = "lastModifiedDate") -> Tuple[List[CommentRecord], Dict]:
+    """
+    Fetch one page of comment metadata matching API-side filters.
+
+    Args:
+        filters: Filter parameters, e.g. {"filter[searchTerm]": "pesticide"}
+        page_number: 1-based page number
+        page_size: Comments per page (defaults to MAX_PAGE_SIZE)
+        sort: API sort expression (prefix with "-" for descending)
+
+    Returns:
+        Tuple of (comment metadata records, API paging meta dictionary)
+    """
+    if page_size is None:
+        page_size = MAX_PAGE_SIZE
+
+    params = dict(filters)
+    params.update({
+        "page[size]": page_size,
+        "page[number]": page_number,
+        "sort": sort,
+    })
+
+    resp = _api_get(BASE_URL, params, METADATA, stream=True)
+
+    if resp.status_code != 200:
+        print(f"❌ API Error: {resp.status_code}")
+        print(f"📄 Response: {resp.text}")
+        resp.raise_for_status()
+
+    return read_records_page(resp)
+
+def fetch_metadata_window(start_date: str, end_date: str, page_number: int = 1,
+                          page_size: int = None) -> Tuple[List[CommentRecord], Dict]:
+    """
+    Fetch one page of comment metadata posted within a date window.
+
+    Args:
+        start_date: First posted date to include (YYYY-MM-DD format)
+        end_date: Last posted date to include (YYYY-MM-DD format)
+        page_number: 1-based page number
+        page_size: Comments per page (defaults to MAX_PAGE_SIZE)
+
+    Returns:
+        Tuple of (comment metadata records, API paging meta dictionary)
+    """
+    data, meta = fetch_metadata_page(
+        {"filter[postedDate][ge]": start_date, "filter[postedDate][le]": end_date},
+        page_number, page_size, sort="postedDate"
+    )
+    print(f"📥 Fetched {len(data)} comments for {start_date}..{end_date} (page {page_number})")
+
+    return data, meta
+
+def fetch_comment_detail(comment_id: str) -> CommentRecord:
     """
     Fetch full details for a specific comment.
 
@@ -58,21 +252,39 @@ def fetch_comment_detail(comment_id: str) -> Dict:
         comment_id: The ID of the comment to fetch
 
     Returns:
-        Comment details dictionary
+        Comment detail record
     """
     url = f"{BASE_URL}/{comment_id}"
-    headers = {"X-Api-Key": API_KEY}
 
     print(f"📄 Fetching details for comment: {comment_id}")
 
-    resp = requests.get(url, headers=headers, params={"include": "attachments"})
+    resp = _api_get(url, {"include": "attachments"}, DETAIL)
     resp.raise_for_status()
 
-    data = resp.json()["data"]
-    title = data["attributes"].get("title", "No title")
+    data = CommentRecord.from_api(resp.json()["data"])
+    title = data.title or "No title"
     print(f"   ✅ Retrieved: {title[:50]}{'...' if len(title) > 50 else ''}")
 
     # Add polite delay between requests
     time.sleep(REQUEST_DELAY)
 
     return data
+
+def fetch_parent_metadata(kind: str, object_id: str) -> Optional[Dict]:
+    """
+    Fetch the attributes of a docket or document.
+
+    Args:
+        kind: "dockets" or "documents"
+        object_id: Docket or document ID
+
+    Returns:
+        Attribute dictionary, or None if the API has no such object
+    """
+    resp = _api_get(f"{API_ROOT}/{kind}/{object_id}", {}, METADATA)
+    if resp.status_code == 404:
+        return None
+    resp.raise_for_status()
+
+    time.sleep(REQUEST_DELAY)
+    return resp.json()["data"].get("attributes") or {}
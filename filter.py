@@ -1,61 +1,116 @@
-from typing import List, Dict, Tuple, Optional
+import re
+from typing import Iterable, Iterator, List, Dict, Tuple, Optional
+from models import CommentRecord
+from normalizer import NormalizedDocument, normalize_document, normalize_term, tokenize
+from term_index import TermIndex, EXACT, keyword_mode
 
-def flag_by_keyword(metadata_list: List[Dict], keyword_list: List[str]) -> List[Tuple[str, str]]:
+class KeywordMatcher:
+    """
+    Watch terms normalized and compiled once for repeated matching.
+
+    A single regex over all terms rejects non-matching text in one pass;
+    only texts that contain some term are checked term by term, so the
+    first keyword in priority order still wins. Keywords in stem or fuzzy
+    mode (see term_index.py) also match through a precomputed term index
+    over the texts' tokens.
+    """
+
+    def __init__(self, keyword_list: List[str], modes: Dict[str, str] = None):
+        self.keywords = list(keyword_list)
+        self.terms = [normalize_term(keyword) for keyword in self.keywords]
+        # Longest first, so a shorter term never shadows a longer one at the same position
+        alternatives = sorted(set(self.terms), key=len, reverse=True)
+        self._any_term = re.compile("|".join(re.escape(term) for term in alternatives))
+        modes = modes if modes is not None else {keyword: keyword_mode(keyword) for keyword in self.keywords}
+        self.index = TermIndex((keyword, term, modes.get(keyword, EXACT))
+                               for keyword, term in zip(self.keywords, self.terms))
+
+    def _found(self, texts: List[str], token_lists: Iterable[List[str]]) -> Iterator[str]:
+        """Yield the keywords found in the texts, in priority order."""
+        candidates = [text for text in texts if self._any_term.search(text)]
+        indexed = self.index.find(token_lists) if len(self.index) else set()
+        if not candidates and not indexed:
+            return
+        for keyword, term in zip(self.keywords, self.terms):
+            if keyword in indexed or any(term in text for text in candidates):
+                yield keyword
+
+    def match_texts(self, texts: Iterable[str]) -> Optional[str]:
+        """
+        Find the highest-priority keyword in any of several normalized texts.
+
+        Args:
+            texts: Normalized (casefolded) field texts
+
+        Returns:
+            Matched keyword, or None
+        """
+        texts = list(texts)
+        token_lists = [tokenize(text) for text in texts] if len(self.index) else ()
+        return next(self._found(texts, token_lists), None)
+
+    def match(self, document: NormalizedDocument) -> Optional[str]:
+        """Find the highest-priority keyword in a normalized document."""
+        values = list(document.fields.values())
+        token_lists = [value.tokens for value in values] if len(self.index) else ()
+        return next(self._found([value.text for value in values], token_lists), None)
+
+    def match_all(self, document: NormalizedDocument) -> List[str]:
+        """Find every keyword in a normalized document, in priority order."""
+        values = list(document.fields.values())
+        token_lists = [value.tokens for value in values] if len(self.index) else ()
+        return list(self._found([value.text for value in values], token_lists))
+
+def flag_by_keyword(metadata_list: List[CommentRecord], keyword_list: List[str],
+                    verbose: bool = True, matcher: KeywordMatcher = None) -> List[Tuple[str, str]]:
     """
     Flag comments by scanning metadata for keyword matches.
 
     Args:
-        metadata_list: List of comment metadata dictionaries
+        metadata_list: List of comment metadata records
         keyword_list: List of keywords to search for
+        verbose: Log every comment scanned (bulk callers turn this off)
+        matcher: Matcher already built for keyword_list, to reuse across calls
 
     Returns:
         List of tuples (comment_id, matched_keyword)
     """
     flagged = []
+    matcher = matcher or KeywordMatcher(keyword_list)
 
-    print(f"\n🔍 Scanning {len(metadata_list)} comments for keywords: {', '.join(keyword_list)}")
+    if verbose:
+        print(f"\n🔍 Scanning {len(metadata_list)} comments for keywords: {', '.join(keyword_list)}")
 
     for i, item in enumerate(metadata_list, 1):
-        snippet = item["attributes"].get("highlightedContent", "") or ""
-        title = item["attributes"].get("title", "") or ""
-        combined = (snippet + title).lower()
-        comment_id = item["id"]
-
-        # Check each keyword
-        matched_keyword = None
-        for keyword in keyword_list:
-            if keyword.lower() in combined:
-                matched_keyword = keyword
-                break
+        title = item.title
+        comment_id = item.id
+        document = normalize_document(item)
+
+        # Check keywords in priority order
+        matched_keyword = matcher.match(document)
 
         if matched_keyword:
             flagged.append((comment_id, matched_keyword))
-            print(f"  🎯 MATCH #{i}: '{matched_keyword}' in comment {comment_id}")
-            print(f"     Title: {title[:50]}{'...' if len(title) > 50 else ''}")
-        else:
+            if verbose:
+                print(f"  🎯 MATCH #{i}: '{matched_keyword}' in comment {comment_id}")
+                print(f"     Title: {title[:50]}{'...' if len(title) > 50 else ''}")
+        elif verbose:
             print(f"  ⏭️  Skip #{i}: No keywords found in comment {comment_id}")
 
-    print(f"\n📊 Scan complete: {len(flagged)} matches found out of {len(metadata_list)} comments")
+    if verbose:
+        print(f"\n📊 Scan complete: {len(flagged)} matches found out of {len(metadata_list)} comments")
 
     return flagged
 
-def recheck_full_text(full_comment: Dict, keyword_list: List[str]) -> Optional[str]:
+def recheck_full_text(full_comment: CommentRecord, matcher: KeywordMatcher) -> Optional[str]:
     """
     Recheck full comment text for keyword matches (double-check after metadata scan).
 
     Args:
-        full_comment: Full comment data dictionary
-        keyword_list: List of keywords to search for
+        full_comment: Comment detail record
+        matcher: Matcher built once for the cycle or batch
 
     Returns:
         Matched keyword if found, None otherwise
     """
-    text = full_comment["attributes"].get("comment", "")
-    title = full_comment["attributes"].get("title", "")
-    combined = (text + title).lower()
-
-    for keyword in keyword_list:
-        if keyword.lower() in combined:
-            return keyword
-
-    return None
+    return matcher.match(normalize_document(full_comment))
@@ -0,0 +1,193 @@
+"""
+Alert freshness: how long a comment takes from posting to alert delivery.
+
+Every comment the watcher matches gets a timeline in ``comment_timeline``
+with epoch-second stamps for when it was posted, when the cycle that first
+saw it started, and when it was first seen, had its detail fetched, was
+confirmed, was alerted on and was stored. The gaps between stamps show
+what limits how fast alerts arrive:
+
+- ``polling``: posted → start of the cycle that saw it (waiting for the
+  next poll; regulations.gov posted dates are often day-precise, so this
+  also absorbs that rounding)
+- ``pagination``: cycle start → first seen (metadata paging and scanning)
+- ``queue``: first seen → detail fetched (waiting in the detail queue,
+  across cycles when the fetch limit or time budget runs out)
+- ``confirmation``: detail fetched → confirmed in the full text
+- ``delivery``: confirmed → alert delivered to Teams, email or a digest
+- ``storage``: delivered → stored
+- ``freshness``: posted → delivered, the end-to-end number
+
+``CycleTimeline`` collects a cycle's stamps and writes them at the end.
+``db_utils.py freshness`` reports percentiles per day and per cycle, and
+the share of alerts delivered within FRESHNESS_SLO_MINUTES.
+"""
+
+import statistics
+import time
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional
+from config import REPLICA_ID, FRESHNESS_SLO_MINUTES, FRESHNESS_PERCENTILES
+from models import CommentRecord
+from storage import TIMELINE_STAGES, record_first_seen, record_timeline, load_timelines
+
+# (name, from column, to column) of each reported gap
+SEGMENTS = (
+    ("polling", "posted_at", "cycle_started_at"),
+    ("pagination", "cycle_started_at", "first_seen_at"),
+    ("queue", "first_seen_at", "detail_fetched_at"),
+    ("confirmation", "detail_fetched_at", "confirmed_at"),
+    ("delivery", "confirmed_at", "alerted_at"),
+    ("storage", "alerted_at", "stored_at"),
+    ("freshness", "posted_at", "alerted_at"),
+)
+
+
+def posted_timestamp(posted_date: Optional[str]) -> Optional[float]:
+    """Epoch seconds of an API posted date, or None if it is missing or invalid."""
+    if not posted_date:
+        return None
+    try:
+        parsed = datetime.fromisoformat(posted_date.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def format_duration(seconds: Optional[float]) -> str:
+    """Human-readable duration ("42.0s", "3.5m", "2.1h", "1.2d")."""
+    if seconds is None:
+        return "-"
+    for unit, size in (("d", 86400), ("h", 3600), ("m", 60)):
+        if abs(seconds) >= size:
+            return f"{seconds / size:.1f}{unit}"
+    return f"{seconds:.1f}s"
+
+
+def percentiles(values: List[float], points: Iterable[int] = None) -> Dict[str, float]:
+    """
+    Percentiles of a list of durations.
+
+    Args:
+        values: Durations in seconds
+        points: Percentiles to compute (defaults to FRESHNESS_PERCENTILES)
+
+    Returns:
+        Dictionary like {"p50": ..., "p90": ..., "max": ...}; empty if no values
+    """
+    points = points or FRESHNESS_PERCENTILES
+    if not values:
+        return {}
+    if len(values) == 1:
+        cuts = values * 99
+    else:
+        cuts = statistics.quantiles(values, n=100, method="inclusive")
+    results = {f"p{point}": cuts[point - 1] for point in points}
+    results["max"] = max(values)
+    return results
+
+
+def summarize(rows: List[Dict], slo_minutes: float = None) -> Dict[str, Dict]:
+    """
+    Percentiles of each segment over a set of timelines.
+
+    Args:
+        rows: Timelines from storage.load_timelines
+        slo_minutes: Freshness objective (defaults to FRESHNESS_SLO_MINUTES)
+
+    Returns:
+        Dictionary of segment name to its count and percentiles; the
+        freshness segment also has "within_slo", the share of alerts
+        delivered within the objective
+    """
+    slo_seconds = (slo_minutes or FRESHNESS_SLO_MINUTES) * 60
+    summary = {}
+    for name, start, end in SEGMENTS:
+        values = [row[end] - row[start] for row in rows
+                  if row.get(start) is not None and row.get(end) is not None]
+        summary[name] = {"count": len(values), **percentiles(values)}
+        if name == "freshness" and values:
+            summary[name]["within_slo"] = sum(v <= slo_seconds for v in values) / len(values)
+    return summary
+
+
+def group_by_day(rows: List[Dict]) -> Dict[str, List[Dict]]:
+    """Timelines by UTC day of delivery (or first sighting, if not yet alerted), newest first."""
+    days: Dict[str, List[Dict]] = {}
+    for row in rows:
+        at = row["alerted_at"] or row["first_seen_at"]
+        if at is None:
+            continue
+        day = datetime.fromtimestamp(at, timezone.utc).strftime("%Y-%m-%d")
+        days.setdefault(day, []).append(row)
+    return dict(sorted(days.items(), reverse=True))
+
+
+def group_by_cycle(rows: List[Dict], limit: int = None) -> Dict[str, List[Dict]]:
+    """Timelines by the cycle that last advanced them, newest cycle first."""
+    cycles: Dict[str, List[Dict]] = {}
+    for row in rows:
+        if row["cycle_id"]:
+            cycles.setdefault(row["cycle_id"], []).append(row)
+    return dict(sorted(cycles.items(), reverse=True)[:limit])
+
+
+class CycleTimeline:
+    """Stage stamps collected during one monitoring cycle."""
+
+    def __init__(self, replica_id: str = None, started_at: float = None):
+        self.started_at = time.time() if started_at is None else started_at
+        # Sorts by start time; the replica keeps concurrent cycles apart
+        started = datetime.fromtimestamp(self.started_at, timezone.utc)
+        started = started.strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+        self.cycle_id = f"{started} {replica_id or REPLICA_ID}"
+        self.stamps: Dict[str, Dict[str, float]] = {
+            stage: {} for stage in TIMELINE_STAGES if stage != "first_seen"
+        }
+
+    def first_seen(self, items: List[CommentRecord]) -> int:
+        """Start the timelines of newly matched comments (written immediately)."""
+        return record_first_seen([(item.id, posted_timestamp(item.posted_date)) for item in items],
+                                 self.started_at, self.cycle_id)
+
+    def mark(self, stage: str, comment_ids: Iterable[str], at: float = None) -> None:
+        """Stamp comments as having reached a stage now (or at ``at``)."""
+        at = time.time() if at is None else at
+        for comment_id in comment_ids:
+            self.stamps[stage].setdefault(comment_id, at)
+
+    def delivered(self, times: Dict[str, float]) -> None:
+        """Stamp alert deliveries, keeping each comment's earliest."""
+        alerted = self.stamps["alerted"]
+        for comment_id, at in times.items():
+            alerted[comment_id] = min(at, alerted.get(comment_id, at))
+
+    def save(self) -> None:
+        """Write the cycle's stamps to the comment timelines."""
+        for stage, times in self.stamps.items():
+            record_timeline(stage, times, self.cycle_id)
+
+    def report(self) -> Dict[str, Dict]:
+        """Segment percentiles for the comments this cycle alerted on."""
+        alerted = set(self.stamps["alerted"])
+        rows = [row for row in load_timelines(self.started_at, self.cycle_id)
+                if row["comment_id"] in alerted]
+        return summarize(rows)
+
+
+def print_cycle_freshness(timeline: CycleTimeline) -> None:
+    """Print a cycle's alert freshness and the median of each stage."""
+    summary = timeline.report()
+    freshness = summary["freshness"]
+    if not freshness["count"]:
+        print("⏱️  Freshness: no alerts with a posted date this cycle")
+        return
+    points = " | ".join(f"p{point} {format_duration(freshness[f'p{point}'])}"
+                        for point in FRESHNESS_PERCENTILES)
+    print(f"⏱️  Freshness (posted → delivered) for {freshness['count']} alerts: {points} | "
+          f"{freshness['within_slo']:.0%} within {FRESHNESS_SLO_MINUTES:g}m")
+    stages = [f"{name} {format_duration(summary[name]['p50'])}"
+              for name, _, _ in SEGMENTS[:-1] if summary[name]["count"]]
+    print(f"   Median per stage: {', '.join(stages)}")
@@ -4,114 +4,334 @@ Comment Watcher - Monitor regulations.gov for specific keywords
 Main orchestration module.
 """
 
+import argparse
+import time
 from typing import List, Dict, Tuple
-from config import KEYWORDS, validate_config
-from fetcher import fetch_metadata, fetch_comment_detail
-from filter import flag_by_keyword, recheck_full_text
-from notifier import send_alerts, print_summary, print_keywords
-from storage import save_flagged_comments, load_seen_ids, mark_as_seen
+from config import (
+    KEYWORDS,
+    MAX_DETAIL_FETCHES,
+    REVISION_RECHECK_LIMIT,
+    LEASE_TTL_SECONDS,
+    CYCLE_TIME_BUDGET,
+    MAX_DETAIL_ATTEMPTS,
+    DETAIL_FETCH_STALE_SECONDS,
+    PROFILE_MODE,
+    PROFILE_MEMORY,
+    validate_config
+)
+from fetcher import fetch_comment_detail
+from budget import BudgetExhausted
+from filter import KeywordMatcher, recheck_full_text
+from query_planner import (
+    plan_queries,
+    resolve_since,
+    fetch_planned,
+    record_coverage,
+    merge_matches,
+    advance_high_water_mark
+)
+from models import Comment, CommentRecord
+from revisions import detect_revisions, recheck_revisions, revision_of, matched_revision
+from scoring import score_comments, update_document_stats
+from scheduler import queue_candidates, next_candidates, log_priorities, docket_from_comment_id
+from clustering import assign_cluster, match_confirmed_cluster, metadata_fingerprint
+import profiling
+from notifier import send_alerts, send_spike_alerts, print_summary, print_keywords
+from subscriptions import get_index, send_digests
+from enrichment import enrich_comments
+from coordination import get_coordinator, stop_coordination
+from trends import TrendTracker
+from freshness import CycleTimeline, print_cycle_freshness
+from storage_backends import get_backend
+from storage import (
+    save_corpus_records,
+    record_revisions,
+    add_cluster_member,
+    start_detail_fetch,
+    finish_detail_fetch,
+    filter_revision_ids,
+    release_detail_fetches,
+    reset_stale_fetches,
+    record_detail_attempt,
+    bump_data_version
+)
 
-def process_comment(comment_data: Dict, matched_keyword: str) -> Dict:
+def process_comment(comment_data: CommentRecord, matched_keyword: str) -> Comment:
     """
     Process a comment into a standardized format.
 
     Args:
-        comment_data: Full comment data from API
+        comment_data: Comment detail record from the API
         matched_keyword: The keyword that triggered the match
 
     Returns:
-        Processed comment dictionary
+        Processed comment
     """
-    attributes = comment_data["attributes"]
-    text = attributes.get("comment", "")
-
-    return {
-        "id": comment_data["id"],
-        "keyword": matched_keyword,
-        "title": attributes.get("title", ""),
-        "date": attributes.get("postedDate", ""),
-        "text_snippet": text[:200] + ("…" if len(text) > 200 else ""),
-        "full_text": text,
-        "organization": attributes.get("organization", ""),
-        "submitter_name": attributes.get("submitterName", ""),
-        "document_type": attributes.get("documentType", "")
-    }
+    return Comment(
+        id=comment_data.id,
+        keyword=matched_keyword,
+        title=comment_data.title,
+        date=comment_data.posted_date,
+        full_text=comment_data.comment,
+        organization=comment_data.organization,
+        submitter_name=comment_data.submitter_name,
+        document_type=comment_data.document_type,
+        docket_id=comment_data.docket_id or docket_from_comment_id(comment_data.id),
+        document_id=comment_data.comment_on_document_id
+    )
 
-def run_monitoring_cycle(since_date: str = None, page_size: int = None) -> Dict:
+def run_monitoring_cycle(since_date: str = None, page_size: int = None,
+                         time_budget: float = None) -> Dict:
     """
     Run a complete monitoring cycle.
 
     Args:
-        since_date: Optional date filter
+        since_date: Optional lastModifiedDate lower bound; defaults to the
+            stored high-water mark
         page_size: Number of comments to check
+        time_budget: Seconds the cycle may spend; detail fetches stop at the
+            deadline and the rest of the queue waits for the next run
+            (defaults to CYCLE_TIME_BUDGET; 0 or None for no deadline)
 
     Returns:
         Dictionary with monitoring results
     """
     print("🚀 Starting comment monitoring cycle...")
     print("=" * 60)
+    if time_budget is None:
+        time_budget = CYCLE_TIME_BUDGET
+    deadline = time.monotonic() + time_budget if time_budget else None
+    # Stage stamps for each matched comment, for freshness reporting
+    timeline = CycleTimeline()
 
     # Validate configuration
     validate_config()
-    print_keywords(KEYWORDS)
+    subscriptions = get_index()
+    # Subscribed terms are fetched and matched alongside the global keywords
+    keywords = subscriptions.watch_terms(KEYWORDS)
+    print_keywords(keywords)
+    if len(subscriptions):
+        print(f"📬 {len(subscriptions)} subscribers watching {len(subscriptions.terms)} terms")
+
+    # Matches counted into the shared trend windows at the end of the cycle
+    observations = []
+
+    # Split the work with any other replicas sharing this database
+    coordinator = get_coordinator()
+    owned_shards = coordinator.start()
+    # Candidates left mid-fetch by a crashed or killed cycle are retried
+    stale = reset_stale_fetches(DETAIL_FETCH_STALE_SECONDS)
+    if stale:
+        print(f"♻️  Returned {stale} interrupted detail fetches to the queue")
+    replicas = coordinator.live_replicas()
+    if len(replicas) > 1:
+        print(f"🤝 Replica {coordinator.replica_id}: {len(owned_shards)}/{coordinator.shards} "
+              f"shards, {len(replicas)} replicas live")
 
     # Load previously seen IDs to avoid duplicates
-    seen_ids = load_seen_ids()
+    backend = get_backend()
+    seen_ids = backend.load_seen_ids()
     print(f"📚 Loaded {len(seen_ids)} previously seen comment IDs")
 
-    # Step 1: Fetch metadata
+    # Step 1: Fetch metadata, pushing searchable terms down to the API
+    profiling.mark("fetch_metadata")
     print(f"\n📥 STEP 1: Fetching comment metadata...")
-    metadata = fetch_metadata(since_date, page_size)
+    plan = plan_queries(keywords)
+    # One replica at a time fetches metadata; the rest work from the shared queue
+    fetching = coordinator.claim_stage("fetch_metadata")
+    since = resolve_since(since_date)
+    print(f"   🧭 Server-side terms: {', '.join(plan['server']) or 'none'} | "
+          f"client-side terms: {', '.join(plan['client']) or 'none'} | since: {since or 'latest'}")
+    metadata, server_matches, resume_at = [], {}, None
+    if not fetching:
+        print("   🤝 Another replica is fetching metadata; working from the shared queue")
+    else:
+        try:
+            metadata, server_matches, resume_at = fetch_planned(plan, since, page_size)
+            record_coverage(plan, metadata, since, resume_at)
+        except BudgetExhausted as e:
+            print(f"⏸️  Deferring this cycle: {e}")
+
+    # Keep everything downloaded, so new keywords can be matched later without refetching
+    # (with pushdown that is only the search matches; see record_coverage)
+    save_corpus_records(metadata)
 
-    # Step 2: Flag by keyword
+    # Step 2: Combine server-side matches with client-side keyword scanning
+    profiling.mark("scan")
     print(f"\n🔍 STEP 2: Scanning for keyword matches...")
-    flagged_ids = flag_by_keyword(metadata, KEYWORDS)
+    flagged_ids = merge_matches(plan, metadata, server_matches, keywords)
+    print(f"   🎯 {len(flagged_ids)} matches among {len(metadata)} comments downloaded")
 
-    # Step 3: Fetch full details and process
+    # Step 3: Fetch full details and process, highest priority first
     relevant_comments = []
-    if flagged_ids:
-        print(f"\n📄 STEP 3: Fetching full details for {len(flagged_ids)} flagged comments...")
-        for i, (comment_id, keyword) in enumerate(flagged_ids, 1):
-            # Skip if already seen
-            if comment_id in seen_ids:
-                print(f"   ⏭️  Skip #{i}: Comment {comment_id} already processed")
-                continue
-
-            try:
-                print(f"\n   📋 Processing match #{i}/{len(flagged_ids)}...")
-                comment_data = fetch_comment_detail(comment_id)
-
-                # Double-check with full text
-                confirmed_keyword = recheck_full_text(comment_data, KEYWORDS)
-                if confirmed_keyword:
-                    processed_comment = process_comment(comment_data, confirmed_keyword)
-                    relevant_comments.append(processed_comment)
-                    mark_as_seen(comment_id)  # Mark as seen
-                    print(f"   ✅ Successfully processed comment {comment_id}")
-                else:
-                    print(f"   ⚠️  Keyword not confirmed in full text for {comment_id}")
-
-            except Exception as e:
-                print(f"   ❌ Error fetching comment {comment_id}: {e}")
+    revised_comments = []
+    checked_revisions = []
+    matcher = KeywordMatcher(keywords)
+    new_clusters = []
+    grown_clusters = {}
+    metadata_by_id = {item.id: item for item in metadata}
+    # Comments whose seen ID expired kept their revision fingerprint; they are rechecked, not new
+    seen_ids |= filter_revision_ids([item.id for item in metadata if item.id not in seen_ids])
+    timeline.first_seen([metadata_by_id[comment_id] for comment_id, _ in flagged_ids
+                         if comment_id in metadata_by_id and comment_id not in seen_ids])
+    queue_candidates(flagged_ids, metadata_by_id, seen_ids)
+    # Already-processed comments edited upstream are rechecked after new ones
+    detect_revisions(metadata, seen_ids)
+    # Candidates are queued, so the next cycle can start past this batch
+    advance_high_water_mark(metadata, resume_at)
+    if fetching:
+        coordinator.release_stage("fetch_metadata")
+    profiling.mark("fetch_details")
+    # A time budget, rather than a count, bounds the fetches when one is set
+    candidates, total_queued = next_candidates(MAX_DETAIL_FETCHES if deadline is None else 0,
+                                               coordinator.owns)
+    # Claim before fetching, so no other replica fetches or alerts on the same comment
+    candidates = coordinator.claim_candidates(candidates)
+    if candidates:
+        print(f"\n📄 STEP 3: Fetching full details for {len(candidates)} flagged comments...")
+        log_priorities(candidates, total_queued)
+        in_flight = None
+        try:
+            for i, candidate in enumerate(candidates, 1):
+                comment_id = candidate["comment_id"]
+                item = candidate["item"]
+
+                if deadline is not None and time.monotonic() >= deadline:
+                    print(f"   ⏰ Time budget used up; {len(candidates) - i + 1} candidates stay queued")
+                    break
+                if not start_detail_fetch(comment_id):
+                    continue
+                in_flight = comment_id
+
+                # Members of confirmed form-letter campaigns don't need a detail fetch
+                cluster = match_confirmed_cluster(item)
+                if cluster:
+                    member_count = add_cluster_member(cluster["cluster_id"], comment_id, 1.0,
+                                                      detail_skipped=True)
+                    grown_clusters[cluster["cluster_id"]] = member_count
+                    checked_revisions.append(revision_of(item, [candidate["keyword"]], has_detail=False))
+                    observations.append((candidate["keyword"], candidate["docket_id"], time.time()))
+                    backend.mark_as_seen(comment_id)
+                    finish_detail_fetch(comment_id, confirmed=True)
+                    in_flight = None
+                    print(f"   👥 Skip #{i}: Comment {comment_id} matches campaign cluster "
+                          f"#{cluster['cluster_id']} ({member_count} members)")
+                    continue
+
+                try:
+                    print(f"\n   📋 Processing match #{i}/{len(candidates)}...")
+                    comment_data = fetch_comment_detail(comment_id)
+                    timeline.mark("detail_fetched", [comment_id])
+                    save_corpus_records([comment_data], has_detail=True)
+
+                    # Double-check with full text
+                    confirmed_keyword = recheck_full_text(comment_data, matcher)
+                    if confirmed_keyword:
+                        timeline.mark("confirmed", [comment_id])
+                        processed_comment = process_comment(comment_data, confirmed_keyword)
+                        assignment = assign_cluster(comment_data, confirmed_keyword,
+                                                    metadata_fingerprint(item))
+                        if assignment:
+                            processed_comment.cluster_id = assignment["cluster_id"]
+                            if assignment["is_new"]:
+                                new_clusters.append(processed_comment)
+                            else:
+                                grown_clusters[assignment["cluster_id"]] = assignment["member_count"]
+                        relevant_comments.append(processed_comment)
+                        checked_revisions.append(matched_revision(comment_data, matcher))
+                        backend.mark_as_seen(comment_id)  # Mark as seen
+                        print(f"   ✅ Successfully processed comment {comment_id}")
+                    else:
+                        print(f"   ⚠️  Keyword not confirmed in full text for {comment_id}")
+                    finish_detail_fetch(comment_id, confirmed=bool(confirmed_keyword))
+                    in_flight = None
+
+                except BudgetExhausted as e:
+                    print(f"   ⏸️  Deferring {len(candidates) - i + 1} remaining matches: {e}")
+                    break
+                except Exception as e:
+                    print(f"   ❌ Error fetching comment {comment_id}: {e}")
+                    if not record_detail_attempt(comment_id, str(e), MAX_DETAIL_ATTEMPTS):
+                        print(f"   🚫 Giving up on {comment_id} after {MAX_DETAIL_ATTEMPTS} attempts")
+                    in_flight = None
+        finally:
+            # Whatever stopped the loop, an unfinished candidate goes back to pending
+            if in_flight:
+                release_detail_fetches([in_flight])
+            coordinator.release_items([candidate["comment_id"] for candidate in candidates])
+
+        still_queued = total_queued - len(candidates)
+        if still_queued > 0:
+            print(f"   🗂️  {still_queued} lower-priority candidates left queued for the next cycle")
     else:
         print(f"\n📄 STEP 3: No flagged comments to fetch details for.")
 
-    # Step 4: Send alerts
+    # Only comments confirmed for the first time count toward document frequencies
+    new_comments = list(relevant_comments)
+
+    # Pending revisions may have been flagged by any replica; one rechecks them at a time
+    with coordinator.hold("revisions") as rechecking:
+        if rechecking and (deadline is None or time.monotonic() < deadline):
+            revision_alerts, revised_comments = recheck_revisions(keywords, process_comment,
+                                                                  REVISION_RECHECK_LIMIT)
+            relevant_comments.extend(revision_alerts)
+
+    # Step 4: Score and send alerts
+    profiling.mark("alerts")
     print(f"\n🚨 STEP 4: Processing alerts...")
+    update_document_stats(new_comments)
+    score_comments(relevant_comments + revised_comments, keywords)
+
+    for comment in relevant_comments:
+        observations.append((comment.keyword, comment.docket_id, time.time()))
+
+    # One alert per new campaign cluster, carrying its running member count
+    for comment in new_clusters:
+        comment.cluster_size = grown_clusters.pop(comment.cluster_id, 1)
+    alert_comments = [c for c in relevant_comments
+                      if c.cluster_id is None or c.cluster_size is not None]
+    for cluster_id, member_count in grown_clusters.items():
+        print(f"👥 Campaign cluster #{cluster_id} now has {member_count} members")
+
+    # Docket and document titles for the alerts, one lookup per distinct parent
+    enrich_comments(alert_comments)
 
     # TODO: Refactor this adn savef to module
-    send_alerts(relevant_comments)
+    timeline.delivered(send_alerts([c for c in alert_comments if c.keyword in KEYWORDS]))
+    if len(subscriptions):
+        timeline.delivered(send_digests(subscriptions.route(alert_comments))["delivered"])
+
+    # Volume spikes per keyword and docket, against each series' recent baseline;
+    # replicas update the shared windows one at a time
+    with coordinator.hold("trends", wait=LEASE_TTL_SECONDS) as updating:
+        if updating:
+            trends = TrendTracker.load()
+            for keyword, docket_id, observed_at in observations:
+                trends.observe(keyword, docket_id, observed_at)
+            send_spike_alerts(trends.detect_spikes())
+            trends.prune()
+            trends.save()
+        else:
+            print("⏸️  Trend windows busy in another replica; skipping spike detection")
 
     # Step 5: Save results
-    if relevant_comments:
+    profiling.mark("save")
+    if relevant_comments or revised_comments:
         print(f"\n💾 STEP 5: Saving results...")
-        save_flagged_comments(relevant_comments)
+        backend.save_flagged_comments(relevant_comments + revised_comments)
+        timeline.mark("stored", [c.id for c in relevant_comments])
     else:
         print(f"\n💾 STEP 5: No results to save.")
+    record_revisions(checked_revisions)
+    timeline.save()
+    # Readers of the query API drop their cached responses
+    bump_data_version()
 
     # Step 6: Print summary
+    profiling.mark("summary")
     print(f"\n📊 STEP 6: Final summary...")
     print_summary(len(metadata), len(relevant_comments))
+    print_cycle_freshness(timeline)
 
     print("\n" + "=" * 60)
 
@@ -123,14 +343,35 @@ def run_monitoring_cycle(since_date: str = None, page_size: int = None) -> Dict:
 
 def main():
     """Main entry point for the comment watcher application."""
+    parser = argparse.ArgumentParser(description="Run a comment monitoring cycle")
+    parser.add_argument("--profile", choices=profiling.PROFILE_MODES, default=PROFILE_MODE or None,
+                        help="Profile each step of the cycle with cProfile or the sampling profiler")
+    parser.add_argument("--profile-memory", action="store_true", default=PROFILE_MEMORY,
+                        help="Record tracemalloc memory diffs at each step boundary")
+    parser.add_argument("--profile-dir", default=None, help="Directory for profile output")
+    parser.add_argument("--time-budget", type=float, default=None,
+                        help="Seconds the cycle may spend fetching details (defaults to config)")
+    args = parser.parse_args()
+    # argparse checks choices only on the command line, not the PROFILE_MODE default
+    if args.profile and args.profile not in profiling.PROFILE_MODES:
+        parser.error(f"unknown PROFILE_MODE {args.profile!r} (use {' or '.join(profiling.PROFILE_MODES)})")
+
+    if args.profile or args.profile_memory:
+        profiling.start_profiling("cycle", args.profile, args.profile_memory, args.profile_dir)
+
     # Run a monitoring cycle
     # You can customize these parameters:
-    # - since_date: "2024-01-01" for date filtering
-    # - page_size: 50 for more comments per run
-    results = run_monitoring_cycle(
-        since_date=None,  # Get recent comments without date filter
-        page_size=20      # Check 20 comments per run
-    )
+    # - since_date: "2024-01-01" to override the stored high-water mark
+    # - page_size: 50 for more comments per page
+    try:
+        results = run_monitoring_cycle(
+            since_date=None,  # Continue from the last synced lastModifiedDate
+            page_size=20,     # Comments per page of each search stream
+            time_budget=args.time_budget
+        )
+    finally:
+        stop_coordination()
+        profiling.stop_profiling()
 
     print(f"\n🎉 Monitoring cycle completed!")
     print(f"📈 Results: {results['flagged_count']} flagged out of {results['total_checked']} checked")
@@ -0,0 +1,131 @@
+"""
+Compact comment records.
+
+The API returns each comment as a JSON:API object carrying dozens of
+attributes, but the watcher reads about ten of them. CommentRecord keeps
+only those, in ``__slots__``, and the raw JSON is dropped as soon as a
+record is built. Comment is the processed form of a flagged comment used by
+the notifier and storage; it also supports dictionary-style access by field
+name, and derives its text snippet on demand instead of storing a copy.
+"""
+
+import json
+from typing import Dict, Iterator, Optional
+from normalizer import normalize_document, normalize_term, build_snippet
+
+# API attribute name -> CommentRecord slot
+API_FIELDS = {
+    "title": "title",
+    "highlightedContent": "highlighted_content",
+    "comment": "comment",
+    "postedDate": "posted_date",
+    "lastModifiedDate": "last_modified_date",
+    "documentType": "document_type",
+    "agencyId": "agency_id",
+    "docketId": "docket_id",
+    "organization": "organization",
+    "submitterName": "submitter_name",
+    "commentOnDocumentId": "comment_on_document_id",
+}
+
+
+class CommentRecord:
+    """The fields of an API comment (metadata or detail) the watcher uses."""
+
+    __slots__ = ("id",) + tuple(API_FIELDS.values())
+
+    def __init__(self, comment_id: str, **fields: Optional[str]):
+        self.id = comment_id
+        for slot in API_FIELDS.values():
+            setattr(self, slot, fields.get(slot) or "")
+
+    @classmethod
+    def from_api(cls, item: Dict) -> "CommentRecord":
+        """Build a record from a JSON:API comment object."""
+        attributes = item.get("attributes") or {}
+        return cls(item["id"], **{slot: attributes.get(name) for name, slot in API_FIELDS.items()})
+
+    @classmethod
+    def from_json(cls, text: str) -> "CommentRecord":
+        """Rebuild a record serialized with to_json."""
+        return cls.from_api(json.loads(text))
+
+    def field(self, name: str) -> str:
+        """Value of an API attribute by its API name (e.g. "postedDate")."""
+        return getattr(self, API_FIELDS[name])
+
+    def to_json(self) -> str:
+        """Serialize in the API's shape, keeping only non-empty fields."""
+        attributes = {name: getattr(self, slot) for name, slot in API_FIELDS.items() if getattr(self, slot)}
+        return json.dumps({"id": self.id, "attributes": attributes})
+
+    def __repr__(self) -> str:
+        return f"CommentRecord({self.id!r})"
+
+
+class Comment:
+    """A flagged comment, processed for alerting and storage."""
+
+    __slots__ = (
+        "id", "keyword", "title", "date", "full_text", "organization",
+        "submitter_name", "document_type", "docket_id", "document_id", "score",
+        "cluster_id", "cluster_size", "docket_title", "document_title"
+    )
+
+    def __init__(self, id: str, keyword: str, title: str = "", date: str = "",
+                 full_text: str = "", organization: str = "", submitter_name: str = "",
+                 document_type: str = "", docket_id: str = "", document_id: str = "",
+                 score: float = None, cluster_id: int = None, cluster_size: int = None,
+                 docket_title: str = "", document_title: str = ""):
+        self.id = id
+        self.keyword = keyword
+        self.title = title
+        self.date = date
+        self.full_text = full_text
+        self.organization = organization
+        self.submitter_name = submitter_name
+        self.document_type = document_type
+        self.docket_id = docket_id
+        self.document_id = document_id
+        self.score = score
+        self.cluster_id = cluster_id
+        self.cluster_size = cluster_size
+        # Parent docket and document titles, filled in by enrichment.py
+        self.docket_title = docket_title
+        self.document_title = document_title
+
+    @property
+    def text_snippet(self) -> str:
+        """Snippet of the body around the matched keyword."""
+        document = normalize_document(CommentRecord(self.id, comment=self.full_text))
+        return build_snippet(document.get("comment"), normalize_term(self.keyword))
+
+    # Dictionary-style access, so formatters and storage can read fields by name
+
+    def __getitem__(self, key: str):
+        if key != "text_snippet" and key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key: str, value) -> None:
+        if key not in self.__slots__:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __contains__(self, key: str) -> bool:
+        return key == "text_snippet" or key in self.__slots__
+
+    def get(self, key: str, default=None):
+        """Read a field by name; unset (None) fields count as missing."""
+        value = self[key] if key in self else None
+        return default if value is None else value
+
+    def keys(self) -> Iterator[str]:
+        return iter(self.__slots__ + ("text_snippet",))
+
+    def to_dict(self) -> Dict:
+        """Plain dictionary of every field, including the snippet."""
+        return {key: self[key] for key in self.keys()}
+
+    def __repr__(self) -> str:
+        return f"Comment({self.id!r}, keyword={self.keyword!r})"
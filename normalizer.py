@@ -0,0 +1,362 @@
+"""
+Text normalization stage shared by every matcher, snippet builder and index.
+
+Each document field is normalized exactly once: HTML markup is stripped,
+entities are decoded, Unicode is NFKC-normalized and casefolded, and runs of
+whitespace are collapsed. The result keeps an offset map back into the raw
+text so matches can be reported against what the API actually returned.
+"""
+
+import html
+import re
+import threading
+import unicodedata
+from array import array
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+from config import NORMALIZE_CACHE_SIZE
+
+# Attribute fields that carry searchable text, in display order
+DOCUMENT_FIELDS = ("title", "highlightedContent", "comment")
+
+_TOKEN_RE = re.compile(r"\w+(?:['’]\w+)*")
+_TAG_RE = re.compile(r"<[^<>]*>")
+_ENTITY_RE = re.compile(r"&(#[0-9]+|#[xX][0-9a-fA-F]+|[A-Za-z][A-Za-z0-9]*);")
+_BLOCK_TAGS = {"br", "p", "div", "li", "tr", "td", "h1", "h2", "h3", "h4", "h5", "h6"}
+
+
+class NormalizedText:
+    """
+    A normalized view of one raw string.
+
+    Attributes:
+        original: The raw text as returned by the API
+        display: Markup-free, NFKC-normalized, whitespace-collapsed text (case preserved)
+        text: Casefolded form of ``display`` used for matching
+    """
+
+    __slots__ = ("original", "display", "text", "_to_display", "_to_original", "_tokens")
+
+    def __init__(self, original: str, display: str, text: str,
+                 to_display: Optional[array] = None, to_original: Optional[array] = None):
+        # Plain text (see _normalize_plain) leaves both maps None: text and
+        # display line up one to one, and the raw offsets are built on first use
+        self.original = original
+        self.display = display
+        self.text = text
+        self._to_display = to_display
+        self._to_original = to_original
+        self._tokens = None
+
+    def __len__(self) -> int:
+        return len(self.text)
+
+    def __contains__(self, term: str) -> bool:
+        return term in self.text
+
+    @property
+    def tokens(self) -> List[str]:
+        """Word tokens of the normalized text, computed once on first use."""
+        if self._tokens is None:
+            self._tokens = tokenize(self.text)
+        return self._tokens
+
+    def find(self, term: str, start: int = 0) -> int:
+        """Find a normalized term, returning its index in ``text`` or -1."""
+        return self.text.find(term, start)
+
+    def display_span(self, start: int, end: int) -> Tuple[int, int]:
+        """Map a ``text`` span onto the matching ``display`` span."""
+        if not self.text:
+            return 0, 0
+        end = max(end, start + 1)
+        if self._to_display is None:
+            return start, end
+        return self._to_display[start], self._to_display[end - 1] + 1
+
+    def original_span(self, start: int, end: int) -> Tuple[int, int]:
+        """Map a ``text`` span back onto the raw ``original`` string."""
+        if not self.text:
+            return 0, 0
+        d_start, d_end = self.display_span(start, end)
+        if self._to_original is None:
+            self._to_original = _plain_offsets(self.original)
+        return self._to_original[d_start], self._to_original[d_end - 1] + 1
+
+
+class NormalizedDocument:
+    """
+    Normalized text fields of a single comment.
+
+    Fields are kept separate so that a keyword can never match across the
+    boundary between, say, the title and the highlighted snippet.
+    """
+
+    __slots__ = ("comment_id", "fields")
+
+    def __init__(self, comment_id: str, fields: Dict[str, NormalizedText]):
+        self.comment_id = comment_id
+        self.fields = fields
+
+    def get(self, field: str) -> Optional[NormalizedText]:
+        return self.fields.get(field)
+
+    def tokens(self, fields: Iterable[str] = DOCUMENT_FIELDS) -> List[str]:
+        """Concatenated word tokens of the requested fields."""
+        tokens = []
+        for name in fields:
+            value = self.fields.get(name)
+            if value is not None:
+                tokens.extend(value.tokens)
+        return tokens
+
+    def contains(self, term: str) -> bool:
+        """Check whether a normalized term appears in any field."""
+        return any(term in value.text for value in self.fields.values())
+
+    def find(self, term: str) -> Optional[Tuple[str, int]]:
+        """Return ``(field, index)`` of the first occurrence of a normalized term."""
+        for name, value in self.fields.items():
+            index = value.text.find(term)
+            if index >= 0:
+                return name, index
+        return None
+
+
+def _decode_markup(raw: str) -> Tuple[str, array]:
+    """Strip tags and decode entities, tracking each output char's raw offset."""
+    chars = []
+    offsets = array("I")
+    pos = 0
+    length = len(raw)
+
+    while pos < length:
+        ch = raw[pos]
+        if ch == "<":
+            tag = _TAG_RE.match(raw, pos)
+            if tag:
+                # Block-level tags separate words; inline ones (e.g. <em>) do not
+                name = tag.group()[1:-1].strip("/ ").split(" ", 1)[0].lower()
+                if name in _BLOCK_TAGS:
+                    chars.append(" ")
+                    offsets.append(pos)
+                pos = tag.end()
+                continue
+        elif ch == "&":
+            entity = _ENTITY_RE.match(raw, pos)
+            if entity:
+                decoded = html.unescape(entity.group())
+                for out in decoded:
+                    chars.append(out)
+                    offsets.append(pos)
+                pos = entity.end()
+                continue
+        chars.append(ch)
+        offsets.append(pos)
+        pos += 1
+
+    return "".join(chars), offsets
+
+
+_WORD_RUN_RE = re.compile(r"\S+")
+
+
+def _plain_offsets(raw: str) -> array:
+    """Raw offset of each character of a plain text's collapsed display form."""
+    # Each collapsed space maps to the start of the word after it, as in normalize_text
+    to_original = array("I")
+    for word in _WORD_RUN_RE.finditer(raw):
+        if to_original:
+            to_original.append(word.start())
+        to_original.extend(range(word.start(), word.end()))
+    return to_original
+
+
+def _normalize_plain(raw: str) -> Optional[NormalizedText]:
+    """
+    Fast path for text with no markup that is already NFKC-normalized.
+
+    Such text only needs whitespace collapsed and casefolding, which the
+    string methods do in C. Offset maps are left to be built on first use,
+    which only happens for the few texts a snippet is taken from; combining
+    marks then map to their own raw offset rather than their base
+    character's. Returns None when casefolding changes the length (e.g.
+    "ß" → "ss"), so the general path builds the uneven offset map.
+    """
+    display = " ".join(raw.split())
+    text = display.casefold()
+    if len(text) != len(display):
+        return None
+    return NormalizedText(raw, display, text)
+
+
+def normalize_text(raw: Optional[str]) -> NormalizedText:
+    """
+    Normalize a raw string for matching.
+
+    Args:
+        raw: Raw text, possibly containing HTML markup
+
+    Returns:
+        NormalizedText with display/matching forms and offset maps
+    """
+    raw = raw or ""
+    # Most comments are plain text; skip the per-character pass when nothing needs decoding
+    if "<" not in raw and "&" not in raw and (raw.isascii() or unicodedata.is_normalized("NFKC", raw)):
+        normalized = _normalize_plain(raw)
+        if normalized is not None:
+            return normalized
+
+    decoded, decoded_offsets = _decode_markup(raw)
+
+    display_chars = []
+    to_original = array("I")
+    folded_chars = []
+    to_display = array("I")
+    pending_space = False
+
+    i = 0
+    length = len(decoded)
+    while i < length:
+        ch = decoded[i]
+        if ch.isspace():
+            pending_space = bool(display_chars)
+            i += 1
+            continue
+
+        # Keep a base character together with its combining marks for NFKC
+        j = i + 1
+        while j < length and unicodedata.combining(decoded[j]):
+            j += 1
+        cluster = unicodedata.normalize("NFKC", decoded[i:j])
+        origin = decoded_offsets[i]
+        i = j
+
+        if pending_space:
+            display_chars.append(" ")
+            to_original.append(origin)
+            folded_chars.append(" ")
+            to_display.append(len(display_chars) - 1)
+            pending_space = False
+
+        for out in cluster:
+            if out.isspace():
+                # NFKC can turn e.g. no-break spaces into plain spaces
+                if display_chars and display_chars[-1] != " ":
+                    display_chars.append(" ")
+                    to_original.append(origin)
+                    folded_chars.append(" ")
+                    to_display.append(len(display_chars) - 1)
+                continue
+            display_chars.append(out)
+            to_original.append(origin)
+            index = len(display_chars) - 1
+            for folded in out.casefold():
+                folded_chars.append(folded)
+                to_display.append(index)
+
+    # NFKC spaces may leave one trailing separator behind
+    while display_chars and display_chars[-1] == " ":
+        display_chars.pop()
+        to_original.pop()
+        folded_chars.pop()
+        to_display.pop()
+
+    return NormalizedText(raw, "".join(display_chars), "".join(folded_chars),
+                          to_display, to_original)
+
+
+def tokenize(text: str) -> List[str]:
+    """Split normalized text into word tokens (inner apostrophes kept)."""
+    return _TOKEN_RE.findall(text)
+
+
+_term_cache: Dict[str, str] = {}
+_document_cache: "OrderedDict[tuple, NormalizedDocument]" = OrderedDict()
+# Backfill workers share both caches; LRU bookkeeping isn't safe across threads
+_cache_lock = threading.Lock()
+
+
+def normalize_term(term: str) -> str:
+    """Normalize a watch term the same way document text is normalized."""
+    with _cache_lock:
+        cached = _term_cache.get(term)
+    if cached is None:
+        cached = normalize_text(term).text
+        with _cache_lock:
+            _term_cache[term] = cached
+    return cached
+
+
+def normalize_document(record) -> NormalizedDocument:
+    """
+    Normalize the text fields of a comment, reusing a cached result when the
+    same comment is seen again with unchanged text.
+
+    Args:
+        record: CommentRecord (metadata or detail) for the comment
+
+    Returns:
+        NormalizedDocument for the comment
+    """
+    raw_fields = tuple((field, record.field(field)) for field in DOCUMENT_FIELDS)
+    key = (record.id, raw_fields)
+
+    with _cache_lock:
+        document = _document_cache.get(key)
+        if document is not None:
+            _document_cache.move_to_end(key)
+            return document
+
+    # Normalize outside the lock; two threads may race to cache the same document
+    document = NormalizedDocument(
+        record.id,
+        {field: normalize_text(value) for field, value in raw_fields if value}
+    )
+    with _cache_lock:
+        _document_cache[key] = document
+        if len(_document_cache) > NORMALIZE_CACHE_SIZE:
+            _document_cache.popitem(last=False)
+
+    return document
+
+
+def clear_cache() -> None:
+    """Drop all cached normalization results."""
+    with _cache_lock:
+        _document_cache.clear()
+        _term_cache.clear()
+
+
+def build_snippet(text: Optional[NormalizedText], term: Optional[str] = None,
+                  width: int = 200) -> str:
+    """
+    Build a display snippet from normalized text.
+
+    Args:
+        text: Normalized field to take the snippet from
+        term: Optional normalized term to center the snippet on
+        width: Maximum snippet length in characters
+
+    Returns:
+        Snippet string, with an ellipsis where text was cut off
+    """
+    if text is None or not text.display:
+        return ""
+
+    display = text.display
+    start = 0
+    if term:
+        index = text.find(term)
+        if index >= 0:
+            match_start, match_end = text.display_span(index, index + len(term))
+            start = max(0, min(match_start - (width - (match_end - match_start)) // 2,
+                               len(display) - width))
+
+    end = start + width
+    snippet = display[start:end]
+    if start > 0:
+        snippet = "…" + snippet
+    if end < len(display):
+        snippet += "…"
+    return snippet
@@ -1,19 +1,29 @@
 import requests
 import json
-from typing import List, Dict
+import time
+from typing import List, Dict, Optional
 from config import (
     TEAMS_WEBHOOK_URL,
     EMAIL_WEBHOOK_URL,
     ENABLE_TEAMS_ALERTS,
-    ENABLE_EMAIL_ALERTS
+    ENABLE_EMAIL_ALERTS,
+    ALERT_MIN_SCORE,
+    ALERT_SORT_BY_SCORE
 )
+from models import Comment
 
-def format_alert(comment: Dict) -> str:
+def _parent_label(title: str, object_id: str) -> str:
+    """Docket or document title with its ID, or whichever is known."""
+    if title and object_id:
+        return f"{title} ({object_id})"
+    return title or object_id or 'N/A'
+
+def format_alert(comment: Comment) -> str:
     """
     Format a comment into a console alert message.
 
     Args:
-        comment: Comment dictionary with processed data
+        comment: Processed comment
 
     Returns:
         Formatted alert string
@@ -23,20 +33,24 @@ def format_alert(comment: Dict) -> str:
         f"📋 ID: {comment['id']}\n"
         f"📅 Date: {comment['date']}\n"
         f"📝 Title: {comment['title']}\n"
+        f"🗂️ Docket: {_parent_label(comment.get('docket_title'), comment.get('docket_id'))}\n"
+        f"📑 Document: {_parent_label(comment.get('document_title'), comment.get('document_id'))}\n"
         f"🔗 Link: https://www.regulations.gov/comment/{comment['id']}\n"
         f"👤 Submitter: {comment.get('submitter_name', 'N/A')}\n"
         f"🏢 Organization: {comment.get('organization', 'N/A')}\n"
+        f"⭐ Relevance: {comment.get('score', 'N/A')}\n"
+        f"👥 Campaign size: {comment.get('cluster_size', 1)}\n"
         f"📄 Snippet: {comment['text_snippet']}\n"
-        "—" * 60
+        + "—" * 60
     )
     return msg
 
-def format_teams_message(comment: Dict) -> Dict:
+def format_teams_message(comment: Comment) -> Dict:
     """
     Format a comment for Microsoft Teams webhook.
 
     Args:
-        comment: Comment dictionary with processed data
+        comment: Processed comment
 
     Returns:
         Teams message card dictionary
@@ -64,6 +78,14 @@ def format_teams_message(comment: Dict) -> Dict:
                         "name": "Comment ID",
                         "value": comment['id']
                     },
+                    {
+                        "name": "Docket",
+                        "value": _parent_label(comment.get('docket_title'), comment.get('docket_id'))
+                    },
+                    {
+                        "name": "Document",
+                        "value": _parent_label(comment.get('document_title'), comment.get('document_id'))
+                    },
                     {
                         "name": "Submitter",
                         "value": comment.get('submitter_name', 'N/A')
@@ -75,6 +97,14 @@ def format_teams_message(comment: Dict) -> Dict:
                     {
                         "name": "Document Type",
                         "value": comment.get('document_type', 'N/A')
+                    },
+                    {
+                        "name": "Relevance",
+                        "value": str(comment.get('score', 'N/A'))
+                    },
+                    {
+                        "name": "Campaign Size",
+                        "value": str(comment.get('cluster_size', 1))
                     }
                 ],
                 "text": comment['text_snippet']
@@ -96,12 +126,12 @@ def format_teams_message(comment: Dict) -> Dict:
 
     return message
 
-def format_email_message(comment: Dict) -> Dict:
+def format_email_message(comment: Comment) -> Dict:
     """
     Format a comment for email webhook.
 
     Args:
-        comment: Comment dictionary with processed data
+        comment: Processed comment
 
     Returns:
         Email message dictionary
@@ -116,10 +146,13 @@ New Comment Alert
 Keyword Matched: {comment['keyword']}
 Title: {comment['title']}
 Comment ID: {comment['id']}
+Docket: {_parent_label(comment.get('docket_title'), comment.get('docket_id'))}
+Commented On: {_parent_label(comment.get('document_title'), comment.get('document_id'))}
 Posted Date: {comment['date']}
 Submitter: {comment.get('submitter_name', 'N/A')}
 Organization: {comment.get('organization', 'N/A')}
 Document Type: {comment.get('document_type', 'N/A')}
+Campaign Size: {comment.get('cluster_size', 1)}
 
 Snippet:
 {comment['text_snippet']}
@@ -136,10 +169,13 @@ Comment Watcher Alert System
 <p><strong>Keyword Matched:</strong> {comment['keyword']}</p>
 <p><strong>Title:</strong> {comment['title']}</p>
 <p><strong>Comment ID:</strong> {comment['id']}</p>
+<p><strong>Docket:</strong> {_parent_label(comment.get('docket_title'), comment.get('docket_id'))}</p>
+<p><strong>Commented On:</strong> {_parent_label(comment.get('document_title'), comment.get('document_id'))}</p>
 <p><strong>Posted Date:</strong> {comment['date']}</p>
 <p><strong>Submitter:</strong> {comment.get('submitter_name', 'N/A')}</p>
 <p><strong>Organization:</strong> {comment.get('organization', 'N/A')}</p>
 <p><strong>Document Type:</strong> {comment.get('document_type', 'N/A')}</p>
+<p><strong>Campaign Size:</strong> {comment.get('cluster_size', 1)}</p>
 
 <h3>Snippet:</h3>
 <p>{comment['text_snippet']}</p>
@@ -155,45 +191,59 @@ Comment Watcher Alert System
 
     return message
 
-def send_teams_alert(comment: Dict) -> bool:
+def post_webhook(url: str, message: Dict, description: str) -> bool:
     """
-    Send alert to Microsoft Teams webhook.
+    Post a formatted message to a webhook.
 
     Args:
-        comment: Comment dictionary with processed data
+        url: Webhook URL
+        message: JSON message body
+        description: What is being sent, for log lines (e.g. "Teams alert for comment X")
 
     Returns:
         True if successful, False otherwise
     """
-    if not ENABLE_TEAMS_ALERTS or not TEAMS_WEBHOOK_URL:
-        return False
-
     try:
-        message = format_teams_message(comment)
         response = requests.post(
-            TEAMS_WEBHOOK_URL,
+            url,
             json=message,
             headers={'Content-Type': 'application/json'},
             timeout=10
         )
 
         if response.status_code == 200:
-            print(f"   ✅ Teams alert sent for comment {comment['id']}")
+            print(f"   ✅ {description} sent")
             return True
         else:
-            print(f"   ❌ Teams alert failed for comment {comment['id']}: {response.status_code}")
+            print(f"   ❌ {description} failed: {response.status_code}")
             return False
 
     except Exception as e:
-        print(f"   ❌ Teams alert error for comment {comment['id']}: {e}")
+        print(f"   ❌ {description} error: {e}")
         return False
 
-def send_email_alert(comment: Dict) -> bool:
+def send_teams_alert(comment: Comment) -> bool:
+    """
+    Send alert to Microsoft Teams webhook.
+
+    Args:
+        comment: Processed comment
+
+    Returns:
+        True if successful, False otherwise
+    """
+    if not ENABLE_TEAMS_ALERTS or not TEAMS_WEBHOOK_URL:
+        return False
+
+    return post_webhook(TEAMS_WEBHOOK_URL, format_teams_message(comment),
+                        f"Teams alert for comment {comment['id']}")
+
+def send_email_alert(comment: Comment) -> bool:
     """
     Send alert via email webhook.
 
     Args:
-        comment: Comment dictionary with processed data
+        comment: Processed comment
 
     Returns:
         True if successful, False otherwise
@@ -201,25 +251,54 @@ def send_email_alert(comment: Dict) -> bool:
     if not ENABLE_EMAIL_ALERTS or not EMAIL_WEBHOOK_URL:
         return False
 
-    try:
-        message = format_email_message(comment)
-        response = requests.post(
-            EMAIL_WEBHOOK_URL,
-            json=message,
-            headers={'Content-Type': 'application/json'},
-            timeout=10
-        )
+    return post_webhook(EMAIL_WEBHOOK_URL, format_email_message(comment),
+                        f"Email alert for comment {comment['id']}")
 
-        if response.status_code == 200:
-            print(f"   ✅ Email alert sent for comment {comment['id']}")
-            return True
-        else:
-            print(f"   ❌ Email alert failed for comment {comment['id']}: {response.status_code}")
-            return False
+def format_teams_digest(comments: List[Comment], heading: str, total: int = None) -> Dict:
+    """
+    Format several comments as one Teams message card.
 
-    except Exception as e:
-        print(f"   ❌ Email alert error for comment {comment['id']}: {e}")
-        return False
+    Args:
+        comments: Processed comments, one card section each
+        heading: Card title (e.g. the subscriber's name)
+        total: Comments in the digest, when more were matched than shown
+
+    Returns:
+        Teams message card dictionary
+    """
+    total = total or len(comments)
+    message = format_teams_message(comments[0])
+    message["summary"] = f"{heading}: {total} new comment alerts"
+    message["sections"] = [
+        {"activityTitle": f"🔔 {heading}: {total} new comment alerts"}
+    ] + [format_teams_message(comment)["sections"][0] for comment in comments]
+    if total > len(comments):
+        message["sections"].append({"text": f"…and {total - len(comments)} more"})
+    message["potentialAction"] = []
+    return message
+
+def format_email_digest(comments: List[Comment], heading: str, total: int = None) -> Dict:
+    """
+    Format several comments as one email message.
+
+    Args:
+        comments: Processed comments, included in order
+        heading: Digest title (e.g. the subscriber's name)
+        total: Comments in the digest, when more were matched than shown
+
+    Returns:
+        Email message dictionary
+    """
+    total = total or len(comments)
+    messages = [format_email_message(comment) for comment in comments]
+    more = f"\n\n…and {total - len(comments)} more" if total > len(comments) else ""
+    keywords = sorted({comment['keyword'] for comment in comments})
+
+    return {
+        "subject": f"{heading}: {total} new comment alerts ({', '.join(keywords)})",
+        "body": ("\n\n" + "=" * 40 + "\n\n").join(m["body"] for m in messages) + more,
+        "html_body": "<hr>".join(m["html_body"] for m in messages) + more.replace("\n", "<br>")
+    }
 
 def send_alert(formatted_message: str) -> None:
     """
@@ -230,22 +309,44 @@ def send_alert(formatted_message: str) -> None:
     """
     print(formatted_message)
 
-def send_alerts(comments: List[Dict]) -> None:
+def send_alerts(comments: List[Comment], min_score: Optional[float] = None,
+                sort_by_score: Optional[bool] = None) -> Dict[str, float]:
     """
     Send alerts for multiple flagged comments.
 
     Args:
-        comments: List of flagged comment dictionaries
+        comments: Flagged comments
+        min_score: Skip comments scored below this relevance (defaults to config)
+        sort_by_score: Send the most relevant comments first (defaults to config)
+
+    Returns:
+        Dictionary of comment ID to when its alert was delivered (epoch
+        seconds); with no webhook channel enabled, the console alert counts
     """
+    if min_score is None:
+        min_score = ALERT_MIN_SCORE
+    if sort_by_score is None:
+        sort_by_score = ALERT_SORT_BY_SCORE
+
+    # Unscored comments are always alerted on
+    if min_score > 0:
+        below = [c for c in comments if c.get('score') is not None and c['score'] < min_score]
+        if below:
+            print(f"🔕 Holding back {len(below)} comments below relevance {min_score}")
+        comments = [c for c in comments if c.get('score') is None or c['score'] >= min_score]
+    if sort_by_score:
+        comments = sorted(comments, key=lambda c: c.get('score') or 0.0, reverse=True)
+
     if not comments:
         print("✅ No flagged comments this run.")
-        return
+        return {}
 
     print(f"🚨 Found {len(comments)} flagged comments!")
     print("=" * 60)
 
     teams_sent = 0
     email_sent = 0
+    delivered = {}
 
     for comment in comments:
         # Console alert
@@ -253,13 +354,18 @@ def send_alerts(comments: List[Dict]) -> None:
         send_alert(formatted_msg)
 
         # Teams alert
-        if send_teams_alert(comment):
+        teams_ok = send_teams_alert(comment)
+        if teams_ok:
             teams_sent += 1
 
         # Email alert
-        if send_email_alert(comment):
+        email_ok = send_email_alert(comment)
+        if email_ok:
             email_sent += 1
 
+        if teams_ok or email_ok or not (ENABLE_TEAMS_ALERTS or ENABLE_EMAIL_ALERTS):
+            delivered[comment.id] = time.time()
+
     # Summary of notifications sent
     if ENABLE_TEAMS_ALERTS or ENABLE_EMAIL_ALERTS:
         print(f"\n📧 Notification Summary:")
@@ -267,6 +373,95 @@ def send_alerts(comments: List[Dict]) -> None:
             print(f"   Teams alerts: {teams_sent}/{len(comments)} sent")
         if ENABLE_EMAIL_ALERTS:
             print(f"   Email alerts: {email_sent}/{len(comments)} sent")
+    return delivered
+
+def format_spike_alert(spike: Dict) -> str:
+    """
+    Format a volume spike into a console alert message.
+
+    Args:
+        spike: Spike from trends.TrendTracker.detect_spikes
+
+    Returns:
+        Formatted alert string
+    """
+    return (
+        f"📈 SPIKE: {spike['dimension']} '{spike['name']}'\n"
+        f"🕐 {spike['window'].capitalize()} starting {spike['bucket_start']}\n"
+        f"🔢 Matches: {spike['count']} (baseline {spike['baseline_mean']}, threshold {spike['threshold']})\n"
+        + "—" * 60
+    )
+
+def format_spike_teams_message(spike: Dict) -> Dict:
+    """
+    Format a volume spike for Microsoft Teams webhook.
+
+    Args:
+        spike: Spike from trends.TrendTracker.detect_spikes
+
+    Returns:
+        Teams message card dictionary
+    """
+    return {
+        "@type": "MessageCard",
+        "@context": "http://schema.org/extensions",
+        "themeColor": "D70000",
+        "summary": f"Match volume spike: {spike['name']}",
+        "sections": [
+            {
+                "activityTitle": f"📈 Match volume spike for {spike['dimension']} '{spike['name']}'",
+                "activitySubtitle": f"{spike['window'].capitalize()} starting {spike['bucket_start']}",
+                "facts": [
+                    {"name": "Matches", "value": str(spike['count'])},
+                    {"name": "Baseline", "value": str(spike['baseline_mean'])},
+                    {"name": "Threshold", "value": str(spike['threshold'])}
+                ]
+            }
+        ]
+    }
+
+def format_spike_email_message(spike: Dict) -> Dict:
+    """
+    Format a volume spike for email webhook.
+
+    Args:
+        spike: Spike from trends.TrendTracker.detect_spikes
+
+    Returns:
+        Email message dictionary
+    """
+    body = (
+        f"Match volume spike for {spike['dimension']} '{spike['name']}'\n\n"
+        f"{spike['window'].capitalize()} starting {spike['bucket_start']}\n"
+        f"Matches: {spike['count']}\n"
+        f"Baseline mean: {spike['baseline_mean']}\n"
+        f"Threshold: {spike['threshold']}\n\n"
+        f"---\nComment Watcher Alert System"
+    )
+    return {
+        "subject": f"Spike Alert: {spike['name']} - {spike['count']} matches this {spike['window']}",
+        "body": body,
+        "html_body": "<html><body>" + body.replace("\n", "<br>") + "</body></html>"
+    }
+
+def send_spike_alerts(spikes: List[Dict]) -> None:
+    """
+    Send alerts for match volume spikes on every enabled channel.
+
+    Args:
+        spikes: Spikes from trends.TrendTracker.detect_spikes
+    """
+    if not spikes:
+        return
+
+    print(f"📈 {len(spikes)} match volume spikes!")
+    for spike in spikes:
+        send_alert(format_spike_alert(spike))
+        label = f"spike alert for {spike['dimension']} '{spike['name']}'"
+        if ENABLE_TEAMS_ALERTS and TEAMS_WEBHOOK_URL:
+            post_webhook(TEAMS_WEBHOOK_URL, format_spike_teams_message(spike), f"Teams {label}")
+        if ENABLE_EMAIL_ALERTS and EMAIL_WEBHOOK_URL:
+            post_webhook(EMAIL_WEBHOOK_URL, format_spike_email_message(spike), f"Email {label}")
 
 def print_summary(total_checked: int, flagged_count: int) -> None:
     """
@@ -294,17 +489,16 @@ def test_notifications():
     """
     Test function to verify Teams and email notifications work.
     """
-    test_comment = {
-        "id": "TEST-123-456",
-        "keyword": "pesticide",
-        "title": "Test Comment - Pesticide Regulation Review",
-        "date": "2024-01-15",
-        "text_snippet": "This is a test comment about pesticide regulations and their impact on agricultural practices...",
-        "full_text": "This is a test comment about pesticide regulations and their impact on agricultural practices. We need to ensure proper safety measures are in place.",
-        "organization": "Test Organization",
-        "submitter_name": "John Doe",
-        "document_type": "Comment"
-    }
+    test_comment = Comment(
+        id="TEST-123-456",
+        keyword="pesticide",
+        title="Test Comment - Pesticide Regulation Review",
+        date="2024-01-15",
+        full_text="This is a test comment about pesticide regulations and their impact on agricultural practices. We need to ensure proper safety measures are in place.",
+        organization="Test Organization",
+        submitter_name="John Doe",
+        document_type="Comment"
+    )
 
     print("🧪 Testing notification systems...")
     print("=" * 50)
@@ -0,0 +1,137 @@
+"""
+Multi-process keyword filtering for large batches.
+
+Corpus rescans check hundreds of thousands of comment texts, and
+normalization dominates the cost. ParallelFilter spreads that work over a
+process pool: each worker compiles the keyword matcher once when it starts,
+texts are handed out in chunks large enough to amortize pickling, and
+results come back in input order. Small batches are matched in-process,
+where pool overhead would outweigh the gain.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Sequence, Tuple
+from config import (
+    PARALLEL_FILTER_WORKERS,
+    PARALLEL_FILTER_CHUNK_SIZE,
+    PARALLEL_FILTER_MIN_BATCH
+)
+from filter import KeywordMatcher
+from models import CommentRecord
+from normalizer import DOCUMENT_FIELDS, normalize_text
+
+# Chunks per worker when sizing automatically; a few keep the pool balanced
+_CHUNKS_PER_WORKER = 4
+_MAX_CHUNK_SIZE = 1000
+
+# Built once per worker process by _init_worker
+_worker_matcher = None
+
+
+def _init_worker(keyword_list: List[str]) -> None:
+    global _worker_matcher
+    _worker_matcher = KeywordMatcher(keyword_list)
+
+
+def _match_fields(matcher: KeywordMatcher, fields: Sequence[str]) -> Optional[str]:
+    return matcher.match_texts(normalize_text(field).text for field in fields if field)
+
+
+def _worker_match(fields: Sequence[str]) -> Optional[str]:
+    return _match_fields(_worker_matcher, fields)
+
+
+def document_fields(record: CommentRecord) -> Tuple[str, ...]:
+    """Raw searchable field texts of a comment, in DOCUMENT_FIELDS order."""
+    return tuple(record.field(field) for field in DOCUMENT_FIELDS)
+
+
+class ParallelFilter:
+    """
+    Keyword matcher backed by a reusable process pool.
+
+    Use as a context manager so the pool is shut down afterwards:
+
+        with ParallelFilter(KEYWORDS) as engine:
+            flagged = engine.flag(items)
+    """
+
+    def __init__(self, keyword_list: List[str], workers: int = None,
+                 chunksize: int = None, min_batch: int = None):
+        self.keyword_list = list(keyword_list)
+        self.workers = workers or PARALLEL_FILTER_WORKERS or os.cpu_count() or 1
+        self.chunksize = chunksize or PARALLEL_FILTER_CHUNK_SIZE
+        self.min_batch = PARALLEL_FILTER_MIN_BATCH if min_batch is None else min_batch
+        self._matcher = KeywordMatcher(self.keyword_list)
+        self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self) -> None:
+        """Shut down the worker pool, if one was started."""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def _chunk_size(self, batch_size: int) -> int:
+        if self.chunksize:
+            return self.chunksize
+        per_chunk = -(-batch_size // (self.workers * _CHUNKS_PER_WORKER))
+        return max(1, min(per_chunk, _MAX_CHUNK_SIZE))
+
+    def match(self, field_batch: Sequence[Sequence[str]]) -> List[Optional[str]]:
+        """
+        Match a batch of documents given as raw field texts.
+
+        Args:
+            field_batch: One sequence of raw field texts per document
+
+        Returns:
+            Matched keyword (or None) for each document, in input order
+        """
+        if len(field_batch) < self.min_batch:
+            return [_match_fields(self._matcher, fields) for fields in field_batch]
+
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=_init_worker,
+                initargs=(self.keyword_list,)
+            )
+        return list(self._executor.map(_worker_match, field_batch,
+                                       chunksize=self._chunk_size(len(field_batch))))
+
+    def flag(self, items: List[CommentRecord]) -> List[Tuple[str, str]]:
+        """
+        Flag comments like filter.flag_by_keyword, without per-item logging.
+
+        Args:
+            items: Comment metadata or detail records
+
+        Returns:
+            List of (comment_id, matched_keyword) tuples, in input order
+        """
+        matches = self.match([document_fields(item) for item in items])
+        return [(item.id, keyword) for item, keyword in zip(items, matches) if keyword]
+
+
+def parallel_flag(items: List[CommentRecord], keyword_list: List[str],
+                  workers: int = None) -> List[Tuple[str, str]]:
+    """
+    Flag a batch of comments using a one-off process pool.
+
+    Args:
+        items: Comment metadata or detail records
+        keyword_list: Keywords to match, in priority order
+        workers: Worker processes (defaults to config / core count)
+
+    Returns:
+        List of (comment_id, matched_keyword) tuples, in input order
+    """
+    with ParallelFilter(keyword_list, workers=workers) as engine:
+        return engine.flag(items)
@@ -0,0 +1,211 @@
+"""
+Step-by-step profiling for monitoring cycles and maintenance commands.
+
+Code marks its step boundaries with ``profiling.mark("fetch")``. When no
+profiler is running, mark is a single call to a no-op method, so the hooks
+can stay in place in production. When a run is profiled, each step gets
+its own output file in a run directory under PROFILE_DIR:
+
+- ``cprofile``: deterministic call profile per step (``NN_step.prof`` for
+  pstats/snakeviz, plus a ``NN_step.txt`` summary by cumulative time)
+- ``sample``: a low-overhead sampling profiler that records the main
+  thread's call stack every PROFILE_SAMPLE_INTERVAL seconds, written in
+  folded-stack format (``NN_step.folded``) for flame graph tools
+- memory: tracemalloc snapshots at every boundary, written as the
+  allocations that grew during each step (``NN_step.memory.txt``)
+
+``summary.txt`` lists each step's wall time and peak traced memory.
+"""
+
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional
+from config import PROFILE_DIR, PROFILE_SAMPLE_INTERVAL, PROFILE_TOP_N
+
+PROFILE_MODES = ("cprofile", "sample")
+
+
+class NullProfiler:
+    """Profiler used when profiling is off; every hook does nothing."""
+
+    def mark(self, step: str) -> None:
+        pass
+
+    def stop(self) -> Optional[str]:
+        return None
+
+
+class StackSampler(threading.Thread):
+    """Sample one thread's call stack at a fixed interval."""
+
+    def __init__(self, thread_id: int, interval: float):
+        super().__init__(name="profiling-sampler", daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stopped = threading.Event()
+
+    def run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def take(self) -> Counter:
+        """Return the samples collected so far and start a new set."""
+        stacks, self.stacks = self.stacks, Counter()
+        return stacks
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self.join()
+
+
+class StepProfiler:
+    """Profile a run one step at a time, writing each step's results to disk."""
+
+    def __init__(self, label: str, mode: Optional[str] = "cprofile", memory: bool = False,
+                 output_dir: str = None):
+        if mode is not None and mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profile mode {mode!r}; expected one of {PROFILE_MODES}")
+        self.mode = mode
+        self.memory = memory
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.run_dir = os.path.join(output_dir or PROFILE_DIR, f"{stamp}_{label}")
+        os.makedirs(self.run_dir, exist_ok=True)
+
+        self.steps: List[Dict] = []
+        self._step = None
+        self._started = None
+        self._profile = None
+        self._sampler = None
+        self._snapshot = None
+
+        if memory:
+            tracemalloc.start()
+            self._snapshot = tracemalloc.take_snapshot()
+        if mode == "sample":
+            self._sampler = StackSampler(threading.get_ident(), PROFILE_SAMPLE_INTERVAL)
+            self._sampler.start()
+
+    def mark(self, step: str) -> None:
+        """End the current step, if any, and start profiling the next one."""
+        self._finish_step()
+        self._step = step
+        self._started = time.perf_counter()
+        if self.memory:
+            tracemalloc.reset_peak()
+        if self.mode == "cprofile":
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+
+    def stop(self) -> str:
+        """
+        Finish the last step and write the run summary.
+
+        Returns:
+            Directory the profiles were written to
+        """
+        self._finish_step()
+        if self._sampler is not None:
+            self._sampler.stop()
+        if self.memory:
+            tracemalloc.stop()
+
+        with open(os.path.join(self.run_dir, "summary.txt"), "w") as f:
+            f.write(f"{'step':30s} {'seconds':>10s} {'peak MB':>10s}\n")
+            for step in self.steps:
+                peak = f"{step['peak_bytes'] / 1e6:10.1f}" if step['peak_bytes'] is not None else f"{'-':>10s}"
+                f.write(f"{step['name']:30s} {step['seconds']:10.3f} {peak}\n")
+        return self.run_dir
+
+    def _path(self, suffix: str) -> str:
+        return os.path.join(self.run_dir, f"{len(self.steps) + 1:02d}_{self._step}{suffix}")
+
+    def _finish_step(self) -> None:
+        if self._step is None:
+            return
+        seconds = time.perf_counter() - self._started
+
+        if self._profile is not None:
+            self._profile.disable()
+            self._profile.dump_stats(self._path(".prof"))
+            report = io.StringIO()
+            pstats.Stats(self._profile, stream=report).sort_stats("cumulative").print_stats(PROFILE_TOP_N)
+            with open(self._path(".txt"), "w") as f:
+                f.write(report.getvalue())
+            self._profile = None
+
+        if self._sampler is not None:
+            with open(self._path(".folded"), "w") as f:
+                for stack, count in self._sampler.take().most_common():
+                    f.write(f"{stack} {count}\n")
+
+        peak_bytes = None
+        if self.memory:
+            _, peak_bytes = tracemalloc.get_traced_memory()
+            snapshot = tracemalloc.take_snapshot()
+            with open(self._path(".memory.txt"), "w") as f:
+                f.write(f"Peak traced memory: {peak_bytes / 1e6:.1f} MB\n\n")
+                for diff in snapshot.compare_to(self._snapshot, "lineno")[:PROFILE_TOP_N]:
+                    f.write(f"{diff}\n")
+            self._snapshot = snapshot
+
+        self.steps.append({"name": self._step, "seconds": seconds, "peak_bytes": peak_bytes})
+        self._step = None
+
+
+_profiler = NullProfiler()
+
+
+def mark(step: str) -> None:
+    """Mark a step boundary for the active profiler (no-op when off)."""
+    _profiler.mark(step)
+
+
+def start_profiling(label: str, mode: Optional[str] = "cprofile", memory: bool = False,
+                    output_dir: str = None) -> StepProfiler:
+    """
+    Start profiling this process's run.
+
+    Args:
+        label: Name for the run directory (e.g. "cycle", "maintain")
+        mode: "cprofile", "sample", or None for memory only
+        memory: Take tracemalloc snapshots at every step boundary
+        output_dir: Parent directory for run directories (defaults to config)
+
+    Returns:
+        The active StepProfiler
+    """
+    global _profiler
+    _profiler = StepProfiler(label, mode, memory, output_dir)
+    _profiler.mark("start")
+    return _profiler
+
+
+def stop_profiling() -> Optional[str]:
+    """
+    Stop the active profiler, if any, and write its results.
+
+    Returns:
+        Directory the profiles were written to, or None if profiling was off
+    """
+    global _profiler
+    run_dir = _profiler.stop()
+    _profiler = NullProfiler()
+    if run_dir:
+        print(f"🔬 Profiles written to {run_dir}")
+    return run_dir
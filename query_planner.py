@@ -0,0 +1,251 @@
+"""
+Query planner for metadata fetching.
+
+Watch terms that the API's full-text search can evaluate are pushed down
+as ``filter[searchTerm]`` queries, one result stream per term, so the
+download scales with matches rather than with total comment volume. Only
+terms the API can't express fall back to downloading the unfiltered stream
+and matching locally. Streams are merged and deduplicated by comment ID.
+"""
+
+import re
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from config import (
+    SERVER_SIDE_SEARCH,
+    CLIENT_SIDE_TERMS,
+    MAX_PAGES_PER_TERM,
+    SYNC_OVERLAP_HOURS
+)
+from fetcher import fetch_metadata_page
+from models import CommentRecord
+from filter import flag_by_keyword
+from term_index import FUZZY, keyword_mode
+from storage import get_sync_state, set_sync_state, record_corpus_coverage
+
+# Words, spaces and inner hyphens/apostrophes are safe to send as a search phrase
+_SEARCHABLE_RE = re.compile(r"^\w[\w\s'-]*$")
+
+HWM_KEY = "last_modified_hwm"
+
+
+def can_push_down(term: str) -> bool:
+    """Check whether the API's search filter can evaluate a watch term."""
+    # The API's search has no notion of misspellings, so fuzzy terms are matched locally
+    return (SERVER_SIDE_SEARCH and term not in CLIENT_SIDE_TERMS and keyword_mode(term) != FUZZY
+            and bool(_SEARCHABLE_RE.match(term)))
+
+
+def plan_queries(keyword_list: List[str]) -> Dict[str, List[str]]:
+    """
+    Split watch terms into server-side and client-side evaluation.
+
+    Args:
+        keyword_list: Watch terms, in priority order
+
+    Returns:
+        Dictionary with "server" and "client" term lists
+    """
+    plan = {"server": [], "client": []}
+    for term in keyword_list:
+        plan["server" if can_push_down(term) else "client"].append(term)
+    return plan
+
+
+def _search_expression(term: str) -> str:
+    """Quote multi-word terms so the API searches for the phrase."""
+    return f'"{term}"' if " " in term.strip() else term
+
+
+def _since_filter(since: Optional[str]) -> Dict[str, str]:
+    return {"filter[lastModifiedDate][ge]": since} if since else {}
+
+
+def _fetch_stream(filters: Dict[str, str], since: Optional[str],
+                  page_size: int) -> Tuple[List[CommentRecord], bool]:
+    """
+    Page through one filtered result stream.
+
+    Returns:
+        Tuple of (items, whether MAX_PAGES_PER_TERM cut the stream short)
+    """
+    # Without a high-water mark, start from the newest comments
+    sort = "lastModifiedDate" if since else "-lastModifiedDate"
+    items = []
+    for page in range(1, MAX_PAGES_PER_TERM + 1):
+        data, meta = fetch_metadata_page({**filters, **_since_filter(since)}, page, page_size, sort)
+        items.extend(data)
+        if not meta.get("hasNextPage") or not since:
+            return items, False
+    return items, True
+
+
+def _api_timestamp(stamp: str) -> str:
+    """Convert an ISO lastModifiedDate to the API's "YYYY-MM-DD HH:MM:SS" filter format."""
+    return datetime.fromisoformat(stamp.replace("Z", "+00:00")).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _resume_point(stream: List[CommentRecord]) -> Optional[str]:
+    """Newest lastModifiedDate a truncated (oldest-first) stream reached."""
+    stamps = [item.last_modified_date for item in stream if item.last_modified_date]
+    return _api_timestamp(max(stamps)) if stamps else None
+
+
+def resolve_since(since_date: Optional[str]) -> Optional[str]:
+    """
+    Pick the lower lastModifiedDate bound for this cycle.
+
+    An explicit date wins; otherwise the stored high-water mark is used,
+    pulled back by SYNC_OVERLAP_HOURS to absorb clock and timezone skew.
+
+    Args:
+        since_date: Optional explicit date (YYYY-MM-DD)
+
+    Returns:
+        Bound in the API's "YYYY-MM-DD HH:MM:SS" format, or None on first run
+    """
+    if since_date:
+        return since_date
+    hwm = get_sync_state(HWM_KEY)
+    if not hwm:
+        return None
+    bound = datetime.strptime(hwm, "%Y-%m-%d %H:%M:%S") - timedelta(hours=SYNC_OVERLAP_HOURS)
+    return bound.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def fetch_planned(plan: Dict[str, List[str]], since: Optional[str],
+                  page_size: int) -> Tuple[List[CommentRecord], Dict[str, List[str]], Optional[str]]:
+    """
+    Execute a query plan against the API.
+
+    Args:
+        plan: Plan from plan_queries
+        since: Lower lastModifiedDate bound, or None
+        page_size: Comments per page
+
+    Returns:
+        Tuple of (deduplicated metadata in arrival order,
+        {comment_id: server-side terms that matched it},
+        lastModifiedDate the next cycle must resume from because a stream
+        hit MAX_PAGES_PER_TERM, or None if every stream was read to the end)
+    """
+    metadata = {}
+    server_matches = {}
+    resume_points = []
+
+    for term in plan["server"]:
+        stream, truncated = _fetch_stream({"filter[searchTerm]": _search_expression(term)},
+                                          since, page_size)
+        print(f"   🔎 '{term}': {len(stream)} server-side matches"
+              f"{' (page limit reached)' if truncated else ''}")
+        if truncated:
+            resume_points.append(_resume_point(stream))
+        for item in stream:
+            metadata.setdefault(item.id, item)
+            server_matches.setdefault(item.id, []).append(term)
+
+    if plan["client"]:
+        stream, truncated = _fetch_stream({}, since, page_size)
+        print(f"   🌐 Unfiltered stream for client-side terms "
+              f"({', '.join(plan['client'])}): {len(stream)} comments"
+              f"{' (page limit reached)' if truncated else ''}")
+        if truncated:
+            resume_points.append(_resume_point(stream))
+        for item in stream:
+            metadata.setdefault(item.id, item)
+
+    resume_points = [point for point in resume_points if point]
+    return list(metadata.values()), server_matches, min(resume_points) if resume_points else None
+
+
+def merge_matches(plan: Dict[str, List[str]], metadata: List[CommentRecord],
+                  server_matches: Dict[str, List[str]],
+                  keyword_list: List[str]) -> List[Tuple[str, str]]:
+    """
+    Combine server-side and client-side matches into flagged candidates.
+
+    Each comment is attributed to the matching term that comes first in
+    ``keyword_list``, as flag_by_keyword does.
+
+    Args:
+        plan: Plan from plan_queries
+        metadata: Deduplicated metadata from fetch_planned
+        server_matches: Server-side matches from fetch_planned
+        keyword_list: Watch terms, in priority order
+
+    Returns:
+        List of (comment_id, matched_keyword) tuples
+    """
+    client_matches = {}
+    if plan["client"]:
+        client_matches = dict(flag_by_keyword(metadata, plan["client"]))
+
+    rank = {term: index for index, term in enumerate(keyword_list)}
+    flagged = []
+    for item in metadata:
+        terms = list(server_matches.get(item.id, []))
+        if item.id in client_matches:
+            terms.append(client_matches[item.id])
+        if terms:
+            flagged.append((item.id, min(terms, key=lambda t: rank.get(t, len(rank)))))
+
+    return flagged
+
+
+def record_coverage(plan: Dict[str, List[str]], metadata: List[CommentRecord],
+                    since: Optional[str], resume_at: Optional[str]) -> None:
+    """
+    Record which lastModifiedDate range this cycle's downloads cover.
+
+    The corpus only holds every comment of the range when the unfiltered
+    stream ran; otherwise it holds just the matches of the server-side
+    terms, and rescans can't find new keywords there. A first run (no
+    ``since``) reads only the newest page of each stream, so it isn't
+    recorded.
+
+    Args:
+        plan: Plan from plan_queries
+        metadata: Metadata fetched this cycle
+        since: Lower lastModifiedDate bound the streams started from
+        resume_at: Resume point from fetch_planned, if a stream was truncated
+    """
+    stamps = [item.last_modified_date for item in metadata if item.last_modified_date]
+    if not since or not stamps:
+        return
+    start = since if len(since) > 10 else f"{since} 00:00:00"
+    end = resume_at or _api_timestamp(max(stamps))
+    record_corpus_coverage(start, end, [] if plan["client"] else plan["server"])
+
+
+def advance_high_water_mark(metadata: List[CommentRecord],
+                            resume_at: Optional[str] = None) -> Optional[str]:
+    """
+    Record the newest lastModifiedDate seen so the next cycle starts there.
+
+    When a stream was cut short by MAX_PAGES_PER_TERM, the streams that
+    finished may have reached far past it. The mark then advances only far
+    enough that the next cycle's bound (the mark less SYNC_OVERLAP_HOURS)
+    lands on ``resume_at``, so the truncated stream continues where it
+    stopped instead of skipping the comments it didn't reach.
+
+    Args:
+        metadata: Metadata fetched this cycle
+        resume_at: Resume point from fetch_planned, if a stream was truncated
+
+    Returns:
+        The new high-water mark, or None if nothing advanced it
+    """
+    stamps = [item.last_modified_date for item in metadata if item.last_modified_date]
+    if not stamps:
+        return None
+
+    newest = _api_timestamp(max(stamps))
+    if resume_at:
+        resume = datetime.strptime(resume_at, "%Y-%m-%d %H:%M:%S") + timedelta(hours=SYNC_OVERLAP_HOURS)
+        newest = min(newest, resume.strftime("%Y-%m-%d %H:%M:%S"))
+    current = get_sync_state(HWM_KEY)
+    if current and current >= newest:
+        return current
+
+    set_sync_state(HWM_KEY, newest)
+    return newest
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Retroactive keyword matching over the local corpus.
+
+Every comment the watcher fetches is kept, compressed, in the local corpus
+(see storage.save_corpus_records). After KEYWORDS or subscriptions change,
+a rescan runs the current matcher over the corpus in parallel instead of
+spending API quota to download history again. New matches are stored and
+marked as seen without sending live alerts.
+
+Comments only seen as metadata can't be confirmed against their full text
+locally; they are reported, and --confirm fetches their details under the
+shared API quota.
+
+With search pushdown the watcher downloads only comments matching its
+server-side terms, so for those ranges the corpus can't reveal matches of
+new keywords. The rescan prints which lastModifiedDate ranges hold every
+comment and which hold only the matches of earlier terms.
+
+Usage:
+    python rescan.py [--since YYYY-MM-DD] [--keywords a,b] [--confirm] [--workers N]
+"""
+
+import argparse
+from typing import Dict, List, Optional
+from config import KEYWORDS, RESCAN_BATCH_SIZE
+from budget import BudgetExhausted
+from fetcher import fetch_comment_detail
+from filter import KeywordMatcher, recheck_full_text
+from parallel_filter import ParallelFilter
+from scoring import score_comments, update_document_stats
+from clustering import assign_cluster
+from main import process_comment
+from models import Comment, CommentRecord
+from revisions import matched_revision
+from subscriptions import get_index
+from storage_backends import get_backend
+from storage import (
+    iter_corpus,
+    get_corpus_stats,
+    load_corpus_coverage,
+    save_corpus_records,
+    filter_revision_ids,
+    record_revisions,
+    bump_data_version
+)
+
+
+def confirm_match(record: CommentRecord, matcher: KeywordMatcher) -> Optional[Comment]:
+    """Recheck a detail record against its full text and process it."""
+    keyword = recheck_full_text(record, matcher)
+    if not keyword:
+        return None
+    processed_comment = process_comment(record, keyword)
+    assignment = assign_cluster(record, keyword, None)
+    if assignment:
+        processed_comment.cluster_id = assignment["cluster_id"]
+    return processed_comment
+
+
+def store_confirmed(confirmed: List[Comment], records: List[CommentRecord],
+                    keywords: List[str], matcher: KeywordMatcher) -> None:
+    """Score, store and mark confirmed matches as seen, without alerting."""
+    if not confirmed:
+        return
+    update_document_stats(confirmed)
+    score_comments(confirmed, keywords)
+    backend = get_backend()
+    backend.save_flagged_comments(confirmed)
+    for comment in confirmed:
+        backend.mark_as_seen(comment.id)
+    record_revisions([matched_revision(record, matcher) for record in records])
+
+
+def rescan_corpus(keywords: List[str] = None, since: str = None, confirm: bool = False,
+                  workers: int = None, batch_size: int = None) -> Dict:
+    """
+    Match the local corpus against the current watch terms.
+
+    Args:
+        keywords: Watch terms, in priority order (defaults to KEYWORDS plus subscribed terms)
+        since: Only rescan comments posted on or after this date (YYYY-MM-DD)
+        confirm: Fetch details for metadata-only matches (uses API quota)
+        workers: Matcher processes (defaults to config / core count)
+        batch_size: Corpus records matched per batch (defaults to config)
+
+    Returns:
+        Dictionary with counts of scanned, matched, stored and unconfirmed comments
+    """
+    keywords = keywords or get_index().watch_terms(KEYWORDS)
+    batch_size = batch_size or RESCAN_BATCH_SIZE
+    results = {"scanned": 0, "matched": 0, "already_seen": 0, "stored": 0,
+               "not_confirmed": 0, "metadata_only": 0}
+    quota_left = confirm
+    # Full-text confirmations run in this process, with one matcher for the whole rescan
+    matcher = KeywordMatcher(keywords)
+
+    with ParallelFilter(keywords, workers=workers) as engine:
+        for records, has_detail in iter_corpus(batch_size, since):
+            results["scanned"] += len(records)
+            flagged = engine.flag(records)
+            results["matched"] += len(flagged)
+            if not flagged:
+                continue
+
+            flagged_ids = [comment_id for comment_id, _ in flagged]
+            already_seen = get_backend().filter_seen_ids(flagged_ids) | filter_revision_ids(flagged_ids)
+            results["already_seen"] += len(already_seen)
+            by_id = {record.id: (record, detail) for record, detail in zip(records, has_detail)}
+
+            confirmed, confirmed_records = [], []
+            for comment_id, _ in flagged:
+                if comment_id in already_seen:
+                    continue
+                record, detail = by_id[comment_id]
+                if not detail:
+                    if not quota_left:
+                        results["metadata_only"] += 1
+                        continue
+                    try:
+                        record = fetch_comment_detail(comment_id)
+                    except BudgetExhausted as e:
+                        print(f"⏸️  Not confirming further metadata-only matches: {e}")
+                        quota_left = False
+                        results["metadata_only"] += 1
+                        continue
+                    except Exception as e:
+                        print(f"   ❌ Error fetching comment {comment_id}: {e}")
+                        results["metadata_only"] += 1
+                        continue
+                    save_corpus_records([record], has_detail=True)
+
+                processed_comment = confirm_match(record, matcher)
+                if processed_comment:
+                    confirmed.append(processed_comment)
+                    confirmed_records.append(record)
+                else:
+                    results["not_confirmed"] += 1
+
+            store_confirmed(confirmed, confirmed_records, keywords, matcher)
+            results["stored"] += len(confirmed)
+            print(f"   🔁 {results['scanned']} scanned, {results['stored']} new matches stored")
+
+    if results["stored"]:
+        bump_data_version()
+    return results
+
+
+def print_coverage(since: str = None) -> None:
+    """Print which lastModifiedDate ranges the corpus covers, and how completely."""
+    ranges = load_corpus_coverage(since)
+    if not ranges:
+        print("🗺️  No recorded corpus coverage; matches of new keywords may be missing")
+        return
+    print("🗺️  Corpus coverage by lastModifiedDate:")
+    for entry in ranges:
+        scope = f"only matches of {entry['terms']}" if entry["terms"] else "every comment"
+        print(f"   {entry['range_start']} → {entry['range_end']}: {scope}")
+
+
+def main():
+    """Command-line entry point for the rescan."""
+    parser = argparse.ArgumentParser(description="Rescan the local corpus for new keyword matches")
+    parser.add_argument("--since", help="Only comments posted on or after this date (YYYY-MM-DD)")
+    parser.add_argument("--keywords", help="Comma-separated keywords (defaults to config and subscriptions)")
+    parser.add_argument("--confirm", action="store_true",
+                        help="Fetch details for metadata-only matches (uses API quota)")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    keywords = [k.strip() for k in args.keywords.split(",")] if args.keywords else None
+
+    corpus = get_corpus_stats()
+    print(f"📚 Rescanning {corpus['records']} corpus records "
+          f"({corpus['with_detail']} with full text){' since ' + args.since if args.since else ''}")
+    print_coverage(args.since)
+    results = rescan_corpus(keywords, args.since, args.confirm, args.workers)
+
+    print(f"\n🎉 Rescan: {results['stored']} new matches stored without alerts")
+    print(f"📈 Scanned {results['scanned']} | matched {results['matched']} | "
+          f"already seen {results['already_seen']} | not in full text {results['not_confirmed']}")
+    if results["metadata_only"]:
+        print(f"🗂️  {results['metadata_only']} matches have metadata only; "
+              f"rerun with --confirm to fetch their details")
+
+
+if __name__ == "__main__":
+    main()
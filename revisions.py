@@ -0,0 +1,153 @@
+"""
+Revision tracking for comments that were already processed.
+
+Once a comment is in ``seen_ids`` it is never treated as new again, but
+comments do get edited upstream. For every processed comment we keep the
+lastModifiedDate and a content hash of the revision we checked, plus the
+watch terms it matched. When metadata shows a newer lastModifiedDate, the
+comment is flagged for a recheck; the recheck fetches the detail, and:
+
+- an unchanged content hash only advances the recorded revision
+- changed content is re-matched and the stored comment is updated
+- an alert goes out only if the new revision matches a term the previous
+  one did not
+"""
+
+import hashlib
+from typing import Dict, List, Optional, Set, Tuple
+from config import MAX_DETAIL_ATTEMPTS
+from budget import BudgetExhausted
+from fetcher import fetch_comment_detail
+from filter import KeywordMatcher
+from models import Comment, CommentRecord
+from normalizer import normalize_document, normalize_text
+from storage_backends import get_backend
+from storage import (
+    mark_revisions_pending,
+    load_pending_revisions,
+    record_revision_attempt,
+    record_revisions,
+    save_corpus_records
+)
+
+# Fields whose text decides whether a revision changed
+REVISION_FIELDS = ("title", "comment")
+
+
+def content_hash(record: CommentRecord) -> str:
+    """Hash a comment's searchable text in normalized form."""
+    text = "\x1f".join(normalize_text(record.field(field)).text for field in REVISION_FIELDS)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def revision_of(record: CommentRecord, matched_terms: Optional[List[str]],
+                has_detail: bool = True) -> Dict:
+    """
+    Describe the revision of a comment that was just checked.
+
+    Args:
+        record: Comment detail (or metadata) record
+        matched_terms: Watch terms the revision matched
+        has_detail: Whether the record carries the full body to hash
+
+    Returns:
+        Revision dictionary for storage.record_revisions
+    """
+    return {
+        "comment_id": record.id,
+        "last_modified_date": record.last_modified_date or None,
+        "content_hash": content_hash(record) if has_detail else None,
+        "matched_terms": matched_terms
+    }
+
+
+def matched_revision(record: CommentRecord, matcher: KeywordMatcher) -> Dict:
+    """Describe a detail record's revision along with every term it matches."""
+    return revision_of(record, matcher.match_all(normalize_document(record)))
+
+
+def detect_revisions(metadata: List[CommentRecord], seen_ids: Set[str]) -> int:
+    """
+    Flag seen comments whose metadata shows a newer lastModifiedDate.
+
+    Args:
+        metadata: Metadata fetched this cycle
+        seen_ids: Comment IDs already processed
+
+    Returns:
+        Number of comments waiting for a revision recheck
+    """
+    modified = [(item.id, item.last_modified_date) for item in metadata
+                if item.id in seen_ids and item.last_modified_date]
+    return mark_revisions_pending(modified)
+
+
+def recheck_revisions(keyword_list: List[str], process,
+                      limit: int = None) -> Tuple[List[Comment], List[Comment]]:
+    """
+    Re-fetch and re-match comments with pending revisions.
+
+    Args:
+        keyword_list: Watch terms, in priority order
+        process: Function building a Comment from (record, keyword), e.g. main.process_comment
+        limit: Maximum comments to re-fetch this cycle
+
+    Returns:
+        Tuple of (comments whose new revision adds a term, to alert and store;
+        comments whose content changed without new terms, to store only)
+    """
+    pending = load_pending_revisions(limit)
+    if not pending:
+        return [], []
+
+    print(f"\n📝 Rechecking {len(pending)} revised comments...")
+    matcher = KeywordMatcher(keyword_list)
+    # The stored keyword lives with the flagged comment, wherever the backend keeps it
+    flagged_keywords = get_backend().get_flagged_keywords([r["comment_id"] for r in pending])
+
+    alerts, updates, checked = [], [], []
+    for revision in pending:
+        comment_id = revision["comment_id"]
+        flagged_keyword = flagged_keywords.get(comment_id)
+        previous_terms = revision["matched_terms"]
+        if previous_terms is None:
+            # Processed before revisions were tracked: the stored keyword is what it matched
+            previous_terms = [flagged_keyword] if flagged_keyword else []
+        try:
+            record = fetch_comment_detail(comment_id)
+        except BudgetExhausted as e:
+            print(f"   ⏸️  Deferring remaining revision rechecks: {e}")
+            break
+        except Exception as e:
+            print(f"   ❌ Error fetching revised comment {comment_id}: {e}")
+            if not record_revision_attempt(comment_id, MAX_DETAIL_ATTEMPTS):
+                print(f"   🚫 Dropping revision recheck of {comment_id} after {MAX_DETAIL_ATTEMPTS} attempts")
+            continue
+        save_corpus_records([record], has_detail=True)
+
+        checked_revision = matched_revision(record, matcher)
+        # The detail may lag the metadata; the pending change counts as checked either way
+        checked_revision["last_modified_date"] = max(checked_revision["last_modified_date"] or "",
+                                                     revision["pending_modified_date"])
+        checked.append(checked_revision)
+
+        if checked_revision["content_hash"] == revision["content_hash"]:
+            # Only metadata changed; just advance the checked revision
+            print(f"   ⏭️  {comment_id}: modified, text unchanged")
+            continue
+
+        terms = checked_revision["matched_terms"]
+        new_terms = [term for term in terms if term not in previous_terms]
+
+        if new_terms:
+            alerts.append(process(record, new_terms[0]))
+            print(f"   🆕 {comment_id}: revision adds {', '.join(new_terms)}")
+        elif flagged_keyword:
+            # Keep the stored copy current without alerting again
+            updates.append(process(record, flagged_keyword))
+            print(f"   📝 {comment_id}: text changed, no new matches")
+        else:
+            print(f"   📝 {comment_id}: text changed, no matches to store")
+
+    record_revisions(checked)
+    return alerts, updates
@@ -0,0 +1,146 @@
+"""
+Priority scheduling of detail fetches.
+
+Flagged candidates are queued in the database and fetched highest value
+first, so a limited quota or cycle spends its detail requests on the most
+important comments. Candidates that aren't reached stay queued for the next
+cycle.
+"""
+
+import heapq
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Set, Tuple
+from config import (
+    KEYWORD_WEIGHTS,
+    DOCUMENT_TYPE_WEIGHTS,
+    PRIORITY_DOCKETS,
+    PRIORITY_ORGANIZATION_BONUS,
+    PRIORITY_DOCKET_BONUS,
+    PRIORITY_RECENCY_HALF_LIFE_DAYS
+)
+from models import CommentRecord
+from storage import enqueue_detail_candidates, load_detail_queue
+
+
+def docket_from_comment_id(comment_id: str) -> str:
+    """Derive the docket ID from a comment ID (e.g. EPA-HQ-OPP-2020-0001-1234)."""
+    return comment_id.rsplit("-", 1)[0] if "-" in comment_id else ""
+
+
+def _age_days(posted_date: str, now: datetime) -> float:
+    """Age of a comment in days, or None if the date can't be parsed."""
+    if not posted_date:
+        return None
+    try:
+        posted = datetime.fromisoformat(posted_date.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if posted.tzinfo is None:
+        posted = posted.replace(tzinfo=timezone.utc)
+    return max(0.0, (now - posted).total_seconds() / 86400)
+
+
+def candidate_priority(candidate: Dict, now: datetime = None) -> float:
+    """
+    Score a queued candidate from its metadata signals.
+
+    Args:
+        candidate: Queue entry with keyword, docket, date and type fields
+        now: Reference time for recency (defaults to the current time)
+
+    Returns:
+        Priority value; higher is fetched first
+    """
+    if now is None:
+        now = datetime.now(timezone.utc)
+
+    priority = KEYWORD_WEIGHTS.get(candidate["keyword"], 1.0)
+    priority *= DOCUMENT_TYPE_WEIGHTS.get(candidate.get("document_type") or "", 1.0)
+
+    # Recency halves in value every PRIORITY_RECENCY_HALF_LIFE_DAYS
+    age = _age_days(candidate.get("posted_date"), now)
+    recency = 0.0 if age is None else 0.5 ** (age / PRIORITY_RECENCY_HALF_LIFE_DAYS)
+    priority *= 1.0 + recency
+
+    if candidate.get("organization"):
+        priority += PRIORITY_ORGANIZATION_BONUS
+    if candidate.get("docket_id") in PRIORITY_DOCKETS:
+        priority += PRIORITY_DOCKET_BONUS
+
+    return priority
+
+
+def queue_candidates(flagged_ids: List[Tuple[str, str]], metadata_by_id: Dict[str, CommentRecord],
+                     seen_ids: Set[str]) -> int:
+    """
+    Add newly flagged comments to the persistent detail-fetch queue.
+
+    Args:
+        flagged_ids: (comment_id, keyword) tuples from the keyword scan
+        metadata_by_id: Metadata records keyed by comment ID
+        seen_ids: Comment IDs that were already processed
+
+    Returns:
+        Number of candidates queued
+    """
+    candidates = []
+    for comment_id, keyword in flagged_ids:
+        if comment_id in seen_ids:
+            continue
+        item = metadata_by_id.get(comment_id) or CommentRecord(comment_id)
+        candidates.append({
+            "comment_id": comment_id,
+            "keyword": keyword,
+            "docket_id": item.docket_id or docket_from_comment_id(comment_id),
+            "posted_date": item.posted_date,
+            "document_type": item.document_type,
+            "organization": item.organization,
+            "metadata": item.to_json()
+        })
+
+    enqueue_detail_candidates(candidates)
+    return len(candidates)
+
+
+def next_candidates(limit: int = None,
+                    accept: Callable[[str], bool] = None) -> Tuple[List[Dict], int]:
+    """
+    Pick the highest-priority queued candidates for this cycle.
+
+    Args:
+        limit: Maximum candidates to return (None or 0 for all)
+        accept: Only consider comment IDs this returns True for (e.g. a
+            replica's shards; see coordination.Coordinator.owns)
+
+    Returns:
+        Tuple of (queue entries in fetch order, each with its metadata
+        record under "item"; total number of queued candidates)
+    """
+    queue = load_detail_queue()
+    if accept is not None:
+        queue = [candidate for candidate in queue if accept(candidate["comment_id"])]
+    now = datetime.now(timezone.utc)
+    for candidate in queue:
+        candidate["priority"] = candidate_priority(candidate, now)
+
+    if limit:
+        chosen = heapq.nlargest(limit, queue, key=lambda c: c["priority"])
+    else:
+        chosen = sorted(queue, key=lambda c: c["priority"], reverse=True)
+
+    for candidate in chosen:
+        metadata = candidate.pop("metadata")
+        candidate["item"] = (CommentRecord.from_json(metadata) if metadata
+                             else CommentRecord(candidate["comment_id"]))
+    return chosen, len(queue)
+
+
+def log_priorities(candidates: List[Dict], total_queued: int) -> None:
+    """Print the fetch order chosen for this cycle."""
+    print(f"   🗂️  {total_queued} candidates queued, fetching {len(candidates)} by priority")
+    for rank, candidate in enumerate(candidates[:10], 1):
+        print(f"     {rank:2d}. {candidate['comment_id']} "
+              f"[{candidate['keyword']}] priority {candidate['priority']:.2f}")
+    if len(candidates) > 10:
+        print(f"     ... and {len(candidates) - 10} more")
+
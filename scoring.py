@@ -0,0 +1,127 @@
+"""
+Vectorized TF-IDF relevance scoring for batches of comments.
+
+Comments are hashed into sparse term-frequency vectors (unigrams and bigrams
+of the normalized text) and scored against the watch terms in one pass with
+NumPy. Document frequencies are kept in the database and updated
+incrementally with ``update_document_stats`` when comments are stored for
+the first time; rescoring a comment (e.g. after a revision) doesn't count
+it again.
+"""
+
+import zlib
+from typing import List, Tuple
+import numpy as np
+from config import SCORING_HASH_BITS
+from models import Comment, CommentRecord
+from normalizer import normalize_document, normalize_text
+from storage import load_term_stats, update_term_stats
+
+N_FEATURES = 1 << SCORING_HASH_BITS
+
+
+def _hash_features(tokens: List[str]) -> List[int]:
+    """Hash unigrams and bigrams of a token list into feature indices."""
+    mask = N_FEATURES - 1
+    features = [zlib.crc32(token.encode("utf-8")) & mask for token in tokens]
+    features.extend(
+        zlib.crc32(f"{first} {second}".encode("utf-8")) & mask
+        for first, second in zip(tokens, tokens[1:])
+    )
+    return features
+
+
+def _comment_tokens(comment: Comment) -> List[str]:
+    """Tokens of a comment, reusing the shared normalization cache."""
+    # Processed comments map back onto the detail fields they came from
+    record = CommentRecord(comment["id"], title=comment.get("title"), comment=comment.get("full_text"))
+    return normalize_document(record).tokens()
+
+
+def _batch_features(comments: List[Comment]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Unique (row, feature) pairs of a batch and how often each occurs."""
+    rows = []
+    cols = []
+    for row, comment in enumerate(comments):
+        features = _hash_features(_comment_tokens(comment))
+        rows.extend([row] * len(features))
+        cols.extend(features)
+
+    if not cols:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, empty
+    keys = np.array(rows, dtype=np.int64) * N_FEATURES + np.array(cols, dtype=np.int64)
+    keys, counts = np.unique(keys, return_counts=True)
+    return keys // N_FEATURES, keys % N_FEATURES, counts
+
+
+def update_document_stats(comments: List[Comment]) -> None:
+    """
+    Add newly stored comments to the stored document frequencies.
+
+    Call once per comment, when it is first confirmed; comments rescored
+    later (revisions, rescans of seen comments) must not be added again.
+
+    Args:
+        comments: Comments stored for the first time
+    """
+    if not comments:
+        return
+    _, doc_cols, _ = _batch_features(comments)
+    # Each (row, col) pair is unique, so column counts are batch doc frequencies
+    batch_cols, batch_df = np.unique(doc_cols, return_counts=True)
+    update_term_stats(dict(zip(batch_cols.tolist(), batch_df.tolist())), len(comments))
+
+
+def score_comments(comments: List[Comment], keyword_list: List[str]) -> np.ndarray:
+    """
+    Score a batch of comments for relevance to the watch terms.
+
+    The score is the cosine similarity between each comment's TF-IDF vector
+    and the TF-IDF vector of the watch terms, so it falls between 0 and 1.
+    Each comment gets its score stored under ``"score"``.
+
+    Args:
+        comments: Processed comments
+        keyword_list: Watch terms to score against
+
+    Returns:
+        Array of scores in the same order as ``comments``
+    """
+    if not comments:
+        return np.zeros(0)
+
+    doc_rows, doc_cols, counts = _batch_features(comments)
+
+    query_cols = np.unique(np.array(
+        [feature for keyword in keyword_list
+         for feature in _hash_features(normalize_text(keyword).tokens)],
+        dtype=np.int64
+    ))
+
+    batch_size = len(comments)
+    all_cols = np.union1d(np.unique(doc_cols), query_cols)
+
+    total_docs, stored_df = load_term_stats(all_cols.tolist())
+    df = np.array([stored_df.get(int(col), 0) for col in all_cols], dtype=np.float64)
+
+    idf = np.log((1.0 + total_docs) / (1.0 + df)) + 1.0
+
+    weights = (1.0 + np.log(counts)) * idf[np.searchsorted(all_cols, doc_cols)]
+    norms = np.sqrt(np.bincount(doc_rows, weights=weights * weights, minlength=batch_size))
+
+    query_weights = idf[np.searchsorted(all_cols, query_cols)]
+    query_norm = np.sqrt(np.dot(query_weights, query_weights))
+
+    in_query = np.isin(doc_cols, query_cols)
+    matched_weights = query_weights[np.searchsorted(query_cols, doc_cols[in_query])]
+    dots = np.bincount(doc_rows[in_query], weights=weights[in_query] * matched_weights,
+                       minlength=batch_size)
+
+    denominator = norms * query_norm
+    scores = np.divide(dots, denominator, out=np.zeros(batch_size), where=denominator > 0)
+
+    for comment, score in zip(comments, scores):
+        comment["score"] = round(float(score), 4)
+
+    return scores
@@ -1,17 +1,65 @@
 import sqlite3
+import heapq
 import json
-from typing import List, Dict, Set
+import hashlib
+import os
+import time
+import zlib
+from typing import Iterator, List, Dict, Optional, Set, Tuple
 from datetime import datetime
-from config import OUTPUT_FILE, SEEN_IDS_FILE
+from config import OUTPUT_FILE, SEEN_IDS_FILE, ARCHIVE_DIR, CORPUS_ENABLED, CORPUS_COMPRESSION_LEVEL
+from models import Comment, CommentRecord
 
 # SQLite database file
 DB_FILE = "comment_watcher.db"
 
+# Columns returned for flagged comment queries, in row order
+COMMENT_COLUMNS = (
+    'id', 'keyword', 'title', 'date', 'text_snippet', 'full_text',
+    'organization', 'submitter_name', 'document_type', 'docket_id', 'score',
+    'cluster_id', 'created_at'
+)
+
+# Bodies live in comment_bodies; rows from before deduplication keep them inline
+COMMENT_SELECT = '''
+    SELECT f.id, f.keyword, f.title, f.date, f.text_snippet,
+           COALESCE(b.body, f.full_text) AS full_text,
+           f.organization, f.submitter_name, f.document_type, f.docket_id,
+           f.score, f.cluster_id, f.created_at
+    FROM flagged_comments f
+    LEFT JOIN comment_bodies b ON b.body_hash = f.body_hash
+'''
+
+def _row_to_comment(row) -> Dict:
+    """Convert a flagged_comments row into a comment dictionary."""
+    return dict(zip(COMMENT_COLUMNS, row))
+
+def _ensure_column(cursor, table: str, column: str, definition: str) -> None:
+    """Add a column to an existing table if an older schema lacks it."""
+    cursor.execute(f'PRAGMA table_info({table})')
+    if column not in {row[1] for row in cursor.fetchall()}:
+        cursor.execute(f'ALTER TABLE {table} ADD COLUMN {column} {definition}')
+
+# sync_state key bumped whenever a writer commits new results
+DATA_VERSION_KEY = 'data_version'
+
+# Databases already initialized by this process
+_initialized = set()
+
 def init_database():
-    """Initialize the SQLite database with required tables."""
+    """Initialize the SQLite database with required tables (once per process)."""
+    if DB_FILE in _initialized and os.path.exists(DB_FILE):
+        return
+
     conn = sqlite3.connect(DB_FILE)
     cursor = conn.cursor()
 
+    # Only takes effect on a new database; vacuum_database converts older ones
+    cursor.execute('PRAGMA auto_vacuum=INCREMENTAL')
+
+    # WAL lets read-only API connections run alongside the monitoring writer
+    cursor.execute('PRAGMA journal_mode=WAL')
+
     # Create flagged comments table
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS flagged_comments (
@@ -24,9 +72,30 @@ def init_database():
             organization TEXT,
             submitter_name TEXT,
             document_type TEXT,
+            docket_id TEXT,
+            score REAL,
+            cluster_id INTEGER,
+            body_hash TEXT,
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         )
     ''')
+    _ensure_column(cursor, 'flagged_comments', 'score', 'REAL')
+    _ensure_column(cursor, 'flagged_comments', 'cluster_id', 'INTEGER')
+    _ensure_column(cursor, 'flagged_comments', 'body_hash', 'TEXT')
+    _ensure_column(cursor, 'flagged_comments', 'docket_id', 'TEXT')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_flagged_keyword ON flagged_comments (keyword)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_flagged_date ON flagged_comments (date)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_flagged_created_at ON flagged_comments (created_at)')
+
+    # Create content-addressed comment body table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS comment_bodies (
+            body_hash TEXT PRIMARY KEY,
+            body TEXT NOT NULL,
+            ref_count INTEGER NOT NULL DEFAULT 0,
+            size INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
 
     # Create seen IDs table
     cursor.execute('''
@@ -36,16 +105,384 @@ def init_database():
         )
     ''')
 
+    # Create relevance scoring statistics tables
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS term_stats (
+            term_hash INTEGER PRIMARY KEY,
+            doc_freq INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS corpus_stats (
+            name TEXT PRIMARY KEY,
+            value INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+
+    # Create near-duplicate campaign cluster tables
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS campaign_clusters (
+            cluster_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            representative_id TEXT NOT NULL,
+            keyword TEXT,
+            signature BLOB NOT NULL,
+            member_count INTEGER NOT NULL DEFAULT 1,
+            first_seen TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            last_seen TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS cluster_members (
+            comment_id TEXT PRIMARY KEY,
+            cluster_id INTEGER NOT NULL,
+            similarity REAL,
+            detail_skipped INTEGER NOT NULL DEFAULT 0,
+            added_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS lsh_buckets (
+            band INTEGER NOT NULL,
+            bucket TEXT NOT NULL,
+            cluster_id INTEGER NOT NULL,
+            PRIMARY KEY (band, bucket, cluster_id)
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS cluster_fingerprints (
+            fingerprint TEXT PRIMARY KEY,
+            cluster_id INTEGER NOT NULL
+        )
+    ''')
+
+    # Create API quota budget table, shared by every process using this database
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS api_quota (
+            key_id TEXT PRIMARY KEY,
+            hourly_limit INTEGER NOT NULL,
+            remaining INTEGER NOT NULL,
+            window_reset REAL NOT NULL,
+            requests_made INTEGER NOT NULL DEFAULT 0,
+            updated_at REAL
+        )
+    ''')
+
+    # Create detail-fetch queue table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS detail_queue (
+            comment_id TEXT PRIMARY KEY,
+            keyword TEXT NOT NULL,
+            docket_id TEXT,
+            posted_date TEXT,
+            document_type TEXT,
+            organization TEXT,
+            metadata TEXT,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            last_error TEXT,
+            enqueued_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            state TEXT NOT NULL DEFAULT 'pending',
+            started_at REAL,
+            updated_at REAL
+        )
+    ''')
+    _ensure_column(cursor, 'detail_queue', 'state', "TEXT NOT NULL DEFAULT 'pending'")
+    _ensure_column(cursor, 'detail_queue', 'started_at', 'REAL')
+    _ensure_column(cursor, 'detail_queue', 'updated_at', 'REAL')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_detail_queue_state ON detail_queue (state)')
+
+    # Create backfill checkpoint table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS backfill_windows (
+            job_id TEXT NOT NULL,
+            window_start TEXT NOT NULL,
+            window_end TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            last_page INTEGER NOT NULL DEFAULT 0,
+            matched INTEGER NOT NULL DEFAULT 0,
+            error TEXT,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (job_id, window_start, window_end)
+        )
+    ''')
+
+    # Create local corpus of every fetched comment, compressed, for rescans
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS comment_corpus (
+            id TEXT PRIMARY KEY,
+            posted_date TEXT,
+            last_modified_date TEXT,
+            has_detail INTEGER NOT NULL DEFAULT 0,
+            record BLOB NOT NULL,
+            size INTEGER NOT NULL DEFAULT 0,
+            fetched_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    # Create corpus coverage: lastModifiedDate ranges the corpus was fed from,
+    # and the search terms that filtered them ('' for the unfiltered stream)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS corpus_coverage (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            range_start TEXT NOT NULL,
+            range_end TEXT NOT NULL,
+            terms TEXT NOT NULL DEFAULT '',
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    # Create revision tracking table for comments already processed
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS comment_revisions (
+            comment_id TEXT PRIMARY KEY,
+            last_modified_date TEXT,
+            content_hash TEXT,
+            matched_terms TEXT,
+            revision INTEGER NOT NULL DEFAULT 1,
+            pending_modified_date TEXT,
+            checked_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    _ensure_column(cursor, 'comment_revisions', 'attempts', 'INTEGER NOT NULL DEFAULT 0')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_revisions_pending
+        ON comment_revisions (pending_modified_date) WHERE pending_modified_date IS NOT NULL
+    ''')
+
+    # Create docket/document metadata cache used to enrich alerts
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS metadata_cache (
+            kind TEXT NOT NULL,
+            key TEXT NOT NULL,
+            value TEXT,
+            expires_at REAL NOT NULL,
+            fetched_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (kind, key)
+        )
+    ''')
+
+    # Create lease table for coordinating watcher replicas
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS leases (
+            name TEXT PRIMARY KEY,
+            owner TEXT NOT NULL,
+            expires_at REAL NOT NULL,
+            acquired_at REAL NOT NULL,
+            renewed_at REAL NOT NULL
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_leases_owner ON leases (owner)')
+
+    # Create comment timeline table (epoch seconds at each stage, for freshness reporting)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS comment_timeline (
+            comment_id TEXT PRIMARY KEY,
+            posted_at REAL,
+            cycle_started_at REAL,
+            first_seen_at REAL,
+            detail_fetched_at REAL,
+            confirmed_at REAL,
+            alerted_at REAL,
+            stored_at REAL,
+            cycle_id TEXT
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_timeline_first_seen ON comment_timeline (first_seen_at)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_timeline_alerted ON comment_timeline (alerted_at)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_timeline_cycle ON comment_timeline (cycle_id)')
+
+    # Create sync state table (high-water marks and other small markers)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS sync_state (
+            key TEXT PRIMARY KEY,
+            value TEXT,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    _create_statistics_tables(cursor)
+
     conn.commit()
     conn.close()
+    _initialized.add(DB_FILE)
     print(f"🗄️  Database initialized: {DB_FILE}")
 
-def save_flagged_comments(comment_list: List[Dict], file: str = None) -> None:
+def _create_statistics_tables(cursor, with_seen_ids: bool = True) -> None:
+    """
+    Create summary tables and the triggers that keep them current.
+
+    Args:
+        cursor: Cursor on the watcher database or a shard
+        with_seen_ids: Also count seen_ids (shards don't have that table)
+    """
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'stats_totals'")
+    is_new = cursor.fetchone() is None
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS stats_totals (
+            name TEXT PRIMARY KEY,
+            value INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS stats_keyword (
+            keyword TEXT PRIMARY KEY,
+            count INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS stats_daily (
+            day TEXT PRIMARY KEY,
+            count INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS stats_docket (
+            docket_id TEXT PRIMARY KEY,
+            count INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+
+    # Each flagged comment adds (+1) or removes (-1) itself from every summary
+    def bump(sign: str, row: str) -> str:
+        return f'''
+            INSERT INTO stats_totals (name, value) VALUES ('flagged_comments', {sign}1)
+                ON CONFLICT(name) DO UPDATE SET value = value {sign} 1;
+            INSERT INTO stats_keyword (keyword, count) VALUES ({row}.keyword, {sign}1)
+                ON CONFLICT(keyword) DO UPDATE SET count = count {sign} 1;
+            INSERT INTO stats_daily (day, count) VALUES (date({row}.created_at), {sign}1)
+                ON CONFLICT(day) DO UPDATE SET count = count {sign} 1;
+            INSERT INTO stats_docket (docket_id, count) VALUES (COALESCE({row}.docket_id, ''), {sign}1)
+                ON CONFLICT(docket_id) DO UPDATE SET count = count {sign} 1;
+        '''
+
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS stats_flagged_insert AFTER INSERT ON flagged_comments
+        BEGIN {bump('+', 'NEW')} END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS stats_flagged_delete AFTER DELETE ON flagged_comments
+        BEGIN {bump('-', 'OLD')} END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS stats_flagged_update
+        AFTER UPDATE OF keyword, docket_id, created_at ON flagged_comments
+        BEGIN {bump('-', 'OLD')} {bump('+', 'NEW')} END
+    ''')
+    if with_seen_ids:
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS stats_seen_insert AFTER INSERT ON seen_ids
+            BEGIN
+                INSERT INTO stats_totals (name, value) VALUES ('seen_ids', 1)
+                    ON CONFLICT(name) DO UPDATE SET value = value + 1;
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS stats_seen_delete AFTER DELETE ON seen_ids
+            BEGIN
+                INSERT INTO stats_totals (name, value) VALUES ('seen_ids', -1)
+                    ON CONFLICT(name) DO UPDATE SET value = value - 1;
+            END
+        ''')
+
+    # Databases that predate the summary tables need one full count
+    if is_new:
+        _rebuild_statistics(cursor, with_seen_ids)
+
+def _rebuild_statistics(cursor, with_seen_ids: bool = True) -> None:
+    """Recompute every summary table from the base tables."""
+    cursor.execute('DELETE FROM stats_totals')
+    cursor.execute('DELETE FROM stats_keyword')
+    cursor.execute('DELETE FROM stats_daily')
+    cursor.execute('DELETE FROM stats_docket')
+
+    cursor.execute('''
+        INSERT INTO stats_totals (name, value)
+        SELECT 'flagged_comments', COUNT(*) FROM flagged_comments
+    ''')
+    if with_seen_ids:
+        cursor.execute('''
+            INSERT INTO stats_totals (name, value)
+            SELECT 'seen_ids', COUNT(*) FROM seen_ids
+        ''')
+    cursor.execute('''
+        INSERT INTO stats_keyword (keyword, count)
+        SELECT keyword, COUNT(*) FROM flagged_comments GROUP BY keyword
+    ''')
+    cursor.execute('''
+        INSERT INTO stats_daily (day, count)
+        SELECT date(created_at), COUNT(*) FROM flagged_comments GROUP BY date(created_at)
+    ''')
+    cursor.execute('''
+        INSERT INTO stats_docket (docket_id, count)
+        SELECT COALESCE(docket_id, ''), COUNT(*) FROM flagged_comments GROUP BY COALESCE(docket_id, '')
+    ''')
+
+def rebuild_statistics() -> Dict:
+    """
+    Rebuild the summary statistics tables to fix any drift.
+
+    Returns:
+        The statistics after rebuilding
+    """
+    init_database()
+    conn = sqlite3.connect(DB_FILE)
+    cursor = conn.cursor()
+
+    _rebuild_statistics(cursor)
+
+    conn.commit()
+    conn.close()
+
+    print("🔄 Statistics rebuilt")
+    return get_statistics()
+
+def body_hash(body: str) -> str:
+    """
+    Compute the content address of a comment body.
+
+    The raw text is hashed, so only byte-identical bodies share a stored
+    copy and every comment reads back exactly the text it was saved with.
+    Near-duplicates that differ in markup, case or whitespace are grouped
+    by clustering and revisions.content_hash instead.
+
+    Args:
+        body: Raw comment body
+
+    Returns:
+        Hex SHA-256 digest of the body
+    """
+    return hashlib.sha256(body.encode("utf-8")).hexdigest()
+
+def _store_body(cursor, body: str) -> str:
+    """Store a body once, bumping its reference count, and return its hash."""
+    digest = body_hash(body)
+    cursor.execute('''
+        INSERT INTO comment_bodies (body_hash, body, ref_count, size)
+        VALUES (?, ?, 1, ?)
+        ON CONFLICT(body_hash) DO UPDATE SET ref_count = ref_count + 1
+    ''', (digest, body, len(body.encode("utf-8"))))
+    return digest
+
+def _release_body(cursor, digest: str) -> None:
+    """Drop one reference to a stored body, deleting it when unused."""
+    cursor.execute(
+        'UPDATE comment_bodies SET ref_count = ref_count - 1 WHERE body_hash = ?',
+        (digest,)
+    )
+    cursor.execute(
+        'DELETE FROM comment_bodies WHERE body_hash = ? AND ref_count <= 0',
+        (digest,)
+    )
+
+def save_flagged_comments(comment_list: List[Comment], file: str = None) -> None:
     """
     Save flagged comments to SQLite database.
 
+    Comment bodies are stored once per distinct raw text in
+    ``comment_bodies`` (see body_hash); each row only keeps the body's hash.
+
     Args:
-        comment_list: List of flagged comment dictionaries
+        comment_list: Flagged comments
         file: Ignored for SQLite (kept for compatibility)
     """
     if not comment_list:
@@ -58,20 +495,50 @@ def save_flagged_comments(comment_list: List[Dict], file: str = None) -> None:
     saved_count = 0
     for comment in comment_list:
         try:
+            cursor.execute('SELECT body_hash FROM flagged_comments WHERE id = ?', (comment['id'],))
+            existing = cursor.fetchone()
+            old_hash = existing[0] if existing else None
+
+            full_text = comment.get('full_text', '') or ''
+            new_hash = body_hash(full_text) if full_text else None
+            if new_hash != old_hash:
+                if old_hash:
+                    _release_body(cursor, old_hash)
+                if full_text:
+                    _store_body(cursor, full_text)
+
+            # Upsert rather than REPLACE so the statistics triggers see an update
             cursor.execute('''
-                INSERT OR REPLACE INTO flagged_comments
-                (id, keyword, title, date, text_snippet, full_text, organization, submitter_name, document_type)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                INSERT INTO flagged_comments
+                (id, keyword, title, date, text_snippet, full_text, organization, submitter_name, document_type, docket_id, score, cluster_id, body_hash)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(id) DO UPDATE SET
+                    keyword = excluded.keyword,
+                    title = excluded.title,
+                    date = excluded.date,
+                    text_snippet = excluded.text_snippet,
+                    full_text = excluded.full_text,
+                    organization = excluded.organization,
+                    submitter_name = excluded.submitter_name,
+                    document_type = excluded.document_type,
+                    docket_id = excluded.docket_id,
+                    score = excluded.score,
+                    cluster_id = COALESCE(excluded.cluster_id, flagged_comments.cluster_id),
+                    body_hash = excluded.body_hash
             ''', (
                 comment['id'],
                 comment['keyword'],
                 comment['title'],
                 comment['date'],
                 comment['text_snippet'],
-                comment.get('full_text', ''),
+                None if new_hash else full_text,
                 comment.get('organization', ''),
                 comment.get('submitter_name', ''),
-                comment.get('document_type', '')
+                comment.get('document_type', ''),
+                comment.get('docket_id', ''),
+                comment.get('score'),
+                comment.get('cluster_id'),
+                new_hash
             ))
             saved_count += 1
         except sqlite3.Error as e:
@@ -82,6 +549,66 @@ def save_flagged_comments(comment_list: List[Dict], file: str = None) -> None:
 
     print(f"✅ Saved {saved_count} flagged comments to database")
 
+def deduplicate_bodies() -> Dict:
+    """
+    Migrate inline comment bodies into content-addressed storage.
+
+    Moves every ``full_text`` still stored inline into ``comment_bodies``,
+    recomputes reference counts, and vacuums the database file.
+
+    Returns:
+        Dictionary describing the rows migrated and space saved
+    """
+    init_database()
+    size_before = os.path.getsize(DB_FILE)
+    conn = sqlite3.connect(DB_FILE)
+    cursor = conn.cursor()
+
+    cursor.execute('''
+        SELECT COALESCE(SUM(length(CAST(full_text AS BLOB))), 0)
+        FROM flagged_comments
+        WHERE body_hash IS NULL AND full_text IS NOT NULL AND full_text != ''
+    ''')
+    inline_bytes = cursor.fetchone()[0]
+    cursor.execute('SELECT COALESCE(SUM(size), 0) FROM comment_bodies')
+    stored_bytes_before = cursor.fetchone()[0]
+
+    cursor.execute('''
+        SELECT id, full_text FROM flagged_comments
+        WHERE body_hash IS NULL AND full_text IS NOT NULL AND full_text != ''
+    ''')
+    rows = cursor.fetchall()
+    for comment_id, full_text in rows:
+        digest = _store_body(cursor, full_text)
+        cursor.execute(
+            'UPDATE flagged_comments SET body_hash = ?, full_text = NULL WHERE id = ?',
+            (digest, comment_id)
+        )
+
+    # Rebuild reference counts so they are exact after the migration
+    cursor.execute('''
+        UPDATE comment_bodies SET ref_count = (
+            SELECT COUNT(*) FROM flagged_comments f WHERE f.body_hash = comment_bodies.body_hash
+        )
+    ''')
+    cursor.execute('DELETE FROM comment_bodies WHERE ref_count <= 0')
+    cursor.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM comment_bodies')
+    unique_bodies, stored_bytes_after = cursor.fetchone()
+
+    conn.commit()
+    cursor.execute('VACUUM')
+    conn.close()
+    size_after = os.path.getsize(DB_FILE)
+
+    return {
+        'rows_migrated': len(rows),
+        'unique_bodies': unique_bodies,
+        'body_bytes_before': inline_bytes + stored_bytes_before,
+        'body_bytes_after': stored_bytes_after,
+        'file_bytes_before': size_before,
+        'file_bytes_after': size_after
+    }
+
 def load_flagged_comments(file: str = None) -> List[Dict]:
     """
     Load existing flagged comments from SQLite database.
@@ -96,214 +623,1657 @@ def load_flagged_comments(file: str = None) -> List[Dict]:
     conn = sqlite3.connect(DB_FILE)
     cursor = conn.cursor()
 
-    cursor.execute('''
-        SELECT id, keyword, title, date, text_snippet, full_text,
-               organization, submitter_name, document_type, created_at
-        FROM flagged_comments
+    cursor.execute(f'''
+        {COMMENT_SELECT}
         ORDER BY created_at DESC
     ''')
 
     rows = cursor.fetchall()
     conn.close()
 
-    comments = []
-    for row in rows:
-        comments.append({
-            'id': row[0],
-            'keyword': row[1],
-            'title': row[2],
-            'date': row[3],
-            'text_snippet': row[4],
-            'full_text': row[5],
-            'organization': row[6],
-            'submitter_name': row[7],
-            'document_type': row[8],
-            'created_at': row[9]
-        })
-
-    return comments
+    return [_row_to_comment(row) for row in rows]
 
-def load_seen_ids(file: str = None) -> Set[str]:
+def load_term_stats(term_hashes: List[int]) -> Tuple[int, Dict[int, int]]:
     """
-    Load previously seen comment IDs from SQLite database.
+    Load document frequencies for a set of hashed terms.
 
     Args:
-        file: Ignored for SQLite (kept for compatibility)
+        term_hashes: Hashed term feature indices to look up
 
     Returns:
-        Set of previously seen comment IDs
+        Tuple of (total scored documents, {term_hash: doc_freq})
     """
     init_database()
     conn = sqlite3.connect(DB_FILE)
     cursor = conn.cursor()
 
-    cursor.execute('SELECT comment_id FROM seen_ids')
-    rows = cursor.fetchall()
+    cursor.execute("SELECT value FROM corpus_stats WHERE name = 'documents'")
+    row = cursor.fetchone()
+    total_docs = row[0] if row else 0
+
+    doc_freqs = {}
+    # Stay well under SQLite's bound-parameter limit
+    for start in range(0, len(term_hashes), 500):
+        chunk = term_hashes[start:start + 500]
+        cursor.execute(
+            f'SELECT term_hash, doc_freq FROM term_stats WHERE term_hash IN ({",".join("?" * len(chunk))})',
+            chunk
+        )
+        doc_freqs.update(cursor.fetchall())
+
     conn.close()
 
-    return {row[0] for row in rows}
+    return total_docs, doc_freqs
 
-def mark_as_seen(comment_id: str, file: str = None) -> None:
+def update_term_stats(doc_freq_increments: Dict[int, int], new_documents: int) -> None:
     """
-    Mark a comment ID as seen in SQLite database.
+    Incrementally add a scored batch to the document frequency statistics.
 
     Args:
-        comment_id: The comment ID to mark as seen
-        file: Ignored for SQLite (kept for compatibility)
+        doc_freq_increments: Number of new documents containing each hashed term
+        new_documents: Number of documents in the batch
     """
     init_database()
     conn = sqlite3.connect(DB_FILE)
     cursor = conn.cursor()
 
-    try:
-        cursor.execute('''
-            INSERT OR REPLACE INTO seen_ids (comment_id, seen_at)
-            VALUES (?, CURRENT_TIMESTAMP)
-        ''', (comment_id,))
-        conn.commit()
-    except sqlite3.Error as e:
-        print(f"❌ Error marking comment {comment_id} as seen: {e}")
-    finally:
-        conn.close()
+    cursor.executemany('''
+        INSERT INTO term_stats (term_hash, doc_freq) VALUES (?, ?)
+        ON CONFLICT(term_hash) DO UPDATE SET doc_freq = doc_freq + excluded.doc_freq
+    ''', doc_freq_increments.items())
+    cursor.execute('''
+        INSERT INTO corpus_stats (name, value) VALUES ('documents', ?)
+        ON CONFLICT(name) DO UPDATE SET value = value + excluded.value
+    ''', (new_documents,))
 
-def get_unique_comments(file: str = None) -> List[Dict]:
+    conn.commit()
+    conn.close()
+
+def find_cluster_candidates(band_keys: List[Tuple[int, str]]) -> List[Tuple[int, bytes]]:
     """
-    Load and return unique comments from SQLite database.
+    Find campaign clusters sharing at least one LSH bucket with a signature.
 
     Args:
-        file: Ignored for SQLite (kept for compatibility)
+        band_keys: (band, bucket) keys of the signature being assigned
 
     Returns:
-        List of unique flagged comment dictionaries
+        List of (cluster_id, representative signature) tuples
     """
-    return load_flagged_comments()
+    if not band_keys:
+        return []
 
-def get_comments_by_keyword(keyword: str) -> List[Dict]:
+    init_database()
+    conn = sqlite3.connect(DB_FILE)
+    cursor = conn.cursor()
+
+    clauses = " OR ".join(["(b.band = ? AND b.bucket = ?)"] * len(band_keys))
+    params = [value for key in band_keys for value in key]
+    cursor.execute(f'''
+        SELECT DISTINCT c.cluster_id, c.signature
+        FROM lsh_buckets b
+        JOIN campaign_clusters c ON c.cluster_id = b.cluster_id
+        WHERE {clauses}
+    ''', params)
+    candidates = cursor.fetchall()
+    conn.close()
+
+    return candidates
+
+def create_cluster(representative_id: str, keyword: str, signature: bytes,
+                   band_keys: List[Tuple[int, str]], fingerprint: str = None) -> int:
     """
-    Get all comments that match a specific keyword.
+    Create a new campaign cluster with its first member.
 
     Args:
-        keyword: The keyword to search for
+        representative_id: Comment ID that starts the cluster
+        keyword: Keyword the representative matched
+        signature: Packed MinHash signature of the representative
+        band_keys: LSH (band, bucket) keys to index the cluster under
+        fingerprint: Optional metadata fingerprint of the representative
 
     Returns:
-        List of matching comment dictionaries
+        The new cluster ID
     """
     init_database()
     conn = sqlite3.connect(DB_FILE)
     cursor = conn.cursor()
 
     cursor.execute('''
-        SELECT id, keyword, title, date, text_snippet, full_text,
-               organization, submitter_name, document_type, created_at
-        FROM flagged_comments
-        WHERE keyword = ?
-        ORDER BY created_at DESC
-    ''', (keyword,))
+        INSERT INTO campaign_clusters (representative_id, keyword, signature)
+        VALUES (?, ?, ?)
+    ''', (representative_id, keyword, signature))
+    cluster_id = cursor.lastrowid
 
-    rows = cursor.fetchall()
-    conn.close()
+    cursor.executemany(
+        'INSERT OR IGNORE INTO lsh_buckets (band, bucket, cluster_id) VALUES (?, ?, ?)',
+        [(band, bucket, cluster_id) for band, bucket in band_keys]
+    )
+    cursor.execute('''
+        INSERT OR REPLACE INTO cluster_members (comment_id, cluster_id, similarity)
+        VALUES (?, ?, 1.0)
+    ''', (representative_id, cluster_id))
+    if fingerprint:
+        cursor.execute(
+            'INSERT OR IGNORE INTO cluster_fingerprints (fingerprint, cluster_id) VALUES (?, ?)',
+            (fingerprint, cluster_id)
+        )
 
-    comments = []
-    for row in rows:
-        comments.append({
-            'id': row[0],
-            'keyword': row[1],
-            'title': row[2],
-            'date': row[3],
-            'text_snippet': row[4],
-            'full_text': row[5],
-            'organization': row[6],
-            'submitter_name': row[7],
-            'document_type': row[8],
-            'created_at': row[9]
-        })
+    conn.commit()
+    conn.close()
 
-    return comments
+    return cluster_id
 
-def get_comments_by_date_range(start_date: str, end_date: str) -> List[Dict]:
+def add_cluster_member(cluster_id: int, comment_id: str, similarity: float,
+                       fingerprint: str = None, detail_skipped: bool = False) -> int:
     """
-    Get comments within a date range.
+    Add a comment to an existing campaign cluster.
 
     Args:
-        start_date: Start date (YYYY-MM-DD format)
-        end_date: End date (YYYY-MM-DD format)
+        cluster_id: Cluster to join
+        comment_id: Comment joining the cluster
+        similarity: Estimated similarity to the representative
+        fingerprint: Optional metadata fingerprint to associate with the cluster
+        detail_skipped: True if the comment joined without a detail fetch
 
     Returns:
-        List of comment dictionaries in date range
+        The cluster's running member count
     """
     init_database()
     conn = sqlite3.connect(DB_FILE)
     cursor = conn.cursor()
 
     cursor.execute('''
-        SELECT id, keyword, title, date, text_snippet, full_text,
-               organization, submitter_name, document_type, created_at
-        FROM flagged_comments
-        WHERE date >= ? AND date <= ?
-        ORDER BY date DESC
-    ''', (start_date, end_date))
+        INSERT OR IGNORE INTO cluster_members (comment_id, cluster_id, similarity, detail_skipped)
+        VALUES (?, ?, ?, ?)
+    ''', (comment_id, cluster_id, similarity, int(detail_skipped)))
+    if cursor.rowcount:
+        cursor.execute('''
+            UPDATE campaign_clusters
+            SET member_count = member_count + 1, last_seen = CURRENT_TIMESTAMP
+            WHERE cluster_id = ?
+        ''', (cluster_id,))
+    if fingerprint:
+        cursor.execute(
+            'INSERT OR IGNORE INTO cluster_fingerprints (fingerprint, cluster_id) VALUES (?, ?)',
+            (fingerprint, cluster_id)
+        )
 
-    rows = cursor.fetchall()
-    conn.close()
+    cursor.execute('SELECT member_count FROM campaign_clusters WHERE cluster_id = ?', (cluster_id,))
+    member_count = cursor.fetchone()[0]
 
-    comments = []
-    for row in rows:
-        comments.append({
-            'id': row[0],
-            'keyword': row[1],
-            'title': row[2],
-            'date': row[3],
-            'text_snippet': row[4],
-            'full_text': row[5],
-            'organization': row[6],
-            'submitter_name': row[7],
-            'document_type': row[8],
-            'created_at': row[9]
-        })
+    conn.commit()
+    conn.close()
 
-    return comments
+    return member_count
 
-def get_statistics() -> Dict:
+def get_cluster_by_fingerprint(fingerprint: str) -> Dict:
     """
-    Get database statistics.
+    Look up the campaign cluster associated with a metadata fingerprint.
+
+    Args:
+        fingerprint: Metadata fingerprint
 
     Returns:
-        Dictionary with statistics
+        Cluster dictionary, or None if the fingerprint is unknown
     """
     init_database()
     conn = sqlite3.connect(DB_FILE)
     cursor = conn.cursor()
 
-    # Total flagged comments
-    cursor.execute('SELECT COUNT(*) FROM flagged_comments')
-    total_comments = cursor.fetchone()[0]
-
-    # Total seen IDs
-    cursor.execute('SELECT COUNT(*) FROM seen_ids')
-    total_seen = cursor.fetchone()[0]
-
-    # Comments by keyword
     cursor.execute('''
-        SELECT keyword, COUNT(*)
-        FROM flagged_comments
-        GROUP BY keyword
-    ''')
-    keyword_counts = dict(cursor.fetchall())
+        SELECT c.cluster_id, c.representative_id, c.keyword, c.member_count
+        FROM cluster_fingerprints f
+        JOIN campaign_clusters c ON c.cluster_id = f.cluster_id
+        WHERE f.fingerprint = ?
+    ''', (fingerprint,))
+    row = cursor.fetchone()
+    conn.close()
 
-    # Recent activity (last 7 days)
-    cursor.execute('''
-        SELECT COUNT(*)
-        FROM flagged_comments
-        WHERE created_at >= datetime('now', '-7 days')
+    if row is None:
+        return None
+    return {
+        'cluster_id': row[0],
+        'representative_id': row[1],
+        'keyword': row[2],
+        'member_count': row[3]
+    }
+
+def reserve_api_request(key_id: str, default_limit: int, headroom: int = 0,
+                        window_seconds: int = 3600) -> Tuple[bool, float]:
+    """
+    Atomically reserve one request from the shared API quota.
+
+    The reservation runs in an immediate transaction, so concurrent
+    processes sharing the database never hand out the same request twice.
+
+    Args:
+        key_id: Identifier of the API key (never the key itself)
+        default_limit: Hourly limit to assume until a response reports one
+        headroom: Requests that must stay unreserved after this one
+        window_seconds: Length of the quota window
+
+    Returns:
+        Tuple of (granted, seconds until the window resets)
+    """
+    init_database()
+    conn = sqlite3.connect(DB_FILE, timeout=30, isolation_level=None)
+    cursor = conn.cursor()
+    now = time.time()
+
+    try:
+        cursor.execute('BEGIN IMMEDIATE')
+        cursor.execute(
+            'SELECT hourly_limit, remaining, window_reset FROM api_quota WHERE key_id = ?',
+            (key_id,)
+        )
+        row = cursor.fetchone()
+        if row is None:
+            limit, remaining, window_reset = default_limit, default_limit, now + window_seconds
+        else:
+            limit, remaining, window_reset = row
+            if now >= window_reset:
+                remaining, window_reset = limit, now + window_seconds
+
+        granted = remaining > headroom
+        if granted:
+            remaining -= 1
+
+        cursor.execute('''
+            INSERT INTO api_quota (key_id, hourly_limit, remaining, window_reset, requests_made, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT(key_id) DO UPDATE SET
+                remaining = excluded.remaining,
+                window_reset = excluded.window_reset,
+                requests_made = requests_made + excluded.requests_made,
+                updated_at = excluded.updated_at
+        ''', (key_id, limit, remaining, window_reset, int(granted), now))
+        cursor.execute('COMMIT')
+    except sqlite3.Error:
+        if conn.in_transaction:
+            cursor.execute('ROLLBACK')
+        raise
+    finally:
+        conn.close()
+
+    return granted, max(0.0, window_reset - now)
+
+def update_api_quota(key_id: str, limit: int = None, remaining: int = None,
+                     reset_in: float = None, window_seconds: int = 3600) -> None:
+    """
+    Record quota information reported by the API.
+
+    Args:
+        key_id: Identifier of the API key
+        limit: Hourly limit from the response headers, if present
+        remaining: Remaining requests from the response headers, if present
+        reset_in: Seconds until requests become available again (e.g. after a 429)
+        window_seconds: Length of the quota window
+    """
+    init_database()
+    conn = sqlite3.connect(DB_FILE, timeout=30)
+    cursor = conn.cursor()
+    now = time.time()
+
+    cursor.execute('''
+        INSERT OR IGNORE INTO api_quota (key_id, hourly_limit, remaining, window_reset, updated_at)
+        VALUES (?, ?, ?, ?, ?)
+    ''', (key_id, limit or 0, remaining or 0, now + window_seconds, now))
+    if limit is not None:
+        cursor.execute('UPDATE api_quota SET hourly_limit = ? WHERE key_id = ?', (limit, key_id))
+    if remaining is not None:
+        cursor.execute('UPDATE api_quota SET remaining = ?, updated_at = ? WHERE key_id = ?',
+                       (remaining, now, key_id))
+    if reset_in is not None:
+        cursor.execute('UPDATE api_quota SET window_reset = ?, updated_at = ? WHERE key_id = ?',
+                       (now + reset_in, now, key_id))
+
+    conn.commit()
+    conn.close()
+
+def get_api_quota(key_id: str) -> Dict:
+    """
+    Get the stored quota state for an API key.
+
+    Args:
+        key_id: Identifier of the API key
+
+    Returns:
+        Quota dictionary, or None if no requests have been recorded
+    """
+    init_database()
+    conn = sqlite3.connect(DB_FILE)
+    cursor = conn.cursor()
+
+    cursor.execute('''
+        SELECT hourly_limit, remaining, window_reset, requests_made, updated_at
+        FROM api_quota WHERE key_id = ?
+    ''', (key_id,))
+    row = cursor.fetchone()
+    conn.close()
+
+    if row is None:
+        return None
+    return {
+        'hourly_limit': row[0],
+        'remaining': row[1],
+        'window_reset': row[2],
+        'requests_made': row[3],
+        'updated_at': row[4]
+    }
+
+def enqueue_detail_candidates(candidates: List[Dict]) -> None:
+    """
+    Add flagged candidates to the detail-fetch queue as pending.
+
+    Pending candidates already queued keep their attempt count; their
+    metadata is refreshed from the latest scan. A rejected candidate whose
+    lastModifiedDate is newer than the one it was rejected with was edited
+    upstream, so it is re-opened as pending with a fresh attempt count.
+    Candidates being fetched or confirmed are left as they are.
+
+    Args:
+        candidates: Queue entries (comment_id, keyword, docket_id, posted_date,
+            document_type, organization, metadata)
+    """
+    if not candidates:
+        return
+
+    init_database()
+    conn = sqlite3.connect(DB_FILE)
+    cursor = conn.cursor()
+
+    # The queued metadata is the record's to_json(), which carries lastModifiedDate
+    cursor.executemany('''
+        INSERT INTO detail_queue
+        (comment_id, keyword, docket_id, posted_date, document_type, organization, metadata)
+        VALUES (:comment_id, :keyword, :docket_id, :posted_date, :document_type, :organization, :metadata)
+        ON CONFLICT(comment_id) DO UPDATE SET
+            keyword = excluded.keyword,
+            docket_id = excluded.docket_id,
+            posted_date = excluded.posted_date,
+            document_type = excluded.document_type,
+            organization = excluded.organization,
+            metadata = excluded.metadata,
+            state = 'pending',
+            attempts = CASE WHEN detail_queue.state = 'rejected' THEN 0 ELSE detail_queue.attempts END,
+            last_error = CASE WHEN detail_queue.state = 'rejected' THEN NULL ELSE detail_queue.last_error END
+        WHERE detail_queue.state = 'pending'
+           OR (detail_queue.state = 'rejected'
+               AND json_extract(excluded.metadata, '$.attributes.lastModifiedDate')
+                   > COALESCE(json_extract(detail_queue.metadata, '$.attributes.lastModifiedDate'), ''))
+    ''', candidates)
+
+    conn.commit()
+    conn.close()
+
+def load_detail_queue() -> List[Dict]:
+    """
+    Load every pending detail-fetch candidate.
+
+    Returns:
+        List of queue entry dictionaries
+    """
+    init_database()
+    conn = sqlite3.connect(DB_FILE)
+    cursor = conn.cursor()
+
+    cursor.execute('''
+        SELECT comment_id, keyword, docket_id, posted_date, document_type,
+               organization, metadata, attempts, enqueued_at
+        FROM detail_queue
+        WHERE state = 'pending'
+    ''')
+    columns = [description[0] for description in cursor.description]
+    rows = cursor.fetchall()
+    conn.close()
+
+    return [dict(zip(columns, row)) for row in rows]
+
+def start_detail_fetch(comment_id: str) -> bool:
+    """
+    Move a pending candidate to the fetching state.
+
+    Args:
+        comment_id: The comment ID about to be fetched
+
+    Returns:
+        False if the candidate is no longer pending
+    """
+    init_database()
+    conn = sqlite3.connect(DB_FILE, timeout=30)
+    cursor = conn.cursor()
+    now = time.time()
+
+    cursor.execute('''
+        UPDATE detail_queue SET state = 'fetching', started_at = ?, updated_at = ?
+        WHERE comment_id = ? AND state = 'pending'
+    ''', (now, now, comment_id))
+    started = cursor.rowcount > 0
+
+    conn.commit()
+    conn.close()
+    return started
+
+def finish_detail_fetch(comment_id: str, confirmed: bool) -> None:
+    """
+    Record the outcome of a handled candidate.
+
+    Args:
+        comment_id: The comment ID that was handled
+        confirmed: True if the full text confirmed a keyword, False if not
+    """
+    init_database()
+    conn = sqlite3.connect(DB_FILE, timeout=30)
+    cursor = conn.cursor()
+
+    cursor.execute('''
+        UPDATE detail_queue SET state = ?, updated_at = ?, last_error = NULL
+        WHERE comment_id = ?
+    ''', ('confirmed' if confirmed else 'rejected', time.time(), comment_id))
+
+    conn.commit()
+    conn.close()
+
+def reset_stale_fetches(older_than_seconds: float) -> int:
+    """
+    Return candidates stuck in the fetching state to pending.
+
+    A cycle that crashed or was killed mid-fetch leaves its candidates
+    marked fetching; they are retried once they are older than any
+    cycle could legitimately take.
+
+    Args:
+        older_than_seconds: Minimum time since the fetch started
+
+    Returns:
+        Number of candidates reset
+    """
+    init_database()
+    conn = sqlite3.connect(DB_FILE, timeout=30)
+    cursor = conn.cursor()
+    now = time.time()
+
+    cursor.execute('''
+        UPDATE detail_queue SET state = 'pending', updated_at = ?
+        WHERE state = 'fetching' AND COALESCE(started_at, 0) <= ?
+    ''', (now, now - older_than_seconds))
+    reset = cursor.rowcount
+
+    conn.commit()
+    conn.close()
+    return reset
+
+def release_detail_fetches(comment_ids: List[str]) -> None:
+    """
+    Return candidates this cycle started but did not finish to pending.
+
+    Args:
+        comment_ids: Comment IDs to release
+    """
+    if not comment_ids:
+        return
+    init_database()
+    conn = sqlite3.connect(DB_FILE, timeout=30)
+    cursor = conn.cursor()
+
+    cursor.executemany('''
+        UPDATE detail_queue SET state = 'pending', updated_at = ?
+        WHERE comment_id = ? AND state = 'fetching'
+    ''', [(time.time(), comment_id) for comment_id in comment_ids])
+
+    conn.commit()
+    conn.close()
+
+def get_detail_queue_counts() -> Dict[str, int]:
+    """
+    Count detail-fetch candidates by state.
+
+    Returns:
+        Dictionary of state to count, plus "retrying" for pending
+        candidates with failed attempts
+    """
+    init_database()
+    conn = sqlite3.connect(DB_FILE)
+    cursor = conn.cursor()
+
+    cursor.execute('SELECT state, COUNT(*) FROM detail_queue GROUP BY state')
+    counts = {state: 0 for state in ('pending', 'fetching', 'confirmed', 'rejected')}
+    counts.update(dict(cursor.fetchall()))
+    cursor.execute("SELECT COUNT(*) FROM detail_queue WHERE state = 'pending' AND attempts > 0")
+    counts['retrying'] = cursor.fetchone()[0]
+    conn.close()
+
+    return counts
+
+def expire_detail_queue(older_than_days: int) -> int:
+    """
+    Delete confirmed and rejected candidates handled long ago.
+
+    Args:
+        older_than_days: Age, since the candidate was handled, to keep rows for
+
+    Returns:
+        Number of queue rows deleted
+    """
+    init_database()
+    conn = sqlite3.connect(DB_FILE)
+    cursor = conn.cursor()
+
+    cursor.execute('''
+        DELETE FROM detail_queue
+        WHERE state IN ('confirmed', 'rejected') AND COALESCE(updated_at, 0) < ?
+    ''', (time.time() - older_than_days * 86400,))
+    deleted = cursor.rowcount
+
+    conn.commit()
+    conn.close()
+    return deleted
+
+def filter_queued_ids(comment_ids: List[str]) -> Set[str]:
+    """
+    Find which of the given comment IDs are still pending in the detail-fetch queue.
+
+    Args:
+        comment_ids: Comment IDs to check
+
+    Returns:
+        Set of the IDs still pending
+    """
+    if not comment_ids:
+        return set()
+
+    init_database()
+    conn = sqlite3.connect(DB_FILE, timeout=30)
+    cursor = conn.cursor()
+
+    queued = set()
+    for start in range(0, len(comment_ids), 500):
+        chunk = comment_ids[start:start + 500]
+        cursor.execute(
+            f"SELECT comment_id FROM detail_queue WHERE state = 'pending' "
+            f'AND comment_id IN ({",".join("?" * len(chunk))})',
+            chunk
+        )
+        queued.update(row[0] for row in cursor.fetchall())
+    conn.close()
+
+    return queued
+
+def record_detail_attempt(comment_id: str, error: str, max_attempts: int = 0) -> bool:
+    """
+    Record a failed detail fetch, returning the candidate to pending.
+
+    Args:
+        comment_id: The comment ID that failed
+        error: Error message from the attempt
+        max_attempts: Reject the candidate after this many failures (0 retries forever)
+
+    Returns:
+        True if the candidate will be retried, False if it was rejected
+    """
+    init_database()
+    conn = sqlite3.connect(DB_FILE, timeout=30)
+    cursor = conn.cursor()
+
+    cursor.execute('''
+        UPDATE detail_queue SET
+            attempts = attempts + 1,
+            last_error = ?,
+            updated_at = ?,
+            state = CASE WHEN ? > 0 AND attempts + 1 >= ? THEN 'rejected' ELSE 'pending' END
+        WHERE comment_id = ?
+    ''', (error, time.time(), max_attempts, max_attempts, comment_id))
+    cursor.execute('SELECT state FROM detail_queue WHERE comment_id = ?', (comment_id,))
+    row = cursor.fetchone()
+
+    conn.commit()
+    conn.close()
+    return row is None or row[0] == 'pending'
+
+def create_backfill_windows(job_id: str, windows: List[Tuple[str, str]]) -> None:
+    """
+    Register the time windows of a backfill job; existing checkpoints are kept.
+
+    Args:
+        job_id: Backfill job identifier
+        windows: (window_start, window_end) date pairs
+    """
+    init_database()
+    conn = sqlite3.connect(DB_FILE, timeout=30)
+    cursor = conn.cursor()
+
+    cursor.executemany('''
+        INSERT OR IGNORE INTO backfill_windows (job_id, window_start, window_end)
+        VALUES (?, ?, ?)
+    ''', [(job_id, start, end) for start, end in windows])
+
+    conn.commit()
+    conn.close()
+
+def load_backfill_windows(job_id: str) -> List[Dict]:
+    """
+    Load the checkpoints of a backfill job.
+
+    Args:
+        job_id: Backfill job identifier
+
+    Returns:
+        List of window checkpoint dictionaries ordered by start date
+    """
+    init_database()
+    conn = sqlite3.connect(DB_FILE, timeout=30)
+    cursor = conn.cursor()
+
+    cursor.execute('''
+        SELECT window_start, window_end, status, last_page, matched, error, updated_at
+        FROM backfill_windows
+        WHERE job_id = ?
+        ORDER BY window_start, window_end
+    ''', (job_id,))
+    columns = [description[0] for description in cursor.description]
+    rows = cursor.fetchall()
+    conn.close()
+
+    return [dict(zip(columns, row)) for row in rows]
+
+def update_backfill_window(job_id: str, window_start: str, window_end: str, status: str,
+                           last_page: int = None, matched: int = 0, error: str = None) -> None:
+    """
+    Checkpoint the progress of one backfill window.
+
+    Args:
+        job_id: Backfill job identifier
+        window_start: Window start date
+        window_end: Window end date
+        status: pending, running, done, split or failed
+        last_page: Last page fully processed, if it changed
+        matched: Additional matches stored since the last checkpoint
+        error: Error message for failed windows
+    """
+    init_database()
+    conn = sqlite3.connect(DB_FILE, timeout=30)
+    cursor = conn.cursor()
+
+    cursor.execute('''
+        UPDATE backfill_windows
+        SET status = ?, last_page = COALESCE(?, last_page), matched = matched + ?,
+            error = ?, updated_at = CURRENT_TIMESTAMP
+        WHERE job_id = ? AND window_start = ? AND window_end = ?
+    ''', (status, last_page, matched, error, job_id, window_start, window_end))
+
+    conn.commit()
+    conn.close()
+
+def save_corpus_records(records: List[CommentRecord], has_detail: bool = False) -> int:
+    """
+    Store fetched comments in the local corpus.
+
+    Records are kept as zlib-compressed JSON. A detail record (with the full
+    body) is never replaced by metadata for the same revision of a comment.
+
+    Args:
+        records: Comment metadata or detail records
+        has_detail: Whether the records come from detail fetches
+
+    Returns:
+        Number of records written
+    """
+    if not CORPUS_ENABLED or not records:
+        return 0
+
+    init_database()
+    conn = sqlite3.connect(DB_FILE, timeout=30)
+    cursor = conn.cursor()
+
+    rows = []
+    for record in records:
+        blob = zlib.compress(record.to_json().encode('utf-8'), CORPUS_COMPRESSION_LEVEL)
+        rows.append((record.id, record.posted_date, record.last_modified_date,
+                     int(has_detail), blob, len(blob)))
+    try:
+        cursor.executemany('''
+            INSERT INTO comment_corpus (id, posted_date, last_modified_date, has_detail, record, size)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT(id) DO UPDATE SET
+                posted_date = excluded.posted_date,
+                last_modified_date = excluded.last_modified_date,
+                has_detail = excluded.has_detail,
+                record = excluded.record,
+                size = excluded.size,
+                fetched_at = CURRENT_TIMESTAMP
+            WHERE excluded.has_detail >= comment_corpus.has_detail
+               OR excluded.last_modified_date > comment_corpus.last_modified_date
+        ''', rows)
+        conn.commit()
+        written = cursor.rowcount
+    except sqlite3.Error as e:
+        print(f"❌ Error saving {len(rows)} records to the corpus: {e}")
+        written = 0
+    finally:
+        conn.close()
+
+    return written
+
+def record_corpus_coverage(range_start: str, range_end: str, terms: List[str]) -> None:
+    """
+    Record a lastModifiedDate range whose fetched comments went into the corpus.
+
+    With search pushdown a cycle only downloads comments matching its
+    server-side terms, so the corpus holds every comment of a range only
+    when the unfiltered stream ran. A range that overlaps the newest one
+    recorded for the same terms extends it instead of adding a row.
+
+    Args:
+        range_start: Lower lastModifiedDate bound ("YYYY-MM-DD HH:MM:SS")
+        range_end: Newest lastModifiedDate the streams reached
+        terms: Search terms that filtered the range, or empty if unfiltered
+    """
+    if not CORPUS_ENABLED or range_start > range_end:
+        return
+
+    terms_key = ", ".join(sorted(terms))
+    init_database()
+    conn = sqlite3.connect(DB_FILE, timeout=30)
+    cursor = conn.cursor()
+
+    cursor.execute('''
+        SELECT id, range_start, range_end FROM corpus_coverage
+        WHERE terms = ? ORDER BY range_end DESC LIMIT 1
+    ''', (terms_key,))
+    row = cursor.fetchone()
+    if row and row[1] <= range_end and range_start <= row[2]:
+        cursor.execute('''
+            UPDATE corpus_coverage SET range_start = ?, range_end = ?, updated_at = CURRENT_TIMESTAMP
+            WHERE id = ?
+        ''', (min(row[1], range_start), max(row[2], range_end), row[0]))
+    else:
+        cursor.execute('''
+            INSERT INTO corpus_coverage (range_start, range_end, terms) VALUES (?, ?, ?)
+        ''', (range_start, range_end, terms_key))
+
+    conn.commit()
+    conn.close()
+
+def load_corpus_coverage(since: str = None) -> List[Dict]:
+    """
+    Load the recorded corpus coverage, oldest range first.
+
+    Args:
+        since: Only ranges reaching this date (YYYY-MM-DD) or later
+
+    Returns:
+        List of dictionaries with range_start, range_end and terms
+        ('' when the range holds every comment)
+    """
+    init_database()
+    conn = sqlite3.connect(DB_FILE)
+    cursor = conn.cursor()
+
+    cursor.execute('''
+        SELECT range_start, range_end, terms FROM corpus_coverage
+        WHERE range_end >= ? ORDER BY range_start
+    ''', (since or '',))
+    columns = [description[0] for description in cursor.description]
+    rows = cursor.fetchall()
+    conn.close()
+
+    return [dict(zip(columns, row)) for row in rows]
+
+def iter_corpus(batch_size: int = 1000, since: str = None) -> Iterator[Tuple[List[CommentRecord], List[bool]]]:
+    """
+    Read the local corpus in batches, ordered by comment ID.
+
+    Args:
+        batch_size: Records per batch
+        since: Only comments posted on or after this date (YYYY-MM-DD)
+
+    Yields:
+        (records, has_detail flags) for each batch
+    """
+    init_database()
+    conn = sqlite3.connect(DB_FILE, timeout=30)
+    cursor = conn.cursor()
+
+    last_id = ""
+    try:
+        while True:
+            # Keyset paging keeps each batch an index range scan
+            cursor.execute('''
+                SELECT id, has_detail, record FROM comment_corpus
+                WHERE id > ? AND (? IS NULL OR posted_date >= ?)
+                ORDER BY id
+                LIMIT ?
+            ''', (last_id, since, since, batch_size))
+            rows = cursor.fetchall()
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            yield ([CommentRecord.from_json(zlib.decompress(row[2]).decode('utf-8')) for row in rows],
+                   [bool(row[1]) for row in rows])
+    finally:
+        conn.close()
+
+def get_corpus_stats() -> Dict:
+    """
+    Summarize the local corpus.
+
+    Returns:
+        Dictionary with record counts and stored size
+    """
+    init_database()
+    conn = sqlite3.connect(DB_FILE)
+    cursor = conn.cursor()
+
+    cursor.execute('''
+        SELECT COUNT(*), COALESCE(SUM(has_detail), 0), COALESCE(SUM(size), 0),
+               MIN(posted_date), MAX(posted_date)
+        FROM comment_corpus
+    ''')
+    total, detailed, size, oldest, newest = cursor.fetchone()
+    conn.close()
+
+    return {
+        "records": total,
+        "with_detail": detailed,
+        "stored_bytes": size,
+        "oldest_posted": oldest,
+        "newest_posted": newest
+    }
+
+def record_revisions(revisions: List[Dict]) -> None:
+    """
+    Record the checked revision of processed comments.
+
+    The revision counter only advances when the content hash changes, and
+    any pending recheck up to the recorded lastModifiedDate is cleared.
+
+    Args:
+        revisions: Dictionaries with comment_id, last_modified_date,
+            content_hash (None if only metadata was seen) and matched_terms
+    """
+    if not revisions:
+        return
+
+    init_database()
+    conn = sqlite3.connect(DB_FILE, timeout=30)
+    cursor = conn.cursor()
+
+    try:
+        cursor.executemany('''
+            INSERT INTO comment_revisions (comment_id, last_modified_date, content_hash, matched_terms)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(comment_id) DO UPDATE SET
+                revision = comment_revisions.revision + (
+                    comment_revisions.content_hash IS NOT NULL
+                    AND excluded.content_hash IS NOT NULL
+                    AND excluded.content_hash != comment_revisions.content_hash),
+                last_modified_date = MAX(COALESCE(excluded.last_modified_date, ''),
+                                         COALESCE(comment_revisions.last_modified_date, '')),
+                content_hash = COALESCE(excluded.content_hash, comment_revisions.content_hash),
+                matched_terms = COALESCE(excluded.matched_terms, comment_revisions.matched_terms),
+                pending_modified_date = CASE
+                    WHEN comment_revisions.pending_modified_date > excluded.last_modified_date
+                    THEN comment_revisions.pending_modified_date END,
+                attempts = 0,
+                checked_at = CURRENT_TIMESTAMP
+        ''', [(r["comment_id"], r["last_modified_date"], r["content_hash"],
+               json.dumps(r["matched_terms"]) if r["matched_terms"] is not None else None)
+              for r in revisions])
+        conn.commit()
+    except sqlite3.Error as e:
+        print(f"❌ Error recording {len(revisions)} comment revisions: {e}")
+    finally:
+        conn.close()
+
+def mark_revisions_pending(modified: List[Tuple[str, str]]) -> int:
+    """
+    Flag processed comments whose lastModifiedDate moved past their checked revision.
+
+    Comments without a revision row yet (processed before revisions were
+    tracked) get one with this lastModifiedDate as their baseline.
+
+    Args:
+        modified: (comment_id, lastModifiedDate) pairs from metadata
+
+    Returns:
+        Number of comments waiting for a recheck after this update
+    """
+    init_database()
+    conn = sqlite3.connect(DB_FILE, timeout=30)
+    cursor = conn.cursor()
+
+    if modified:
+        cursor.executemany('''
+            INSERT INTO comment_revisions (comment_id, last_modified_date)
+            VALUES (?, ?)
+            ON CONFLICT(comment_id) DO UPDATE SET
+                pending_modified_date = MAX(COALESCE(comment_revisions.pending_modified_date, ''),
+                                            excluded.last_modified_date)
+            WHERE excluded.last_modified_date > COALESCE(comment_revisions.last_modified_date, '')
+        ''', modified)
+        conn.commit()
+
+    cursor.execute('SELECT COUNT(*) FROM comment_revisions WHERE pending_modified_date IS NOT NULL')
+    pending = cursor.fetchone()[0]
+    conn.close()
+    return pending
+
+def record_revision_attempt(comment_id: str, max_attempts: int = 0) -> bool:
+    """
+    Record a failed revision recheck.
+
+    After ``max_attempts`` failures the pending change is dropped: the
+    comment's checked lastModifiedDate advances to it, so only a newer edit
+    flags the comment again.
+
+    Args:
+        comment_id: The comment ID whose recheck failed
+        max_attempts: Give up after this many failures (0 retries forever)
+
+    Returns:
+        True if the recheck will be retried, False if it was dropped
+    """
+    init_database()
+    conn = sqlite3.connect(DB_FILE, timeout=30)
+    cursor = conn.cursor()
+
+    cursor.execute('''
+        UPDATE comment_revisions SET attempts = attempts + 1 WHERE comment_id = ?
+    ''', (comment_id,))
+    cursor.execute('''
+        UPDATE comment_revisions SET
+            last_modified_date = pending_modified_date,
+            pending_modified_date = NULL,
+            attempts = 0
+        WHERE comment_id = ? AND ? > 0 AND attempts >= ?
+    ''', (comment_id, max_attempts, max_attempts))
+    dropped = cursor.rowcount > 0
+
+    conn.commit()
+    conn.close()
+    return not dropped
+
+def load_pending_revisions(limit: int = None) -> List[Dict]:
+    """
+    Load comments waiting for a revision recheck, oldest change first.
+
+    Rechecks that already failed go after the rest, so they can't starve
+    later revisions.
+
+    Args:
+        limit: Maximum rows to return (None or 0 for all)
+
+    Returns:
+        List of revision dictionaries; matched_terms is None for comments
+        processed before revisions were tracked
+    """
+    init_database()
+    conn = sqlite3.connect(DB_FILE)
+    cursor = conn.cursor()
+
+    cursor.execute(f'''
+        SELECT comment_id, last_modified_date, pending_modified_date, content_hash,
+               matched_terms, revision
+        FROM comment_revisions
+        WHERE pending_modified_date IS NOT NULL
+        ORDER BY attempts, pending_modified_date
+        {'LIMIT ?' if limit else ''}
+    ''', (limit,) if limit else ())
+    rows = cursor.fetchall()
+    conn.close()
+
+    return [{
+        "comment_id": comment_id,
+        "last_modified_date": modified,
+        "pending_modified_date": pending,
+        "content_hash": digest,
+        "matched_terms": json.loads(terms) if terms is not None else None,
+        "revision": revision
+    } for comment_id, modified, pending, digest, terms, revision in rows]
+
+def load_cached_metadata(kind: str, keys: List[str],
+                         now: float = None) -> Dict[str, Tuple[Optional[Dict], float]]:
+    """
+    Look up unexpired docket or document metadata.
+
+    Args:
+        kind: "dockets" or "documents"
+        keys: Docket or document IDs
+        now: Current epoch seconds (defaults to the clock)
+
+    Returns:
+        Dictionary of ID to (cached attributes, expiry epoch seconds); the
+        attributes are None for IDs the API did not have. Expired and
+        uncached IDs are left out
+    """
+    if not keys:
+        return {}
+    init_database()
+    conn = sqlite3.connect(DB_FILE)
+    cursor = conn.cursor()
+    now = time.time() if now is None else now
+
+    found = {}
+    keys = list(keys)
+    for start in range(0, len(keys), 500):
+        chunk = keys[start:start + 500]
+        cursor.execute(f'''
+            SELECT key, value, expires_at FROM metadata_cache
+            WHERE kind = ? AND expires_at > ? AND key IN ({",".join("?" * len(chunk))})
+        ''', [kind, now] + chunk)
+        for key, value, expires_at in cursor.fetchall():
+            found[key] = (json.loads(value) if value is not None else None, expires_at)
+    conn.close()
+    return found
+
+def save_cached_metadata(kind: str, entries: Dict[str, Optional[Dict]], ttl_seconds: float,
+                         missing_ttl_seconds: float = None) -> None:
+    """
+    Store fetched docket or document metadata until it expires.
+
+    Args:
+        kind: "dockets" or "documents"
+        entries: Dictionary of ID to attributes (None if the API did not have it)
+        ttl_seconds: How long fetched attributes stay fresh
+        missing_ttl_seconds: How long a missing object is remembered (defaults to ttl_seconds)
+    """
+    if not entries:
+        return
+    init_database()
+    conn = sqlite3.connect(DB_FILE)
+    cursor = conn.cursor()
+    now = time.time()
+    if missing_ttl_seconds is None:
+        missing_ttl_seconds = ttl_seconds
+
+    cursor.executemany('''
+        INSERT INTO metadata_cache (kind, key, value, expires_at, fetched_at)
+        VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
+        ON CONFLICT(kind, key) DO UPDATE SET
+            value = excluded.value,
+            expires_at = excluded.expires_at,
+            fetched_at = excluded.fetched_at
+    ''', [(kind, key, json.dumps(value) if value is not None else None,
+           now + (ttl_seconds if value is not None else missing_ttl_seconds))
+          for key, value in entries.items()])
+
+    conn.commit()
+    conn.close()
+
+def expire_cached_metadata() -> int:
+    """
+    Delete expired docket and document metadata.
+
+    Returns:
+        Number of cache entries deleted
+    """
+    init_database()
+    conn = sqlite3.connect(DB_FILE)
+    cursor = conn.cursor()
+
+    cursor.execute('DELETE FROM metadata_cache WHERE expires_at <= ?', (time.time(),))
+    deleted = cursor.rowcount
+
+    conn.commit()
+    conn.close()
+    return deleted
+
+def acquire_leases(names: List[str], owner: str, ttl_seconds: float) -> List[str]:
+    """
+    Atomically take or renew leases that are free, expired or already ours.
+
+    The upsert runs in an immediate transaction, so two processes sharing
+    the database never both hold the same lease.
+
+    Args:
+        names: Lease names (e.g. "shard:3", "item:EPA-HQ-0001-0042")
+        owner: Replica ID taking the leases
+        ttl_seconds: Seconds until the leases expire unless renewed
+
+    Returns:
+        The names now held by owner, in the order given
+    """
+    if not names:
+        return []
+    init_database()
+    conn = sqlite3.connect(DB_FILE, timeout=30, isolation_level=None)
+    cursor = conn.cursor()
+    now = time.time()
+
+    held = set()
+    try:
+        cursor.execute('BEGIN IMMEDIATE')
+        cursor.executemany('''
+            INSERT INTO leases (name, owner, expires_at, acquired_at, renewed_at)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(name) DO UPDATE SET
+                owner = excluded.owner,
+                expires_at = excluded.expires_at,
+                acquired_at = CASE WHEN leases.owner = excluded.owner
+                                   THEN leases.acquired_at ELSE excluded.acquired_at END,
+                renewed_at = excluded.renewed_at
+            WHERE leases.owner = excluded.owner OR leases.expires_at <= excluded.renewed_at
+        ''', [(name, owner, now + ttl_seconds, now, now) for name in names])
+        for start in range(0, len(names), 500):
+            chunk = names[start:start + 500]
+            cursor.execute(f'''
+                SELECT name FROM leases
+                WHERE owner = ? AND renewed_at = ? AND name IN ({",".join("?" * len(chunk))})
+            ''', [owner, now] + chunk)
+            held.update(row[0] for row in cursor.fetchall())
+        cursor.execute('COMMIT')
+    except sqlite3.Error:
+        if conn.in_transaction:
+            cursor.execute('ROLLBACK')
+        raise
+    finally:
+        conn.close()
+
+    return [name for name in names if name in held]
+
+def renew_leases(owner: str, ttl_seconds: float) -> int:
+    """
+    Extend every unexpired lease an owner holds (a heartbeat).
+
+    Args:
+        owner: Replica ID
+        ttl_seconds: Seconds from now until the leases expire
+
+    Returns:
+        Number of leases renewed; expired leases are not revived
+    """
+    init_database()
+    conn = sqlite3.connect(DB_FILE, timeout=30)
+    cursor = conn.cursor()
+    now = time.time()
+
+    cursor.execute('''
+        UPDATE leases SET expires_at = ?, renewed_at = ?
+        WHERE owner = ? AND expires_at > ?
+    ''', (now + ttl_seconds, now, owner, now))
+    renewed = cursor.rowcount
+
+    conn.commit()
+    conn.close()
+    return renewed
+
+def release_leases(owner: str, names: List[str] = None) -> int:
+    """
+    Give up leases so other replicas can take them right away.
+
+    Args:
+        owner: Replica ID
+        names: Leases to release (defaults to every lease the owner holds)
+
+    Returns:
+        Number of leases released
+    """
+    init_database()
+    conn = sqlite3.connect(DB_FILE, timeout=30)
+    cursor = conn.cursor()
+
+    released = 0
+    if names is None:
+        cursor.execute('DELETE FROM leases WHERE owner = ?', (owner,))
+        released = cursor.rowcount
+    else:
+        for start in range(0, len(names), 500):
+            chunk = names[start:start + 500]
+            cursor.execute(
+                f'DELETE FROM leases WHERE owner = ? AND name IN ({",".join("?" * len(chunk))})',
+                [owner] + chunk
+            )
+            released += cursor.rowcount
+
+    conn.commit()
+    conn.close()
+    return released
+
+def list_leases(prefix: str = "") -> List[Dict]:
+    """
+    List unexpired leases, dropping expired ones from the table.
+
+    Args:
+        prefix: Only leases whose name starts with this (e.g. "shard:")
+
+    Returns:
+        Lease dictionaries ordered by name
+    """
+    init_database()
+    conn = sqlite3.connect(DB_FILE, timeout=30)
+    cursor = conn.cursor()
+    now = time.time()
+
+    cursor.execute('DELETE FROM leases WHERE expires_at <= ?', (now,))
+    cursor.execute('''
+        SELECT name, owner, expires_at, acquired_at, renewed_at FROM leases
+        WHERE name >= ? AND name < ?
+        ORDER BY name
+    ''', (prefix, prefix + "\U0010ffff"))
+    columns = [description[0] for description in cursor.description]
+    rows = cursor.fetchall()
+
+    conn.commit()
+    conn.close()
+    return [dict(zip(columns, row)) for row in rows]
+
+# Stages of a comment's journey, in order, each with a <stage>_at column in comment_timeline
+TIMELINE_STAGES = ('first_seen', 'detail_fetched', 'confirmed', 'alerted', 'stored')
+
+def record_first_seen(entries: List[Tuple[str, Optional[float]]], cycle_started_at: float,
+                      cycle_id: str, seen_at: float = None) -> int:
+    """
+    Start the timelines of newly matched comments.
+
+    A comment keeps the time it was first seen; later sightings are ignored.
+
+    Args:
+        entries: (comment ID, posted time in epoch seconds or None) pairs
+        cycle_started_at: Epoch seconds the sighting cycle started
+        cycle_id: Identifier of the sighting cycle
+        seen_at: Epoch seconds of the sighting (defaults to now)
+
+    Returns:
+        Number of timelines started
+    """
+    if not entries:
+        return 0
+
+    seen_at = time.time() if seen_at is None else seen_at
+    init_database()
+    conn = sqlite3.connect(DB_FILE, timeout=30)
+    cursor = conn.cursor()
+
+    cursor.executemany('''
+        INSERT INTO comment_timeline (comment_id, posted_at, cycle_started_at, first_seen_at, cycle_id)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT(comment_id) DO NOTHING
+    ''', [(comment_id, posted_at, cycle_started_at, seen_at, cycle_id)
+          for comment_id, posted_at in entries])
+    started = conn.total_changes
+
+    conn.commit()
+    conn.close()
+    return started
+
+def record_timeline(stage: str, times: Dict[str, float], cycle_id: str) -> None:
+    """
+    Stamp when comments reached a stage.
+
+    Only the first time a comment reaches a stage is kept, so a revised
+    comment that is alerted again keeps its original freshness.
+
+    Args:
+        stage: One of TIMELINE_STAGES
+        times: Dictionary of comment ID to epoch seconds
+        cycle_id: Identifier of the current cycle
+    """
+    if stage not in TIMELINE_STAGES:
+        raise ValueError(f"Unknown timeline stage {stage!r}; expected one of {TIMELINE_STAGES}")
+    if not times:
+        return
+
+    init_database()
+    conn = sqlite3.connect(DB_FILE, timeout=30)
+    cursor = conn.cursor()
+
+    cursor.executemany(f'''
+        INSERT INTO comment_timeline (comment_id, {stage}_at, cycle_id)
+        VALUES (?, ?, ?)
+        ON CONFLICT(comment_id) DO UPDATE SET
+            {stage}_at = COALESCE(comment_timeline.{stage}_at, excluded.{stage}_at),
+            cycle_id = excluded.cycle_id
+    ''', [(comment_id, at, cycle_id) for comment_id, at in times.items()])
+
+    conn.commit()
+    conn.close()
+
+def load_timelines(since: float, cycle_id: str = None) -> List[Dict]:
+    """
+    Load comment timelines for freshness reporting.
+
+    Args:
+        since: Epoch seconds; timelines first seen or alerted since then
+        cycle_id: Only timelines last touched by this cycle
+
+    Returns:
+        List of timeline dictionaries
+    """
+    init_database()
+    conn = sqlite3.connect(DB_FILE)
+    conn.row_factory = sqlite3.Row
+    cursor = conn.cursor()
+
+    query = '''
+        SELECT * FROM comment_timeline
+        WHERE (first_seen_at >= ? OR alerted_at >= ?)
+    '''
+    params = [since, since]
+    if cycle_id is not None:
+        query += ' AND cycle_id = ?'
+        params.append(cycle_id)
+    cursor.execute(query, params)
+    rows = [dict(row) for row in cursor.fetchall()]
+
+    conn.close()
+    return rows
+
+def expire_timelines(older_than_days: int) -> int:
+    """
+    Delete timelines of comments first seen more than some days ago.
+
+    Args:
+        older_than_days: Minimum age of timelines to delete
+
+    Returns:
+        Number of timelines deleted
+    """
+    init_database()
+    conn = sqlite3.connect(DB_FILE)
+    cursor = conn.cursor()
+
+    cursor.execute('''
+        DELETE FROM comment_timeline
+        WHERE COALESCE(first_seen_at, alerted_at, stored_at) < ?
+    ''', (time.time() - older_than_days * 86400,))
+    deleted = cursor.rowcount
+
+    conn.commit()
+    conn.close()
+    return deleted
+
+def bump_data_version() -> str:
+    """
+    Record that a writer committed new results.
+
+    Readers such as the query API compare this version to decide when
+    their cached responses are stale.
+
+    Returns:
+        The new version string
+    """
+    version = str(time.time_ns())
+    set_sync_state(DATA_VERSION_KEY, version)
+    return version
+
+def get_sync_state(key: str) -> str:
+    """
+    Get a stored sync marker.
+
+    Args:
+        key: Marker name
+
+    Returns:
+        The stored value, or None if unset
+    """
+    init_database()
+    conn = sqlite3.connect(DB_FILE)
+    cursor = conn.cursor()
+
+    cursor.execute('SELECT value FROM sync_state WHERE key = ?', (key,))
+    row = cursor.fetchone()
+    conn.close()
+
+    return row[0] if row else None
+
+def set_sync_state(key: str, value: str) -> None:
+    """
+    Store a sync marker.
+
+    Args:
+        key: Marker name
+        value: Value to store
+    """
+    init_database()
+    conn = sqlite3.connect(DB_FILE)
+    cursor = conn.cursor()
+
+    cursor.execute('''
+        INSERT INTO sync_state (key, value, updated_at) VALUES (?, ?, CURRENT_TIMESTAMP)
+        ON CONFLICT(key) DO UPDATE SET value = excluded.value, updated_at = excluded.updated_at
+    ''', (key, value))
+
+    conn.commit()
+    conn.close()
+
+def load_seen_ids(file: str = None) -> Set[str]:
+    """
+    Load previously seen comment IDs from SQLite database.
+
+    Args:
+        file: Ignored for SQLite (kept for compatibility)
+
+    Returns:
+        Set of previously seen comment IDs
+    """
+    init_database()
+    conn = sqlite3.connect(DB_FILE)
+    cursor = conn.cursor()
+
+    cursor.execute('SELECT comment_id FROM seen_ids')
+    rows = cursor.fetchall()
+    conn.close()
+
+    return {row[0] for row in rows}
+
+def filter_seen_ids(comment_ids: List[str]) -> Set[str]:
+    """
+    Find which of the given comment IDs were already seen.
+
+    Args:
+        comment_ids: Comment IDs to check
+
+    Returns:
+        Set of the IDs already present in seen_ids
+    """
+    if not comment_ids:
+        return set()
+
+    init_database()
+    conn = sqlite3.connect(DB_FILE, timeout=30)
+    cursor = conn.cursor()
+
+    seen = set()
+    for start in range(0, len(comment_ids), 500):
+        chunk = comment_ids[start:start + 500]
+        cursor.execute(
+            f'SELECT comment_id FROM seen_ids WHERE comment_id IN ({",".join("?" * len(chunk))})',
+            chunk
+        )
+        seen.update(row[0] for row in cursor.fetchall())
+    conn.close()
+
+    return seen
+
+def get_flagged_keywords(comment_ids: List[str], path: str = None) -> Dict[str, str]:
+    """
+    Look up the stored keyword of flagged comments.
+
+    Args:
+        comment_ids: Comment IDs to look up
+        path: Shard database to read instead of the watcher database
+
+    Returns:
+        Dictionary of comment ID to keyword, for the IDs that are stored
+    """
+    if not comment_ids or (path and not os.path.exists(path)):
+        return {}
+
+    if path:
+        conn = _connect_shard(path)
+    else:
+        init_database()
+        conn = sqlite3.connect(DB_FILE, timeout=30)
+    cursor = conn.cursor()
+
+    keywords = {}
+    for start in range(0, len(comment_ids), 500):
+        chunk = comment_ids[start:start + 500]
+        cursor.execute(
+            f'SELECT id, keyword FROM flagged_comments WHERE id IN ({",".join("?" * len(chunk))})',
+            chunk
+        )
+        keywords.update(cursor.fetchall())
+    conn.close()
+
+    return keywords
+
+def filter_revision_ids(comment_ids: List[str]) -> Set[str]:
+    """
+    Find which of the given comments have a revision fingerprint.
+
+    Every processed comment keeps one, even after its seen ID expires, so
+    this tells a returning comment apart from a new one.
+
+    Args:
+        comment_ids: Comment IDs to check
+
+    Returns:
+        Set of the IDs present in comment_revisions
+    """
+    if not comment_ids:
+        return set()
+
+    init_database()
+    conn = sqlite3.connect(DB_FILE, timeout=30)
+    cursor = conn.cursor()
+
+    known = set()
+    for start in range(0, len(comment_ids), 500):
+        chunk = comment_ids[start:start + 500]
+        cursor.execute(
+            f'SELECT comment_id FROM comment_revisions WHERE comment_id IN ({",".join("?" * len(chunk))})',
+            chunk
+        )
+        known.update(row[0] for row in cursor.fetchall())
+    conn.close()
+
+    return known
+
+def mark_as_seen(comment_id: str, file: str = None) -> None:
+    """
+    Mark a comment ID as seen in SQLite database.
+
+    Args:
+        comment_id: The comment ID to mark as seen
+        file: Ignored for SQLite (kept for compatibility)
+    """
+    init_database()
+    conn = sqlite3.connect(DB_FILE)
+    cursor = conn.cursor()
+
+    try:
+        cursor.execute('''
+            INSERT INTO seen_ids (comment_id, seen_at)
+            VALUES (?, CURRENT_TIMESTAMP)
+            ON CONFLICT(comment_id) DO UPDATE SET seen_at = excluded.seen_at
+        ''', (comment_id,))
+        conn.commit()
+    except sqlite3.Error as e:
+        print(f"❌ Error marking comment {comment_id} as seen: {e}")
+    finally:
+        conn.close()
+
+def get_unique_comments(file: str = None) -> List[Dict]:
+    """
+    Load and return unique comments from SQLite database.
+
+    Args:
+        file: Ignored for SQLite (kept for compatibility)
+
+    Returns:
+        List of unique flagged comment dictionaries
+    """
+    return load_flagged_comments()
+
+def get_comments_by_keyword(keyword: str) -> List[Dict]:
+    """
+    Get all comments that match a specific keyword, including archived ones.
+
+    Args:
+        keyword: The keyword to search for
+
+    Returns:
+        List of matching comment dictionaries
+    """
+    return query_with_archives('WHERE keyword = ?', (keyword,), 'created_at')
+
+def get_comments_by_date_range(start_date: str, end_date: str) -> List[Dict]:
+    """
+    Get comments within a date range, including archived ones.
+
+    Archives are by month flagged, and a comment is never flagged before it
+    is posted, so archives from before the range are skipped.
+
+    Args:
+        start_date: Start date (YYYY-MM-DD format)
+        end_date: End date (YYYY-MM-DD format)
+
+    Returns:
+        List of comment dictionaries in date range
+    """
+    first = start_date[:7].replace('-', '_')
+    return query_with_archives('WHERE date >= ? AND date <= ?', (start_date, end_date), 'date',
+                               [month for month in archive_months() if month >= first])
+
+def get_statistics() -> Dict:
+    """
+    Get database statistics.
+
+    Reads the trigger-maintained summary tables, so the cost doesn't grow
+    with the number of stored comments.
+
+    Returns:
+        Dictionary with statistics
+    """
+    init_database()
+    conn = sqlite3.connect(DB_FILE)
+    stats = read_statistics(conn.cursor())
+    conn.close()
+    return stats
+
+def read_statistics(cursor) -> Dict:
+    """
+    Read statistics from the summary tables with an existing cursor.
+
+    Args:
+        cursor: Cursor on any connection to the database (read-only is fine)
+
+    Returns:
+        Dictionary with statistics
+    """
+    cursor.execute('SELECT name, value FROM stats_totals')
+    totals = dict(cursor.fetchall())
+
+    cursor.execute('SELECT keyword, count FROM stats_keyword WHERE count > 0 ORDER BY keyword')
+    keyword_counts = dict(cursor.fetchall())
+
+    cursor.execute('''
+        SELECT docket_id, count FROM stats_docket
+        WHERE count > 0 ORDER BY count DESC
+    ''')
+    docket_counts = dict(cursor.fetchall())
+
+    # Recent activity (last 7 days), from at most eight daily rows
+    cursor.execute('''
+        SELECT COALESCE(SUM(count), 0) FROM stats_daily
+        WHERE day >= date('now', '-7 days')
     ''')
     recent_comments = cursor.fetchone()[0]
 
-    conn.close()
+    cursor.execute('''
+        SELECT day, count FROM stats_daily
+        WHERE day >= date('now', '-30 days') AND count > 0
+        ORDER BY day
+    ''')
+    daily_counts = dict(cursor.fetchall())
 
     return {
-        'total_flagged_comments': total_comments,
-        'total_seen_ids': total_seen,
+        'total_flagged_comments': totals.get('flagged_comments', 0),
+        'total_seen_ids': totals.get('seen_ids', 0),
         'keyword_counts': keyword_counts,
+        'docket_counts': docket_counts,
+        'daily_counts': daily_counts,
         'recent_comments': recent_comments
     }
 
@@ -324,15 +2294,448 @@ def export_to_json(filename: str = None) -> None:
 
     print(f"📤 Exported {len(comments)} comments to {filename}")
 
+def expire_seen_ids(older_than_days: int, covered_before: str) -> int:
+    """
+    Delete seen IDs that the sync high-water mark already protects.
+
+    An ID is expired only if it was marked more than ``older_than_days`` ago
+    and before ``covered_before``, the oldest lastModifiedDate the next
+    monitoring cycle will request. The comment's row in comment_revisions
+    (one small fingerprint) is kept, so if it is modified later it comes
+    back as a revision recheck rather than as a new comment; see
+    filter_revision_ids.
+
+    Args:
+        older_than_days: Minimum age of seen IDs to expire
+        covered_before: Timestamp ("YYYY-MM-DD HH:MM:SS") the sync has passed
+
+    Returns:
+        Number of seen IDs deleted
+    """
+    init_database()
+    conn = sqlite3.connect(DB_FILE)
+    cursor = conn.cursor()
+
+    cursor.execute('''
+        DELETE FROM seen_ids
+        WHERE seen_at < datetime('now', ?) AND seen_at < ?
+    ''', (f'-{older_than_days} days', covered_before))
+    expired = cursor.rowcount
+
+    conn.commit()
+    conn.close()
+    return expired
+
+def archive_path(month: str) -> str:
+    """Path of the archive database for a month (YYYY_MM)."""
+    return os.path.join(ARCHIVE_DIR, f"comments_{month}.db")
+
+def _init_archive(conn) -> None:
+    """Create the flagged_comments table in an archive database."""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS flagged_comments (
+            id TEXT PRIMARY KEY,
+            keyword TEXT NOT NULL,
+            title TEXT,
+            date TEXT,
+            text_snippet TEXT,
+            full_text TEXT,
+            organization TEXT,
+            submitter_name TEXT,
+            document_type TEXT,
+            docket_id TEXT,
+            score REAL,
+            cluster_id INTEGER,
+            created_at TIMESTAMP,
+            archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_archive_keyword ON flagged_comments (keyword)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_archive_date ON flagged_comments (date)')
+
+def archive_flagged_comments(older_than_days: int) -> Dict[str, int]:
+    """
+    Move old flagged comments into monthly archive databases.
+
+    Comments are grouped by the month they were flagged and written, with
+    their bodies inline, to ``ARCHIVE_DIR/comments_YYYY_MM.db`` before being
+    deleted from the active database. Statistics follow the active database.
+
+    Args:
+        older_than_days: Archive comments flagged more than this many days ago
+
+    Returns:
+        Dictionary of {month: comments archived}
+    """
+    init_database()
+    conn = sqlite3.connect(DB_FILE)
+    cursor = conn.cursor()
+
+    cursor.execute(f'''
+        {COMMENT_SELECT}
+        WHERE f.created_at < datetime('now', ?)
+    ''', (f'-{older_than_days} days',))
+    by_month = {}
+    for row in cursor.fetchall():
+        comment = _row_to_comment(row)
+        by_month.setdefault(comment['created_at'][:7].replace('-', '_'), []).append(row)
+
+    archived = {}
+    os.makedirs(ARCHIVE_DIR, exist_ok=True)
+    for month, rows in sorted(by_month.items()):
+        # Write and commit the archive first, so a crash never loses comments
+        archive = sqlite3.connect(archive_path(month))
+        _init_archive(archive)
+        archive.executemany(f'''
+            INSERT OR REPLACE INTO flagged_comments ({', '.join(COMMENT_COLUMNS)})
+            VALUES ({', '.join('?' * len(COMMENT_COLUMNS))})
+        ''', rows)
+        archive.commit()
+        archive.close()
+
+        for row in rows:
+            cursor.execute('SELECT body_hash FROM flagged_comments WHERE id = ?', (row[0],))
+            digest = cursor.fetchone()[0]
+            cursor.execute('DELETE FROM flagged_comments WHERE id = ?', (row[0],))
+            if digest:
+                _release_body(cursor, digest)
+        conn.commit()
+        archived[month] = len(rows)
+
+    conn.close()
+    return archived
+
+def archive_months() -> List[str]:
+    """Months (YYYY_MM) that have an archive database, oldest first."""
+    if not os.path.isdir(ARCHIVE_DIR):
+        return []
+    return [name[len('comments_'):-len('.db')] for name in sorted(os.listdir(ARCHIVE_DIR))
+            if name.startswith('comments_') and name.endswith('.db')]
+
+def list_archives() -> List[Dict]:
+    """
+    List the monthly archive databases.
+
+    Returns:
+        List of dictionaries with month, path, comment count and file size
+    """
+    archives = []
+    for month in archive_months():
+        path = archive_path(month)
+        conn = sqlite3.connect(path)
+        count = conn.execute('SELECT COUNT(*) FROM flagged_comments').fetchone()[0]
+        conn.close()
+        archives.append({
+            'month': month,
+            'path': path,
+            'comments': count,
+            'bytes': os.path.getsize(path)
+        })
+    return archives
+
+# SQLite attaches at most 10 databases to one connection by default
+ARCHIVE_ATTACH_BATCH = 10
+
+def attach_archives(conn, months: List[str], include_active: bool = True) -> List[str]:
+    """
+    Attach archive databases to a connection for querying.
+
+    Creates a temporary ``all_flagged_comments`` view over the attached
+    archived comments and, with ``include_active``, the active ones. At
+    most ARCHIVE_ATTACH_BATCH archives can be attached at once; see
+    query_with_archives for querying more.
+
+    Args:
+        conn: Open connection to the active database
+        months: Months (YYYY_MM) to attach
+        include_active: Whether the view also covers the active database
+
+    Returns:
+        Schema names of the attached archives, for detach_archives
+    """
+    if len(months) > ARCHIVE_ATTACH_BATCH:
+        raise ValueError(f"Can attach at most {ARCHIVE_ATTACH_BATCH} archives at once, got {len(months)}")
+
+    schemas = []
+    for month in months:
+        schema = f"archive_{month}"
+        conn.execute('ATTACH DATABASE ? AS ' + schema, (archive_path(month),))
+        schemas.append(schema)
+
+    columns = ', '.join(COMMENT_COLUMNS)
+    selects = ([COMMENT_SELECT] if include_active else []) + \
+        [f"SELECT {columns} FROM {schema}.flagged_comments" for schema in schemas]
+    conn.execute('DROP VIEW IF EXISTS temp.all_flagged_comments')
+    conn.execute(f"CREATE TEMP VIEW all_flagged_comments AS {' UNION ALL '.join(selects)}")
+    return schemas
+
+def detach_archives(conn, schemas: List[str]) -> None:
+    """Drop the all_flagged_comments view and detach archives attached by attach_archives."""
+    conn.execute('DROP VIEW IF EXISTS temp.all_flagged_comments')
+    for schema in schemas:
+        conn.execute(f'DETACH DATABASE {schema}')
+
+def query_with_archives(where: str, params: Tuple, order_by: str,
+                        months: List[str] = None) -> List[Dict]:
+    """
+    Query active and archived flagged comments together.
+
+    Archives are attached ARCHIVE_ATTACH_BATCH at a time; each batch is
+    queried through the all_flagged_comments view and the sorted results
+    are merged.
+
+    Args:
+        where: SQL WHERE clause over COMMENT_COLUMNS (may be empty)
+        params: Parameters for the WHERE clause
+        order_by: Column to sort on, newest first
+        months: Archive months (YYYY_MM) to include; defaults to all
+
+    Returns:
+        List of comment dictionaries
+    """
+    months = archive_months() if months is None else months
+    init_database()
+    conn = sqlite3.connect(DB_FILE)
+
+    results = []
+    batches = [months[start:start + ARCHIVE_ATTACH_BATCH]
+               for start in range(0, len(months), ARCHIVE_ATTACH_BATCH)] or [[]]
+    for index, batch in enumerate(batches):
+        schemas = attach_archives(conn, batch, include_active=index == 0)
+        try:
+            rows = conn.execute(f'''
+                SELECT {', '.join(COMMENT_COLUMNS)} FROM temp.all_flagged_comments
+                {where}
+                ORDER BY {order_by} DESC
+            ''', params).fetchall()
+        finally:
+            detach_archives(conn, schemas)
+        results.append([_row_to_comment(row) for row in rows])
+    conn.close()
+
+    return list(heapq.merge(*results, key=lambda c: c[order_by] or '', reverse=True))
+
+# Shard for comments without a usable posted date
+UNDATED_SHARD = "undated"
+
+def shard_month(date: str) -> str:
+    """Shard (YYYY_MM) of a posted date; comments without one go to UNDATED_SHARD."""
+    if date and len(date) >= 7 and date[:4].isdigit() and date[4] == '-' and date[5:7].isdigit():
+        return f"{date[:4]}_{date[5:7]}"
+    return UNDATED_SHARD
+
+def shard_path(shard_dir: str, month: str) -> str:
+    """Path of the shard database for a month (YYYY_MM)."""
+    return os.path.join(shard_dir, f"comments_{month}.db")
+
+def list_shards(shard_dir: str) -> List[str]:
+    """Months (YYYY_MM, plus UNDATED_SHARD) that have a shard database, oldest first."""
+    if not os.path.isdir(shard_dir):
+        return []
+    return sorted(name[len('comments_'):-len('.db')] for name in os.listdir(shard_dir)
+                  if name.startswith('comments_') and name.endswith('.db'))
+
+def _connect_shard(path: str):
+    """Open a shard database, creating its schema the first time in this process."""
+    is_ready = path in _initialized and os.path.exists(path)
+    conn = sqlite3.connect(path, timeout=30)
+    if not is_ready:
+        # Readers of old months never wait on the writer of the current one
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS flagged_comments (
+                id TEXT PRIMARY KEY,
+                keyword TEXT NOT NULL,
+                title TEXT,
+                date TEXT,
+                text_snippet TEXT,
+                full_text TEXT,
+                organization TEXT,
+                submitter_name TEXT,
+                document_type TEXT,
+                docket_id TEXT,
+                score REAL,
+                cluster_id INTEGER,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_shard_keyword ON flagged_comments (keyword)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_shard_date ON flagged_comments (date)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_shard_created_at ON flagged_comments (created_at)')
+        # The same trigger-maintained summaries as the watcher database
+        _create_statistics_tables(conn.cursor(), with_seen_ids=False)
+        conn.commit()
+        _initialized.add(path)
+    return conn
+
+def save_shard_comments(path: str, comment_list: List[Comment]) -> int:
+    """
+    Upsert flagged comments into one shard database.
+
+    Shards keep bodies inline, like archives; each shard is small enough
+    that cross-shard body deduplication isn't worth a shared table.
+
+    Args:
+        path: Shard database path (see shard_path)
+        comment_list: Comments posted in the shard's month
+
+    Returns:
+        Number of comments saved
+    """
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    conn = _connect_shard(path)
+    cursor = conn.cursor()
+
+    saved_count = 0
+    for comment in comment_list:
+        try:
+            cursor.execute('''
+                INSERT INTO flagged_comments
+                (id, keyword, title, date, text_snippet, full_text, organization, submitter_name, document_type, docket_id, score, cluster_id)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(id) DO UPDATE SET
+                    keyword = excluded.keyword,
+                    title = excluded.title,
+                    date = excluded.date,
+                    text_snippet = excluded.text_snippet,
+                    full_text = excluded.full_text,
+                    organization = excluded.organization,
+                    submitter_name = excluded.submitter_name,
+                    document_type = excluded.document_type,
+                    docket_id = excluded.docket_id,
+                    score = excluded.score,
+                    cluster_id = COALESCE(excluded.cluster_id, flagged_comments.cluster_id)
+            ''', (
+                comment['id'],
+                comment['keyword'],
+                comment['title'],
+                comment['date'],
+                comment['text_snippet'],
+                comment.get('full_text', '') or '',
+                comment.get('organization', ''),
+                comment.get('submitter_name', ''),
+                comment.get('document_type', ''),
+                comment.get('docket_id', ''),
+                comment.get('score'),
+                comment.get('cluster_id')
+            ))
+            saved_count += 1
+        except sqlite3.Error as e:
+            print(f"❌ Error saving comment {comment['id']} to {path}: {e}")
+
+    conn.commit()
+    conn.close()
+    return saved_count
+
+def query_shard_comments(path: str, where: str = '', params: Tuple = (),
+                         order_by: str = 'created_at DESC') -> List[Dict]:
+    """
+    Read flagged comments from one shard database.
+
+    Args:
+        path: Shard database path
+        where: SQL WHERE clause (may be empty)
+        params: Parameters for the WHERE clause
+        order_by: SQL ORDER BY expression
+
+    Returns:
+        List of comment dictionaries (empty if the shard doesn't exist)
+    """
+    if not os.path.exists(path):
+        return []
+    conn = _connect_shard(path)
+    cursor = conn.cursor()
+    cursor.execute(f'''
+        SELECT {', '.join(COMMENT_COLUMNS)} FROM flagged_comments
+        {where}
+        ORDER BY {order_by}
+    ''', params)
+    rows = cursor.fetchall()
+    conn.close()
+    return [_row_to_comment(row) for row in rows]
+
+def get_shard_statistics(path: str) -> Dict:
+    """
+    Read one shard's statistics from its summary tables.
+
+    Args:
+        path: Shard database path
+
+    Returns:
+        Statistics in the format of read_statistics (total_seen_ids is 0),
+        or None if the shard doesn't exist
+    """
+    if not os.path.exists(path):
+        return None
+    conn = _connect_shard(path)
+    stats = read_statistics(conn.cursor())
+    conn.close()
+    return stats
+
+def vacuum_database() -> Dict:
+    """
+    Reclaim free pages from the active database.
+
+    Databases created before incremental auto-vacuum get one full VACUUM to
+    switch over; after that only the free pages are released.
+
+    Returns:
+        Dictionary with file sizes before and after, and the vacuum mode used
+    """
+    init_database()
+    size_before = os.path.getsize(DB_FILE)
+    conn = sqlite3.connect(DB_FILE)
+    cursor = conn.cursor()
+
+    cursor.execute('PRAGMA auto_vacuum')
+    if cursor.fetchone()[0] != 2:
+        cursor.execute('PRAGMA auto_vacuum=INCREMENTAL')
+        cursor.execute('VACUUM')
+        mode = 'full'
+    else:
+        cursor.execute('PRAGMA freelist_count')
+        free_pages = cursor.fetchone()[0]
+        cursor.execute('PRAGMA incremental_vacuum')
+        cursor.fetchall()
+        mode = f'incremental ({free_pages} pages)'
+
+    cursor.execute('PRAGMA optimize')
+    cursor.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+    conn.close()
+
+    return {
+        'mode': mode,
+        'file_bytes_before': size_before,
+        'file_bytes_after': os.path.getsize(DB_FILE)
+    }
+
 def clear_database() -> None:
     """Clear all data from the database (use with caution!)."""
+    init_database()
     conn = sqlite3.connect(DB_FILE)
     cursor = conn.cursor()
 
     cursor.execute('DELETE FROM flagged_comments')
+    cursor.execute('DELETE FROM comment_bodies')
     cursor.execute('DELETE FROM seen_ids')
+    cursor.execute('DELETE FROM detail_queue')
+    cursor.execute('DELETE FROM sync_state')
+    _rebuild_statistics(cursor)
+    cursor.execute('DELETE FROM term_stats')
+    cursor.execute('DELETE FROM corpus_stats')
+    cursor.execute('DELETE FROM campaign_clusters')
+    cursor.execute('DELETE FROM cluster_members')
+    cursor.execute('DELETE FROM lsh_buckets')
+    cursor.execute('DELETE FROM cluster_fingerprints')
+    cursor.execute('DELETE FROM comment_corpus')
+    cursor.execute('DELETE FROM corpus_coverage')
+    cursor.execute('DELETE FROM comment_revisions')
+    cursor.execute('DELETE FROM metadata_cache')
+    cursor.execute('DELETE FROM leases')
+    cursor.execute('DELETE FROM comment_timeline')
 
     conn.commit()
     conn.close()
+    bump_data_version()
 
     print("🗑️  Database cleared")
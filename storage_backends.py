@@ -0,0 +1,325 @@
+"""
+Pluggable storage for flagged comments.
+
+``main.py`` and ``db_utils.py`` store and query flagged comments through a
+``StorageBackend`` rather than calling storage.py directly. STORAGE_BACKEND
+picks one:
+
+- ``sqlite``: the single watcher database (the default; see storage.py)
+- ``sharded``: one SQLite database per month of posted date under
+  SHARD_DIR. Writes are routed by each comment's posted date, and
+  date-range queries open only the shards for the months they cover, so
+  large reads and exports of old months don't contend with the live
+  writer, which mostly touches the current month.
+- ``memory``: plain dictionaries, for tests and benchmarks
+
+Only flagged comments and seen IDs go through the backend. Operational
+state (the detail queue, leases, corpus, revisions, clusters, caches)
+always stays in the watcher database, and so does the seen-ID set of the
+SQLite-based backends; revision rechecks look up stored keywords through
+the backend. The query API and monthly archives read the watcher database
+directly, so they refuse to run with any backend but ``sqlite``.
+"""
+
+import heapq
+import json
+import os
+from abc import ABC, abstractmethod
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Set
+from config import OUTPUT_FILE, STORAGE_BACKEND, SHARD_DIR
+from models import Comment
+import storage
+from storage import COMMENT_COLUMNS
+
+
+class StorageBackend(ABC):
+    """Where flagged comments and seen IDs are kept."""
+
+    name = ""
+
+    @abstractmethod
+    def save_flagged_comments(self, comment_list: List[Comment]) -> int:
+        """Insert or update flagged comments; return how many were saved."""
+
+    @abstractmethod
+    def load_flagged_comments(self) -> List[Dict]:
+        """Every flagged comment, most recently flagged first."""
+
+    @abstractmethod
+    def get_comments_by_keyword(self, keyword: str) -> List[Dict]:
+        """Comments matching a keyword, most recently flagged first."""
+
+    @abstractmethod
+    def get_comments_by_date_range(self, start_date: str, end_date: str) -> List[Dict]:
+        """Comments posted between two dates (YYYY-MM-DD), newest first."""
+
+    @abstractmethod
+    def get_flagged_keywords(self, comment_ids: List[str]) -> Dict[str, str]:
+        """Stored keyword of each of the given comments that is flagged."""
+
+    @abstractmethod
+    def get_statistics(self) -> Dict:
+        """Statistics in the format of storage.get_statistics."""
+
+    @abstractmethod
+    def load_seen_ids(self) -> Set[str]:
+        """IDs of every comment already processed."""
+
+    @abstractmethod
+    def filter_seen_ids(self, comment_ids: List[str]) -> Set[str]:
+        """Which of the given comment IDs were already processed."""
+
+    @abstractmethod
+    def mark_as_seen(self, comment_id: str) -> None:
+        """Remember that a comment was processed."""
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Delete everything the backend stores (use with caution!)."""
+
+    def export_to_json(self, filename: str = None) -> int:
+        """
+        Export all flagged comments to a JSON file.
+
+        Args:
+            filename: Output filename (defaults to config OUTPUT_FILE)
+
+        Returns:
+            Number of comments exported
+        """
+        filename = filename or OUTPUT_FILE
+        comments = self.load_flagged_comments()
+        with open(filename, 'w') as f:
+            json.dump(comments, f, indent=2)
+        print(f"📤 Exported {len(comments)} comments to {filename}")
+        return len(comments)
+
+
+class SQLiteBackend(StorageBackend):
+    """The single watcher database (see storage.py)."""
+
+    name = "sqlite"
+
+    def save_flagged_comments(self, comment_list: List[Comment]) -> int:
+        storage.save_flagged_comments(comment_list)
+        return len(comment_list)
+
+    def load_flagged_comments(self) -> List[Dict]:
+        return storage.load_flagged_comments()
+
+    def get_comments_by_keyword(self, keyword: str) -> List[Dict]:
+        return storage.get_comments_by_keyword(keyword)
+
+    def get_comments_by_date_range(self, start_date: str, end_date: str) -> List[Dict]:
+        return storage.get_comments_by_date_range(start_date, end_date)
+
+    def get_flagged_keywords(self, comment_ids: List[str]) -> Dict[str, str]:
+        return storage.get_flagged_keywords(comment_ids)
+
+    def get_statistics(self) -> Dict:
+        return storage.get_statistics()
+
+    def load_seen_ids(self) -> Set[str]:
+        return storage.load_seen_ids()
+
+    def filter_seen_ids(self, comment_ids: List[str]) -> Set[str]:
+        return storage.filter_seen_ids(comment_ids)
+
+    def mark_as_seen(self, comment_id: str) -> None:
+        storage.mark_as_seen(comment_id)
+
+    def clear(self) -> None:
+        storage.clear_database()
+
+
+class MonthShardedBackend(SQLiteBackend):
+    """
+    One SQLite database per month of posted date.
+
+    Seen IDs and everything else stay in the watcher database; only
+    flagged comments are sharded.
+    """
+
+    name = "sharded"
+
+    def __init__(self, shard_dir: str = None):
+        self.shard_dir = shard_dir or SHARD_DIR
+
+    def _paths(self, months: List[str] = None) -> List[str]:
+        months = storage.list_shards(self.shard_dir) if months is None else months
+        return [storage.shard_path(self.shard_dir, month) for month in months]
+
+    def shards_for_range(self, start_date: str, end_date: str) -> List[str]:
+        """Months (YYYY_MM) with a shard that can hold comments posted in the range."""
+        first, last = storage.shard_month(start_date), storage.shard_month(end_date)
+        return [month for month in storage.list_shards(self.shard_dir)
+                if month != storage.UNDATED_SHARD and first <= month <= last]
+
+    def save_flagged_comments(self, comment_list: List[Comment]) -> int:
+        by_month: Dict[str, List[Comment]] = {}
+        for comment in comment_list:
+            by_month.setdefault(storage.shard_month(comment['date']), []).append(comment)
+
+        saved = 0
+        for month, comments in sorted(by_month.items()):
+            saved += storage.save_shard_comments(storage.shard_path(self.shard_dir, month), comments)
+        if comment_list:
+            print(f"✅ Saved {saved} flagged comments to {len(by_month)} shards")
+        return saved
+
+    def _query(self, paths: List[str], where: str = '', params: tuple = (),
+               order_by: str = 'created_at') -> List[Dict]:
+        """Run a query on each shard and merge the (already sorted) results."""
+        results = [storage.query_shard_comments(path, where, params, f'{order_by} DESC')
+                   for path in paths]
+        return list(heapq.merge(*results, key=lambda c: c[order_by] or '', reverse=True))
+
+    def load_flagged_comments(self) -> List[Dict]:
+        return self._query(self._paths())
+
+    def get_comments_by_keyword(self, keyword: str) -> List[Dict]:
+        return self._query(self._paths(), 'WHERE keyword = ?', (keyword,))
+
+    def get_comments_by_date_range(self, start_date: str, end_date: str) -> List[Dict]:
+        return self._query(self._paths(self.shards_for_range(start_date, end_date)),
+                           'WHERE date >= ? AND date <= ?', (start_date, end_date), 'date')
+
+    def get_flagged_keywords(self, comment_ids: List[str]) -> Dict[str, str]:
+        keywords = {}
+        remaining = list(comment_ids)
+        # Newest shards first: recently flagged comments are the ones most often revised
+        for path in reversed(self._paths()):
+            if not remaining:
+                break
+            keywords.update(storage.get_flagged_keywords(remaining, path))
+            remaining = [comment_id for comment_id in remaining if comment_id not in keywords]
+        return keywords
+
+    def get_statistics(self) -> Dict:
+        # Each shard keeps trigger-maintained summary tables, so this reads a
+        # few small rows per shard rather than scanning its comments
+        totals = {'total': 0, 'recent_comments': 0}
+        keyword_counts, docket_counts, daily_counts = Counter(), Counter(), Counter()
+        for path in self._paths():
+            shard = storage.get_shard_statistics(path)
+            if shard is None:
+                continue
+            totals['total'] += shard['total_flagged_comments']
+            totals['recent_comments'] += shard['recent_comments']
+            keyword_counts.update(shard['keyword_counts'])
+            docket_counts.update(shard['docket_counts'])
+            daily_counts.update(shard['daily_counts'])
+
+        return {
+            'total_flagged_comments': totals['total'],
+            'total_seen_ids': storage.get_statistics()['total_seen_ids'],
+            'keyword_counts': dict(sorted(keyword_counts.items())),
+            'docket_counts': dict(docket_counts.most_common()),
+            'daily_counts': dict(sorted(daily_counts.items())),
+            'recent_comments': totals['recent_comments']
+        }
+
+    def clear(self) -> None:
+        storage.clear_database()
+        for path in self._paths():
+            for suffix in ('', '-wal', '-shm'):
+                if os.path.exists(path + suffix):
+                    os.remove(path + suffix)
+
+
+class MemoryBackend(StorageBackend):
+    """Flagged comments and seen IDs in dictionaries, lost when the process exits."""
+
+    name = "memory"
+
+    def __init__(self):
+        self.comments: Dict[str, Dict] = {}
+        self.seen: Set[str] = set()
+
+    def save_flagged_comments(self, comment_list: List[Comment]) -> int:
+        now = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+        for comment in comment_list:
+            existing = self.comments.get(comment['id'])
+            row = {column: comment.get(column) for column in COMMENT_COLUMNS}
+            row['full_text'] = row['full_text'] or ''
+            row['created_at'] = existing['created_at'] if existing else now
+            if existing and row['cluster_id'] is None:
+                row['cluster_id'] = existing['cluster_id']
+            self.comments[comment['id']] = row
+        return len(comment_list)
+
+    def _sorted(self, comments, order_by: str = 'created_at') -> List[Dict]:
+        return sorted((dict(c) for c in comments), key=lambda c: c[order_by] or '', reverse=True)
+
+    def load_flagged_comments(self) -> List[Dict]:
+        return self._sorted(self.comments.values())
+
+    def get_comments_by_keyword(self, keyword: str) -> List[Dict]:
+        return self._sorted(c for c in self.comments.values() if c['keyword'] == keyword)
+
+    def get_comments_by_date_range(self, start_date: str, end_date: str) -> List[Dict]:
+        return self._sorted((c for c in self.comments.values()
+                             if c['date'] and start_date <= c['date'] <= end_date), 'date')
+
+    def get_flagged_keywords(self, comment_ids: List[str]) -> Dict[str, str]:
+        return {comment_id: self.comments[comment_id]['keyword']
+                for comment_id in comment_ids if comment_id in self.comments}
+
+    def get_statistics(self) -> Dict:
+        today = datetime.now(timezone.utc).date()
+        month_ago = (today - timedelta(days=30)).isoformat()
+        week_ago = (today - timedelta(days=7)).isoformat()
+        days = Counter(c['created_at'][:10] for c in self.comments.values())
+        return {
+            'total_flagged_comments': len(self.comments),
+            'total_seen_ids': len(self.seen),
+            'keyword_counts': dict(sorted(Counter(c['keyword'] for c in self.comments.values()).items())),
+            'docket_counts': dict(Counter(c['docket_id'] or '' for c in self.comments.values()).most_common()),
+            'daily_counts': {day: count for day, count in sorted(days.items()) if day >= month_ago},
+            'recent_comments': sum(count for day, count in days.items() if day >= week_ago)
+        }
+
+    def load_seen_ids(self) -> Set[str]:
+        return set(self.seen)
+
+    def filter_seen_ids(self, comment_ids: List[str]) -> Set[str]:
+        return self.seen.intersection(comment_ids)
+
+    def mark_as_seen(self, comment_id: str) -> None:
+        self.seen.add(comment_id)
+
+    def clear(self) -> None:
+        self.comments.clear()
+        self.seen.clear()
+
+
+BACKENDS = {
+    SQLiteBackend.name: SQLiteBackend,
+    MonthShardedBackend.name: MonthShardedBackend,
+    MemoryBackend.name: MemoryBackend,
+}
+
+_backend: Optional[StorageBackend] = None
+
+
+def create_backend(name: str) -> StorageBackend:
+    """Create a backend by name (sqlite, sharded or memory)."""
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown storage backend {name!r}; expected one of {sorted(BACKENDS)}")
+    return BACKENDS[name]()
+
+
+def get_backend() -> StorageBackend:
+    """The process-wide backend chosen by STORAGE_BACKEND."""
+    global _backend
+    if _backend is None:
+        _backend = create_backend(STORAGE_BACKEND)
+    return _backend
+
+
+def set_backend(backend: Optional[StorageBackend]) -> None:
+    """Replace the process-wide backend (e.g. with a MemoryBackend in tests); None resets it."""
+    global _backend
+    _backend = backend
@@ -0,0 +1,265 @@
+"""
+Per-subscriber alert routing.
+
+Each subscriber (a team, a mailing list, a person) watches its own terms
+and has its own webhooks and filters. Subscriptions are compiled into an
+inverted index from normalized term to subscriber, so routing a flagged
+comment costs one scan of its text plus a lookup per matched term,
+however many subscribers there are. Within a cycle, every delivery for a
+subscriber is coalesced into a single digest per channel, formatted with
+the notifier's formatters.
+
+Subscriptions live in a JSON file (SUBSCRIPTIONS_FILE):
+
+    [
+      {"id": "ag-policy", "name": "Ag Policy Team",
+       "terms": ["glyphosate", "atrazine"],
+       "teams_webhook": "https://...", "email_webhook": "https://...",
+       "min_score": 0.1, "dockets": ["EPA-HQ-OPP-2009-0361"],
+       "document_types": ["Public Submission"]}
+    ]
+"""
+
+import json
+import os
+import re
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Set
+from config import KEYWORDS, SUBSCRIPTIONS_FILE, SUBSCRIPTION_DIGEST_LIMIT
+from models import Comment, CommentRecord
+from normalizer import normalize_document, normalize_term
+from notifier import format_teams_digest, format_email_digest, post_webhook
+
+
+class Subscriber:
+    """One subscription: watch terms, delivery channels and filters."""
+
+    __slots__ = ("id", "name", "terms", "teams_webhook", "email_webhook",
+                 "min_score", "dockets", "document_types")
+
+    def __init__(self, id: str, terms: List[str], name: str = "", teams_webhook: str = "",
+                 email_webhook: str = "", min_score: float = 0.0, dockets: List[str] = None,
+                 document_types: List[str] = None):
+        self.id = id
+        self.name = name or id
+        self.terms = list(terms)
+        self.teams_webhook = teams_webhook
+        self.email_webhook = email_webhook
+        self.min_score = min_score
+        self.dockets = set(dockets or ())
+        self.document_types = set(document_types or ())
+
+    def accepts(self, comment: Comment) -> bool:
+        """Check the subscriber's docket, document type and relevance filters."""
+        if self.dockets and comment.docket_id not in self.dockets:
+            return False
+        if self.document_types and comment.document_type not in self.document_types:
+            return False
+        # Unscored comments always pass, as in notifier.send_alerts
+        return comment.score is None or comment.score >= self.min_score
+
+    def __repr__(self) -> str:
+        return f"Subscriber({self.id!r}, terms={self.terms!r})"
+
+
+def load_subscribers(path: str = None) -> List[Subscriber]:
+    """
+    Load subscribers from the subscriptions file.
+
+    Args:
+        path: JSON file to read (defaults to SUBSCRIPTIONS_FILE)
+
+    Returns:
+        List of subscribers; empty if the file does not exist
+    """
+    path = path or SUBSCRIPTIONS_FILE
+    if not os.path.exists(path):
+        return []
+
+    with open(path, 'r') as f:
+        entries = json.load(f)
+
+    subscribers = []
+    for entry in entries:
+        if not entry.get("id") or not entry.get("terms"):
+            print(f"⚠️  Skipping subscription without id or terms: {entry}")
+            continue
+        # Unknown keys (typos, fields from newer versions) are ignored rather than fatal
+        unknown = sorted(set(entry) - set(Subscriber.__slots__))
+        if unknown:
+            print(f"⚠️  Ignoring unknown fields in subscription {entry['id']}: {', '.join(unknown)}")
+        subscribers.append(Subscriber(**{key: value for key, value in entry.items()
+                                         if key in Subscriber.__slots__}))
+    return subscribers
+
+
+class SubscriptionIndex:
+    """
+    Inverted index from normalized watch term to subscribers.
+
+    One regex over every subscribed term finds the terms a comment
+    contains; terms nested inside a longer match (e.g. "safety" within
+    "worker safety") are precomputed, so they are found too.
+    """
+
+    def __init__(self, subscribers: List[Subscriber]):
+        self.subscribers = {subscriber.id: subscriber for subscriber in subscribers}
+        self.postings: Dict[str, List[Subscriber]] = defaultdict(list)
+        self.terms: Dict[str, str] = {}    # normalized term -> term as first configured
+        for subscriber in subscribers:
+            for term in subscriber.terms:
+                normalized = normalize_term(term)
+                if not normalized:
+                    continue
+                self.terms.setdefault(normalized, term)
+                if subscriber not in self.postings[normalized]:
+                    self.postings[normalized].append(subscriber)
+
+        # Longest first, so the regex reports the longest term at each position
+        ordered = sorted(self.postings, key=len, reverse=True)
+        self._nested = {term: [other for other in ordered if other != term and other in term]
+                        for term in ordered}
+        self._any_term = re.compile(
+            "(?=(" + "|".join(re.escape(term) for term in ordered) + "))") if ordered else None
+
+    def __len__(self) -> int:
+        return len(self.subscribers)
+
+    def watch_terms(self, keyword_list: List[str] = None) -> List[str]:
+        """
+        Global keywords followed by subscribed terms not already watched.
+
+        Args:
+            keyword_list: Global keywords, in priority order (defaults to config)
+
+        Returns:
+            Combined watch list for fetching and filtering
+        """
+        keyword_list = list(KEYWORDS if keyword_list is None else keyword_list)
+        watched = {normalize_term(keyword) for keyword in keyword_list}
+        return keyword_list + [term for normalized, term in self.terms.items()
+                               if normalized not in watched]
+
+    def matched_terms(self, comment: Comment) -> Set[str]:
+        """Normalized subscribed terms found in a comment's title or body."""
+        if self._any_term is None:
+            return set()
+        document = normalize_document(CommentRecord(comment.id, title=comment.title,
+                                                    comment=comment.full_text))
+        found = set()
+        for value in document.fields.values():
+            for match in self._any_term.finditer(value.text):
+                term = match.group(1)
+                if term not in found:
+                    found.add(term)
+                    found.update(self._nested[term])
+        return found
+
+    def route(self, comments: List[Comment]) -> Dict[str, "Digest"]:
+        """
+        Route flagged comments to interested subscribers.
+
+        Args:
+            comments: Processed comments to deliver
+
+        Returns:
+            Dictionary of subscriber ID to that subscriber's digest
+        """
+        digests = {}
+        for comment in comments:
+            interested = {}
+            for term in self.matched_terms(comment):
+                for subscriber in self.postings[term]:
+                    interested.setdefault(subscriber.id, (subscriber, []))[1].append(self.terms[term])
+            for subscriber_id, (subscriber, terms) in interested.items():
+                if subscriber.accepts(comment):
+                    digests.setdefault(subscriber_id, Digest(subscriber)).add(comment, terms)
+        return digests
+
+
+class Digest:
+    """Comments coalesced for one subscriber within a cycle."""
+
+    def __init__(self, subscriber: Subscriber):
+        self.subscriber = subscriber
+        self.comments: List[Comment] = []
+        self.terms: Dict[str, List[str]] = {}   # comment ID -> subscribed terms it matched
+
+    def add(self, comment: Comment, terms: List[str]) -> None:
+        if comment.id not in self.terms:
+            self.comments.append(comment)
+        self.terms[comment.id] = sorted(set(self.terms.get(comment.id, []) + terms))
+
+    def shown(self, limit: int = None) -> List[Comment]:
+        """The comments to include, most relevant first."""
+        limit = limit or SUBSCRIPTION_DIGEST_LIMIT
+        ordered = sorted(self.comments, key=lambda c: c.score or 0.0, reverse=True)
+        return ordered[:limit]
+
+    def send(self, limit: int = None) -> Dict[str, bool]:
+        """
+        Deliver the digest to each of the subscriber's channels.
+
+        Args:
+            limit: Most comments to include (defaults to config)
+
+        Returns:
+            Dictionary of channel name to whether delivery succeeded
+        """
+        comments = self.shown(limit)
+        heading = self.subscriber.name
+        total = len(self.comments)
+        results = {}
+        if self.subscriber.teams_webhook:
+            results["teams"] = post_webhook(
+                self.subscriber.teams_webhook, format_teams_digest(comments, heading, total),
+                f"Teams digest ({total} comments) for {self.subscriber.id}")
+        if self.subscriber.email_webhook:
+            results["email"] = post_webhook(
+                self.subscriber.email_webhook, format_email_digest(comments, heading, total),
+                f"Email digest ({total} comments) for {self.subscriber.id}")
+        return results
+
+
+def send_digests(digests: Dict[str, Digest]) -> Dict:
+    """
+    Deliver one digest per subscriber and channel.
+
+    Args:
+        digests: Output of SubscriptionIndex.route
+
+    Returns:
+        Dictionary with counts of digests sent and failed, and under
+        "delivered" the first delivery time (epoch seconds) of each comment
+        included in a digest that reached at least one channel
+    """
+    if not digests:
+        print("✅ No subscriber deliveries this run.")
+        return {"sent": 0, "failed": 0, "delivered": {}}
+
+    print(f"📬 Routing alerts to {len(digests)} subscribers...")
+    sent = failed = 0
+    delivered = {}
+    for digest in digests.values():
+        results = digest.send()
+        for ok in results.values():
+            sent += ok
+            failed += not ok
+        if any(results.values()):
+            now = time.time()
+            for comment in digest.shown():
+                delivered.setdefault(comment.id, now)
+    print(f"   Subscriber digests: {sent}/{sent + failed} sent")
+    return {"sent": sent, "failed": failed, "delivered": delivered}
+
+
+_index: Optional[SubscriptionIndex] = None
+
+
+def get_index() -> SubscriptionIndex:
+    """Load and index the subscriptions file once per process."""
+    global _index
+    if _index is None:
+        _index = SubscriptionIndex(load_subscribers())
+    return _index
@@ -0,0 +1,168 @@
+"""
+Stemmed and fuzzy keyword matching through a precomputed term index.
+
+Plain substring matching misses inflections ("workers' safety") and
+misspellings ("glyposate"). Rather than trying every variant of every
+watch term against every document, each non-exact term is expanded once,
+when the matcher is built, into lookup tables:
+
+- ``stem``: the stem of each of the term's words
+- ``fuzzy``: the stems, plus every single-character deletion of each stem
+  (symmetric delete), so a document word within one edit (insertion,
+  deletion, substitution or adjacent transposition) of a term word is
+  found by hashing the word's own deletions
+
+A document is tokenized once, and each token costs a few dictionary
+lookups however many terms are watched. Multi-word terms match when
+consecutive tokens match consecutive words of the term.
+
+The mode is chosen per keyword with KEYWORD_MODES; unlisted keywords stay
+exact substring matches.
+"""
+
+from collections import defaultdict
+from typing import Dict, Iterable, List, Set, Tuple
+from config import KEYWORD_MODES, FUZZY_MIN_WORD_LENGTH
+from normalizer import tokenize
+
+EXACT = "exact"
+STEM = "stem"
+FUZZY = "fuzzy"
+MODES = (EXACT, STEM, FUZZY)
+
+# Suffixes stripped by stem(), longest first within each family
+_SUFFIXES = (("ies", "y"), ("ied", "y"), ("ings", ""), ("ing", ""), ("ed", ""), ("es", ""), ("s", ""))
+
+# Tokens whose index lookups are remembered per index before the memo is reset
+_TOKEN_MEMO_SIZE = 100000
+
+
+def keyword_mode(keyword: str) -> str:
+    """The configured match mode of a keyword (exact unless listed in KEYWORD_MODES)."""
+    mode = KEYWORD_MODES.get(keyword, EXACT)
+    if mode not in MODES:
+        raise ValueError(f"Unknown match mode {mode!r} for {keyword!r}; expected one of {MODES}")
+    return mode
+
+
+def stem(token: str) -> str:
+    """
+    Reduce a normalized word to a light stem.
+
+    Possessives and one inflectional suffix are removed, then a final "e",
+    so "pesticide", "pesticides" and "pesticides'" share the stem "pesticid".
+    """
+    token = token.replace("’", "'")
+    if token.endswith("'s"):
+        token = token[:-2]
+    token = token.rstrip("'")
+    for suffix, replacement in _SUFFIXES:
+        if token.endswith(suffix) and len(token) - len(suffix) >= 3:
+            if suffix == "s" and token.endswith(("ss", "us", "is")):
+                break
+            token = token[:-len(suffix)] + replacement
+            break
+    if token.endswith("e") and len(token) > 4:
+        token = token[:-1]
+    return token
+
+
+def deletes(word: str) -> Set[str]:
+    """Every string one character deletion away from word."""
+    return {word[:i] + word[i + 1:] for i in range(len(word))}
+
+
+def within_one_edit(a: str, b: str) -> bool:
+    """Whether a and b differ by at most one insertion, deletion, substitution or swap."""
+    if a == b:
+        return True
+    if abs(len(a) - len(b)) > 1:
+        return False
+    if len(a) > len(b):
+        a, b = b, a
+    i = 0
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+    if len(a) < len(b):
+        return a[i:] == b[i + 1:]
+    return (a[i + 1:] == b[i + 1:]
+            or (i + 1 < len(a) and a[i] == b[i + 1] and a[i + 1] == b[i] and a[i + 2:] == b[i + 2:]))
+
+
+class TermIndex:
+    """
+    Lookup tables for stemmed and fuzzy watch terms.
+
+    Each term is a phrase of one or more words; the tables map a word key
+    to the (phrase, word position) pairs it can stand for.
+    """
+
+    def __init__(self, terms: Iterable[Tuple[str, str, str]]):
+        """
+        Args:
+            terms: (keyword, normalized term, mode) for each non-exact keyword
+        """
+        self.keywords: List[str] = []
+        self.lengths: List[int] = []
+        self.stems: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        self.fuzzy: Dict[str, List[Tuple[int, int, str]]] = defaultdict(list)
+        self._memo: Dict[str, Set[Tuple[int, int]]] = {}
+
+        for keyword, term, mode in terms:
+            words = [stem(token) for token in tokenize(term)]
+            if mode == EXACT or not words:
+                continue
+            phrase = len(self.keywords)
+            self.keywords.append(keyword)
+            self.lengths.append(len(words))
+            for position, word in enumerate(words):
+                self.stems[word].append((phrase, position))
+                if mode == FUZZY and len(word) >= FUZZY_MIN_WORD_LENGTH:
+                    for key in deletes(word) | {word}:
+                        self.fuzzy[key].append((phrase, position, word))
+
+    def __len__(self) -> int:
+        return len(self.keywords)
+
+    def positions(self, token: str) -> Set[Tuple[int, int]]:
+        """The (phrase, word position) pairs a document token matches."""
+        hits = self._memo.get(token)
+        if hits is not None:
+            return hits
+
+        word = stem(token)
+        hits = set(self.stems.get(word, ()))
+        if self.fuzzy and len(word) >= FUZZY_MIN_WORD_LENGTH - 1:
+            for key in deletes(word) | {word}:
+                for phrase, position, target in self.fuzzy.get(key, ()):
+                    # Symmetric deletes also pair words two edits apart; confirm the distance
+                    if (phrase, position) not in hits and within_one_edit(word, target):
+                        hits.add((phrase, position))
+
+        if len(self._memo) >= _TOKEN_MEMO_SIZE:
+            self._memo.clear()
+        self._memo[token] = hits
+        return hits
+
+    def find(self, token_lists: Iterable[List[str]]) -> Set[str]:
+        """
+        Find the indexed keywords in tokenized texts.
+
+        Args:
+            token_lists: Word tokens of each text (a phrase never spans two texts)
+
+        Returns:
+            Keywords with at least one match
+        """
+        found = set()
+        for tokens in token_lists:
+            hits = [self.positions(token) for token in tokens]
+            for start, token_hits in enumerate(hits):
+                for phrase, position in token_hits:
+                    if position or self.keywords[phrase] in found:
+                        continue
+                    length = self.lengths[phrase]
+                    if start + length <= len(hits) and all(
+                            (phrase, offset) in hits[start + offset] for offset in range(1, length)):
+                        found.add(self.keywords[phrase])
+        return found
@@ -2,20 +2,111 @@
 """
 Simple webhook server for testing email notifications locally.
 This server will receive webhook calls and display them in the console.
+
+Run with --sink for load testing: payloads aren't printed, only the most
+recent ones are kept, and latency, errors and 429s can be injected. GET
+/stats reports throughput and handling latency.
 """
 
 from flask import Flask, request, jsonify
+import argparse
 import json
+import logging
+import random
+import statistics
+import threading
+import time
+from collections import deque
 from datetime import datetime
 
 app = Flask(__name__)
 
-# Store received webhooks
-received_webhooks = []
+# Store received webhooks (only the most recent are kept)
+received_webhooks = deque(maxlen=1000)
+
+# Load-test sink settings, set from the command line
+sink_mode = False
+latency_ms = 0.0
+jitter_ms = 0.0
+error_rate = 0.0
+throttle_rate = 0.0
+retry_after = 1
+
+class SinkStats:
+    """Thread-safe throughput and latency counters."""
+
+    def __init__(self, window: int = 10000):
+        self._lock = threading.Lock()
+        self.window = window
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.started_at = time.monotonic()
+            self.counts = {'received': 0, 'accepted': 0, 'errors_injected': 0, 'throttled': 0}
+            self.latencies = deque(maxlen=self.window)
+
+    def record(self, outcome: str, seconds: float):
+        with self._lock:
+            self.counts['received'] += 1
+            self.counts[outcome] += 1
+            self.latencies.append(seconds)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            elapsed = time.monotonic() - self.started_at
+            latencies = sorted(self.latencies)
+            counts = dict(self.counts)
+
+        summary = {
+            **counts,
+            'elapsed_seconds': round(elapsed, 3),
+            'accepted_per_second': round(counts['accepted'] / elapsed, 1) if elapsed else 0.0,
+            'buffered': len(received_webhooks)
+        }
+        if len(latencies) >= 2:
+            cuts = statistics.quantiles(latencies, n=100, method='inclusive')
+            summary.update({
+                'latency_ms_p50': round(cuts[49] * 1000, 2),
+                'latency_ms_p95': round(cuts[94] * 1000, 2),
+                'latency_ms_p99': round(cuts[98] * 1000, 2),
+                'latency_ms_max': round(latencies[-1] * 1000, 2)
+            })
+        return summary
+
+stats = SinkStats()
+
+def sink_webhook():
+    """Accept a webhook in load-test mode, applying injected faults."""
+    started = time.perf_counter()
+
+    delay = latency_ms + (random.uniform(-jitter_ms, jitter_ms) if jitter_ms else 0.0)
+    if delay > 0:
+        time.sleep(delay / 1000)
+
+    roll = random.random()
+    if roll < throttle_rate:
+        stats.record('throttled', time.perf_counter() - started)
+        response = jsonify({'status': 'error', 'message': 'Too many requests'})
+        response.headers['Retry-After'] = str(retry_after)
+        return response, 429
+    if roll < throttle_rate + error_rate:
+        stats.record('errors_injected', time.perf_counter() - started)
+        return jsonify({'status': 'error', 'message': 'Injected failure'}), 500
+
+    received_webhooks.append({
+        'timestamp': datetime.now().isoformat(),
+        'data': request.get_data()[:2048].decode('utf-8', 'replace')
+    })
+    stats.record('accepted', time.perf_counter() - started)
+    return jsonify({'status': 'success'}), 200
 
 @app.route('/webhook', methods=['POST'])
 def webhook():
     """Handle incoming webhook requests."""
+    if sink_mode:
+        return sink_webhook()
+
     try:
         data = request.get_json()
 
@@ -26,6 +117,7 @@ def webhook():
             'data': data
         }
         received_webhooks.append(webhook_data)
+        stats.record('accepted', 0.0)
 
         # Display the webhook
         print("\n📨 WEBHOOK RECEIVED:")
@@ -56,14 +148,19 @@ def list_webhooks():
     """List all received webhooks."""
     return jsonify({
         'count': len(received_webhooks),
-        'webhooks': received_webhooks
+        'webhooks': list(received_webhooks)
     })
 
+@app.route('/stats', methods=['GET'])
+def webhook_stats():
+    """Report throughput and handling latency since the last clear."""
+    return jsonify(stats.snapshot())
+
 @app.route('/clear', methods=['POST'])
 def clear_webhooks():
-    """Clear all stored webhooks."""
-    global received_webhooks
-    received_webhooks = []
+    """Clear all stored webhooks and counters."""
+    received_webhooks.clear()
+    stats.reset()
     return jsonify({'status': 'success', 'message': 'Webhooks cleared'})
 
 @app.route('/', methods=['GET'])
@@ -80,7 +177,8 @@ def home():
         <ul>
             <li><strong>POST /webhook</strong> - Receive webhook notifications</li>
             <li><strong>GET /webhooks</strong> - List all received webhooks</li>
-            <li><strong>POST /clear</strong> - Clear all stored webhooks</li>
+            <li><strong>GET /stats</strong> - Throughput and latency counters</li>
+            <li><strong>POST /clear</strong> - Clear all stored webhooks and counters</li>
         </ul>
 
         <h2>Current Status:</h2>
@@ -95,20 +193,43 @@ def home():
         </ol>
 
         <h2>Recent Webhooks:</h2>
-        <pre>{json.dumps(received_webhooks[-5:], indent=2)}</pre>
+        <pre>{json.dumps(list(received_webhooks)[-5:], indent=2, default=str) if not sink_mode else 'Sink mode: payloads are not rendered'}</pre>
     </body>
     </html>
     """
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Local webhook server for notification testing")
+    parser.add_argument("--port", type=int, default=5000)
+    parser.add_argument("--sink", action="store_true", help="Load-test mode: count payloads instead of printing them")
+    parser.add_argument("--buffer", type=int, default=1000, help="Recent payloads to keep")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Added response latency")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Random +/- latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 500")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Fraction of requests answered with 429")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After seconds sent with 429s")
+    args = parser.parse_args()
+
+    sink_mode = args.sink
+    received_webhooks = deque(maxlen=args.buffer)
+    latency_ms, jitter_ms = args.latency_ms, args.jitter_ms
+    error_rate, throttle_rate, retry_after = args.error_rate, args.throttle_rate, args.retry_after
+
     print("🚀 Starting test webhook server...")
-    print("📡 Server will be available at: http://localhost:5000")
-    print("🔗 Webhook endpoint: http://localhost:5000/webhook")
-    print("📋 Instructions: http://localhost:5000")
-    print("\n💡 To test email notifications:")
-    print("   1. Set EMAIL_WEBHOOK_URL=http://localhost:5000/webhook in .env")
-    print("   2. Set ENABLE_EMAIL_ALERTS=true in .env")
-    print("   3. Run: python test_notifications.py")
+    print(f"📡 Server will be available at: http://localhost:{args.port}")
+    print(f"🔗 Webhook endpoint: http://localhost:{args.port}/webhook")
+    print(f"📋 Instructions: http://localhost:{args.port}")
+    if sink_mode:
+        # Per-request access logs would dominate the load test
+        logging.getLogger('werkzeug').setLevel(logging.ERROR)
+        print(f"\n🏋️  Sink mode: latency {latency_ms}±{jitter_ms} ms, "
+              f"error rate {error_rate:.0%}, 429 rate {throttle_rate:.0%}")
+        print(f"📈 Counters: http://localhost:{args.port}/stats")
+    else:
+        print("\n💡 To test email notifications:")
+        print(f"   1. Set EMAIL_WEBHOOK_URL=http://localhost:{args.port}/webhook in .env")
+        print("   2. Set ENABLE_EMAIL_ALERTS=true in .env")
+        print("   3. Run: python test_notifications.py")
     print("\n" + "=" * 60)
 
-    app.run(host='0.0.0.0', port=5000, debug=True)
+    app.run(host='0.0.0.0', port=args.port, debug=False, threaded=True)
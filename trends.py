@@ -0,0 +1,213 @@
+"""
+Streaming trend and spike detection for keyword and docket match volume.
+
+Matches are counted as they flow through a cycle into fixed time buckets
+(hourly and daily), per keyword and per docket, by when the watcher
+observed them. Posted dates are often only day-precise, which would pile a
+day's matches into its first hourly bucket, and late-arriving comments
+would land in buckets already checked. Only the
+last few dozen buckets of each series are kept, as a head index plus a
+short list of counts, and saved as compact JSON in ``sync_state`` between
+runs. At the end of a cycle, each series' newest buckets are compared with
+the buckets before them; one that goes over its baseline raises a spike
+alert through the notifier, once per bucket. Until enough buckets have
+been tracked to form a baseline, a window does not alert.
+"""
+
+import json
+import math
+from datetime import datetime, timezone
+from typing import Dict, List
+from config import (
+    TREND_WINDOWS,
+    TREND_BASELINE_BUCKETS,
+    TREND_MIN_SPIKE_COUNT,
+    TREND_SPIKE_RATIO,
+    TREND_SPIKE_STDDEVS
+)
+from storage import get_sync_state, set_sync_state
+
+# sync_state key holding the serialized window state
+TREND_STATE_KEY = "trend_windows"
+
+# Recent buckets checked for spikes each cycle (matches arrive with some lag)
+CHECK_BUCKETS = 2
+
+
+class BucketSeries:
+    """Counts in consecutive buckets, ending at bucket number ``head``."""
+
+    __slots__ = ("head", "counts")
+
+    def __init__(self, head: int, counts: List[int] = None):
+        self.head = head
+        self.counts = counts or [0]
+
+    def add(self, bucket: int, retained: int, amount: int = 1) -> bool:
+        """
+        Count into a bucket, sliding the window forward if it is newer.
+
+        Returns:
+            False if the bucket is older than the retained window
+        """
+        if bucket > self.head:
+            gap = bucket - self.head
+            if gap >= retained:
+                self.counts = [0]
+            else:
+                self.counts.extend([0] * gap)
+                del self.counts[:-retained]
+            self.head = bucket
+        offset = len(self.counts) - 1 - (self.head - bucket)
+        if offset < 0:
+            return False
+        self.counts[offset] += amount
+        return True
+
+    def count(self, bucket: int) -> int:
+        offset = len(self.counts) - 1 - (self.head - bucket)
+        return self.counts[offset] if 0 <= offset < len(self.counts) and bucket <= self.head else 0
+
+    def baseline(self, bucket: int, size: int) -> List[int]:
+        """Counts of the ``size`` buckets before ``bucket``."""
+        return [self.count(b) for b in range(bucket - size, bucket)]
+
+
+class TrendTracker:
+    """Sliding-window match counts per window, dimension and key."""
+
+    def __init__(self, state: Dict = None):
+        state = state or {}
+        self.series: Dict[str, Dict[str, BucketSeries]] = {
+            window: {key: BucketSeries(head, counts)
+                     for key, (head, counts) in state.get("series", {}).get(window, {}).items()}
+            for window in TREND_WINDOWS
+        }
+        # Newest bucket already alerted on, per window and key
+        self.alerted: Dict[str, Dict[str, int]] = {
+            window: dict(state.get("alerted", {}).get(window, {})) for window in TREND_WINDOWS
+        }
+        # Buckets from before tracking began are unknown, not zero
+        self.started = state.get("started", datetime.now(timezone.utc).timestamp())
+
+    @classmethod
+    def load(cls) -> "TrendTracker":
+        """Restore the tracker saved by the previous run."""
+        state = get_sync_state(TREND_STATE_KEY)
+        return cls(json.loads(state) if state else None)
+
+    def save(self) -> None:
+        """Persist the window state for the next run."""
+        state = {
+            "series": {window: {key: [series.head, series.counts] for key, series in keyed.items()}
+                       for window, keyed in self.series.items()},
+            "alerted": self.alerted,
+            "started": self.started
+        }
+        set_sync_state(TREND_STATE_KEY, json.dumps(state, separators=(",", ":")))
+
+    def observe(self, keyword: str, docket_id: str = "", observed_at: float = None) -> None:
+        """
+        Count one match.
+
+        Args:
+            keyword: Matched watch term
+            docket_id: Docket the comment was filed on
+            observed_at: Epoch seconds when the match was seen (defaults to now)
+        """
+        when = datetime.now(timezone.utc).timestamp() if observed_at is None else observed_at
+        keys = [f"keyword:{keyword}"] + ([f"docket:{docket_id}"] if docket_id else [])
+        for window, (bucket_seconds, retained) in TREND_WINDOWS.items():
+            bucket = int(when // bucket_seconds)
+            for key in keys:
+                series = self.series[window].get(key)
+                if series is None:
+                    series = self.series[window][key] = BucketSeries(bucket)
+                series.add(bucket, retained)
+
+    def detect_spikes(self, now: float = None) -> List[Dict]:
+        """
+        Find series whose newest buckets went over their baseline.
+
+        A bucket spikes when its count reaches the largest of
+        TREND_MIN_SPIKE_COUNT, TREND_SPIKE_RATIO times the baseline mean,
+        and the mean plus TREND_SPIKE_STDDEVS standard deviations.
+
+        Args:
+            now: Current epoch seconds (defaults to the clock)
+
+        Returns:
+            Spike dictionaries, not previously alerted, largest first
+        """
+        now = now if now is not None else datetime.now(timezone.utc).timestamp()
+        spikes = []
+        for window, (bucket_seconds, _) in TREND_WINDOWS.items():
+            current = int(now // bucket_seconds)
+            first_tracked = int(self.started // bucket_seconds) + 1
+            for key, series in self.series[window].items():
+                for bucket in range(current - CHECK_BUCKETS + 1, current + 1):
+                    if self.alerted[window].get(key, -1) >= bucket:
+                        continue
+                    count = series.count(bucket)
+                    if count < TREND_MIN_SPIKE_COUNT:
+                        continue
+                    # Need at least half a baseline of fully tracked buckets
+                    baseline_size = min(TREND_BASELINE_BUCKETS[window], bucket - first_tracked)
+                    if baseline_size < TREND_BASELINE_BUCKETS[window] // 2:
+                        continue
+                    history = series.baseline(bucket, baseline_size)
+                    mean = sum(history) / len(history)
+                    stddev = math.sqrt(sum((c - mean) ** 2 for c in history) / len(history))
+                    threshold = max(TREND_MIN_SPIKE_COUNT, mean * TREND_SPIKE_RATIO,
+                                    mean + TREND_SPIKE_STDDEVS * stddev)
+                    if count >= threshold:
+                        dimension, name = key.split(":", 1)
+                        spikes.append({
+                            "window": window,
+                            "dimension": dimension,
+                            "name": name,
+                            "bucket_start": datetime.fromtimestamp(
+                                bucket * bucket_seconds, timezone.utc).strftime("%Y-%m-%d %H:%M UTC"),
+                            "count": count,
+                            "baseline_mean": round(mean, 2),
+                            "threshold": round(threshold, 2)
+                        })
+                        self.alerted[window][key] = bucket
+
+        # Forget alert markers for series that were slid out of state
+        for window in TREND_WINDOWS:
+            self.alerted[window] = {key: bucket for key, bucket in self.alerted[window].items()
+                                    if key in self.series[window]}
+        return sorted(spikes, key=lambda s: s["count"] / max(s["baseline_mean"], 1.0), reverse=True)
+
+    def prune(self, now: float = None) -> None:
+        """Drop series with no counts left in their retained window."""
+        now = now if now is not None else datetime.now(timezone.utc).timestamp()
+        for window, (bucket_seconds, retained) in TREND_WINDOWS.items():
+            oldest = int(now // bucket_seconds) - retained + 1
+            self.series[window] = {key: series for key, series in self.series[window].items()
+                                   if series.head >= oldest and any(series.counts)}
+
+    def summary(self, window: str, dimension: str, top: int = 10) -> List[Dict]:
+        """
+        Current-bucket counts and baseline means for one window and dimension.
+
+        Args:
+            window: "hour" or "day"
+            dimension: "keyword" or "docket"
+            top: Most series to return
+
+        Returns:
+            Dictionaries with name, current count and baseline mean, busiest first
+        """
+        bucket_seconds, _ = TREND_WINDOWS[window]
+        current = int(datetime.now(timezone.utc).timestamp() // bucket_seconds)
+        rows = []
+        for key, series in self.series[window].items():
+            kind, name = key.split(":", 1)
+            if kind != dimension:
+                continue
+            history = series.baseline(current, TREND_BASELINE_BUCKETS[window])
+            rows.append({"name": name, "current": series.count(current),
+                         "baseline_mean": round(sum(history) / len(history), 2)})
+        return sorted(rows, key=lambda r: r["current"], reverse=True)[:top]